@@ -0,0 +1,34 @@
+from django.contrib import admin
+
+from apps.common.cache import bump_data_version
+from apps.common.models import DataVersion
+
+
+class DataVersionAdminMixin:
+    '''
+    ModelAdmin mixin bumping the data version after every edit or deletion made from the admin,
+    so that the shared cache does not keep serving the previous data (see `apps/common/cache.py`).
+    '''
+    # called once the object and its many-to-many relations are saved
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        bump_data_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_data_version()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_data_version()
+
+
+class DataVersionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'version', 'updated_at']
+    readonly_fields = ['version', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(DataVersion, DataVersionAdmin)
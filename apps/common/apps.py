@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CommonConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.common'
+
+    def ready(self):
+        from apps.common.middleware import install_query_timer
+        connection_created.connect(install_query_timer)
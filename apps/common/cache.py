@@ -0,0 +1,105 @@
+'''
+Shared cache of the read endpoints, stored in the `default` cache of CACHES (see CACHE_BACKEND in `config/settings.py`).
+
+Every entry is keyed by a namespace (e.g. 'course-detail') and a hash of what the result depends on
+(e.g. the request path and query parameters), and stored with the current data version as its cache version.
+The data version is a single database row (see `DataVersion`) bumped at the end of every scraper run writing rows
+(see `RunRecorder`), by the compile commands and by admin edits: every entry of an older version is then never read
+again and expires, in every worker, whatever the backend, without deleting any key.
+A worker reads the data version at most once per CACHE_VERSION_TTL seconds.
+The in-process indexes (prerequisite graph, eligibility evaluator, degree planner, free-slot and venue indexes)
+are rebuilt when the data version they were built at changes, see `get_data_version`.
+'''
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from hashlib import sha256
+from time import monotonic, time_ns
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+from apps.common.models import DataVersion
+
+
+T = TypeVar('T')
+
+DATA_VERSION_ID = 1
+
+_missing = object()
+
+# (data version, monotonic time it was read at)
+_data_version: Optional[Tuple[int, float]] = None
+
+
+def cache_enabled() -> bool:
+    return not isinstance(caches['default'], DummyCache)
+
+def _read_data_version(version: Optional[int]) -> int:
+    global _data_version
+    _data_version = (version or 0, monotonic())
+    return _data_version[0]
+
+def _memoized_data_version() -> Optional[int]:
+    if _data_version is not None and monotonic() - _data_version[1] < settings.CACHE_VERSION_TTL:
+        return _data_version[0]
+    return None
+
+'''
+Return the current data version, 0 before the first bump.
+'''
+def get_data_version() -> int:
+    version = _memoized_data_version()
+    if version is not None:
+        return version
+    return _read_data_version(DataVersion.objects.filter(pk=DATA_VERSION_ID).values_list('version', flat=True).first())
+
+async def aget_data_version() -> int:
+    version = _memoized_data_version()
+    if version is not None:
+        return version
+    return _read_data_version(await DataVersion.objects.filter(pk=DATA_VERSION_ID).values_list('version', flat=True).afirst())
+
+'''
+Bump the data version, invalidating every entry of the shared cache, and return the new version.
+'''
+def bump_data_version() -> int:
+    DataVersion.objects.get_or_create(pk=DATA_VERSION_ID)
+    DataVersion.objects.filter(pk=DATA_VERSION_ID).update(
+        version=Greatest(F('version') + 1, Value(time_ns() // 1000)),
+        updated_at=timezone.now(),
+    )
+    return _read_data_version(DataVersion.objects.get(pk=DATA_VERSION_ID).version)
+
+'''
+Key of the entry of `namespace` for the given parts, hashed so that long query strings
+(e.g. occupied schedules) fit the key length limit of every backend.
+'''
+def make_key(namespace: str, *parts: Any) -> str:
+    return f'{namespace}:{sha256(repr(parts).encode()).hexdigest()[:32]}'
+
+'''
+Return the entry of `namespace` for `parts` at the current data version, computed by `compute` and stored when missing.
+Errors raised by `compute` (e.g. Http404) are not cached.
+'''
+def get_or_compute(namespace: str, parts: Tuple, compute: Callable[[], T]) -> T:
+    if not cache_enabled():
+        return compute()
+    key, version = make_key(namespace, *parts), get_data_version()
+    value = cache.get(key, _missing, version=version)
+    if value is _missing:
+        value = compute()
+        cache.set(key, value, version=version)
+    return value
+
+async def aget_or_compute(namespace: str, parts: Tuple, compute: Callable[[], Awaitable[T]]) -> T:
+    if not cache_enabled():
+        return await compute()
+    key, version = make_key(namespace, *parts), await aget_data_version()
+    value = await cache.aget(key, _missing, version=version)
+    if value is _missing:
+        value = await compute()
+        await cache.aset(key, value, version=version)
+    return value
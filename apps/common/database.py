@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import connections
+from typing import Dict
+import os
+
+
+'''
+Return the database connection statistics of the current worker process: the connection mode
+(see PG_CONNECTION_MODE in `config/settings.py`) and, in 'pooled' mode, the psycopg pool statistics,
+e.g. `pool_size`, `pool_available`, `requests_waiting`, `requests_num`, `connections_num`.
+'''
+def get_connection_stats(alias: str='default') -> Dict:
+    connection = connections[alias]
+    stats = {
+        'pid': os.getpid(),
+        'vendor': connection.vendor,
+        'mode': 'sqlite' if connection.vendor == 'sqlite' else settings.PG_CONNECTION_MODE,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'conn_health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        'connected': connection.connection is not None,
+    }
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats['pool'] = pool.get_stats()
+    return stats
@@ -0,0 +1,114 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from inspect import isawaitable
+from rest_framework import generics
+from rest_framework.response import Response
+from typing import Awaitable, Callable, List, Optional
+
+from apps.common.cache import aget_or_compute
+
+
+class AsyncGenericAPIView(generics.GenericAPIView):
+    '''
+    GenericAPIView whose handlers are coroutines using the async ORM (`aget`, `afirst`, `async for`, ...).
+    Under ASGI (uvicorn workers), a request waiting on the database or on a slow client does not occupy a worker thread.
+    Authentication, permission and throttling checks are synchronous in DRF, they run in a thread before the handler.
+    Handlers must not trigger synchronous queries, e.g. relations accessed by the serializer must be prefetched.
+    When `cache_namespace` is set, the response data of GET requests is stored in the shared cache,
+    keyed by the URL and the query parameters, until the next data version (see `apps/common/cache.py`).
+    '''
+    cache_namespace: Optional[str] = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response): # OPTIONS and errors are handled synchronously
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    '''
+    Same as `filter_queryset`, awaiting `afilter_queryset` of the filter backends that define it,
+    i.e. the backends that query the database themselves instead of only adding conditions to the queryset.
+    '''
+    async def afilter_queryset(self, queryset):
+        for backend in list(self.filter_backends):
+            backend = backend()
+            if hasattr(backend, 'afilter_queryset'):
+                queryset = await backend.afilter_queryset(self.request, queryset, self)
+            else:
+                queryset = backend.filter_queryset(self.request, queryset, self)
+        return queryset
+
+    # the absolute URL, as the pagination links of the response include the host
+    def get_cache_parts(self):
+        return (self.request.build_absolute_uri(self.request.path), sorted(self.request.query_params.lists()))
+
+    '''
+    Return the data computed by `compute`, from the shared cache when `cache_namespace` is set.
+    '''
+    async def acached(self, compute: Callable[[], Awaitable]):
+        if self.cache_namespace is None:
+            return await compute()
+        return await aget_or_compute(self.cache_namespace, self.get_cache_parts(), compute)
+
+
+class AsyncListAPIView(AsyncGenericAPIView):
+    '''
+    Async counterpart of ListAPIView, the pagination class must implement `apaginate_queryset`, see CustomPagination.
+    When `values_fields` is set, rows are read with `values(*values_fields)` and returned as they are, without
+    instantiating the serializer, which is then only used for the schema: it must serialize exactly these model fields
+    with their default representation (no nested, method or datetime fields).
+    '''
+    values_fields: Optional[List[str]] = None
+
+    def serialize(self, instances):
+        if self.values_fields:
+            return instances
+        return self.get_serializer(instances, many=True).data
+
+    async def alist(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        if self.values_fields:
+            queryset = queryset.values(*self.values_fields)
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+            return self.get_paginated_response(self.serialize(page)).data
+        return self.serialize([instance async for instance in queryset])
+
+    async def get(self, request, *args, **kwargs):
+        return Response(await self.acached(self.alist))
+
+
+class AsyncRetrieveAPIView(AsyncGenericAPIView):
+    '''
+    Async counterpart of RetrieveAPIView, getting the instance with `aget_object`.
+    '''
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = await queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).afirst()
+        if instance is None:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aretrieve(self):
+        return self.get_serializer(await self.aget_object()).data
+
+    async def get(self, request, *args, **kwargs):
+        return Response(await self.acached(self.aretrieve))
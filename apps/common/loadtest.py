@@ -0,0 +1,384 @@
+'''
+Load-test harness replaying a registration-week traffic mix against a running server
+(`manage.py runserver`, or gunicorn with uvicorn workers as in production), see the `seed_loadtest` and `loadtest`
+management commands.
+
+- `seed_catalogue` fills the database with a synthetic catalogue the size of a real semester, written by the scraper
+  pipeline (`process_data` / `save_course_data`) so that indexes, schedules and prerequisites look like scraped data.
+- `run_load_test` runs `users` virtual users for `duration` seconds, each one on its own keep-alive connection,
+  sending requests drawn from TRAFFIC_MIX with a seeded random generator. The course codes, names and programmes
+  requested are read from the API itself before the test starts.
+- `summarize` computes the throughput, latency percentiles and error rate of every endpoint,
+  `compare_with_baseline` lists the regressions against a stored summary.
+
+The HTTP client is a minimal HTTP/1.1 client on asyncio streams (plain http only), so that hundreds of virtual
+users run in a single process without a thread each and without any additional dependency.
+'''
+
+from dataclasses import dataclass, field
+from django.conf import settings
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+import asyncio
+import json
+import math
+import random
+
+from apps.common.cache import bump_data_version
+from apps.courses.models import Course, CoursePrefix, CourseProgram, Semester
+from apps.scraper.utils.course_scraper import process_data, save_course_data
+from apps.scraper.utils.prerequisite_compiler import compile_all_prerequisites
+
+
+class HTTPClient:
+    '''
+    Keep-alive HTTP/1.1 connection to `base_url`, reconnecting when the server closes it.
+    '''
+    def __init__(self, base_url: str, timeout: float=30):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http':
+            raise ValueError(f'Only http:// URLs are supported, got `{base_url}`')
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes]=None) -> Tuple[int, bytes]:
+        try:
+            return await asyncio.wait_for(self._request(method, path, body), self.timeout)
+        except BaseException:
+            await self.close() # the connection is left in an unknown state
+            raise
+
+    async def _request(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        headers = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Accept: application/json']
+        if body is not None:
+            headers += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by the server')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while (size := int((await self.reader.readline()).split(b';')[0], 16)) > 0:
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            await self.reader.readline() # empty trailer
+            content = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            content = await self.reader.read()
+            response_headers['connection'] = 'close'
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+
+@dataclass
+class Catalogue:
+    '''
+    Values the virtual users pick from: course codes, words of course names and programmes (id, year).
+    '''
+    codes: List[str]
+    words: List[str]
+    programs: List[Tuple[int, Optional[int]]]
+
+    @classmethod
+    async def fetch(cls, client: HTTPClient) -> 'Catalogue':
+        status, content = await client.request('GET', '/courses/all/')
+        if status != 200:
+            raise ValueError(f'GET /courses/all/ returned {status}')
+        courses = json.loads(content)
+        _, content = await client.request('GET', '/courses/programs/')
+        programs = [(program['id'], program['year']) for program in json.loads(content)]
+        words = sorted({word for course in courses for word in course['name'].split() if len(word) > 3})
+        if not courses:
+            raise ValueError('No courses in the database, run `manage.py seed_loadtest` first')
+        return cls([course['code'] for course in courses], words, programs)
+
+
+Request = Tuple[str, str, Optional[bytes]]
+
+def search_request(generator: random.Random, catalogue: Catalogue) -> Request:
+    # typeahead, one request per keystroke: a prefix of a course code or of a word of a course name
+    term = generator.choice(catalogue.codes) if generator.random() < 0.6 or not catalogue.words else generator.choice(catalogue.words)
+    query = urlencode({'search__icontains': term[:generator.randint(2, len(term))], 'page_size': 10})
+    return 'GET', f'/courses/?{query}', None
+
+def detail_request(generator: random.Random, catalogue: Catalogue) -> Request:
+    return 'GET', f'/courses/code/{generator.choice(catalogue.codes)}/', None
+
+def bulk_request(generator: random.Random, catalogue: Catalogue) -> Request:
+    return 'GET', '/courses/all/', None
+
+def program_filter_request(generator: random.Random, catalogue: Catalogue) -> Request:
+    if not catalogue.programs:
+        return 'GET', '/courses/programs/', None
+    program_id, year = generator.choice(catalogue.programs)
+    query = {'program__icontains': program_id, 'page': generator.randint(1, 3)}
+    if year is not None and generator.random() < 0.5:
+        query['year'] = year
+    return 'GET', f'/courses/?{urlencode(query)}', None
+
+def optimizer_request(generator: random.Random, catalogue: Catalogue) -> Request:
+    codes = generator.sample(catalogue.codes, min(len(catalogue.codes), generator.randint(4, 6)))
+    return 'POST', '/optimizer/optimize/', json.dumps({'courses': [{'code': code} for code in codes]}).encode()
+
+def metadata_request(generator: random.Random, catalogue: Catalogue) -> Request:
+    return 'GET', generator.choice(['/courses/prefixes/', '/courses/programs/', '/courses/semesters/']), None
+
+
+'''
+Endpoint name, weight and request builder of the registration-week traffic mix:
+mostly typeahead searches and course details, students planning with programme filters and the optimizer,
+and a few clients downloading the whole catalogue.
+'''
+TRAFFIC_MIX: List[Tuple[str, int, Callable[[random.Random, Catalogue], Request]]] = [
+    ('search', 40, search_request),
+    ('detail', 25, detail_request),
+    ('program_filter', 12, program_filter_request),
+    ('optimizer', 10, optimizer_request),
+    ('metadata', 8, metadata_request),
+    ('bulk', 5, bulk_request),
+]
+
+
+@dataclass
+class EndpointResults:
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def record_error(self, reason: str):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+
+async def run_user(base_url: str, catalogue: Catalogue, generator: random.Random, deadline: float,
+                   think_time: float, results: Dict[str, EndpointResults]):
+    client = HTTPClient(base_url)
+    names = [name for name, _, _ in TRAFFIC_MIX]
+    weights = [weight for _, weight, _ in TRAFFIC_MIX]
+    builders = {name: builder for name, _, builder in TRAFFIC_MIX}
+    try:
+        while perf_counter() < deadline:
+            name = generator.choices(names, weights)[0]
+            method, path, body = builders[name](generator, catalogue)
+            start = perf_counter()
+            try:
+                status, _ = await client.request(method, path, body)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                results[name].record_error(type(e).__name__)
+            else:
+                results[name].latencies.append(perf_counter() - start)
+                if status >= 400:
+                    results[name].record_error(str(status))
+            if think_time:
+                await asyncio.sleep(generator.expovariate(1 / think_time))
+    finally:
+        await client.close()
+
+'''
+Run `users` virtual users against `base_url` for `duration` seconds, waiting on average `think_time` seconds
+between two requests of a user (0 to measure the maximum throughput).
+Returns the summary of the run, see `summarize`.
+'''
+async def run_load_test(base_url: str, users: int=20, duration: float=30, think_time: float=0, seed: int=0) -> Dict:
+    client = HTTPClient(base_url)
+    try:
+        catalogue = await Catalogue.fetch(client)
+    finally:
+        await client.close()
+    results = {name: EndpointResults() for name, _, _ in TRAFFIC_MIX}
+    start = perf_counter()
+    await asyncio.gather(*[
+        run_user(base_url, catalogue, random.Random(seed * 1000 + user), start + duration, think_time, results)
+        for user in range(users)
+    ])
+    return summarize(results, perf_counter() - start, users)
+
+'''
+Return the nearest-rank percentile of sorted values.
+'''
+def percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize_endpoint(latencies: List[float], errors: Dict[str, int], elapsed: float) -> Dict:
+    latencies = sorted(latencies)
+    # responses with an error status have a latency, requests failing with a connection error do not
+    requests = len(latencies) + sum(count for reason, count in errors.items() if not reason.isdigit())
+    return {
+        'requests': requests,
+        'throughput': round(requests / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(sum(errors.values()) / requests, 4) if requests else 0.0,
+        'errors': errors,
+        **{f'p{percent}_ms': round(percentile(latencies, percent) * 1000, 2) for percent in (50, 90, 95, 99)},
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+'''
+Summary of a run: per endpoint (and `total`), the number of requests, the throughput (requests per second),
+the error rate (HTTP statuses >= 400 and connection errors), the errors by reason and the latency percentiles.
+'''
+def summarize(results: Dict[str, EndpointResults], elapsed: float, users: int) -> Dict:
+    endpoints = {
+        name: summarize_endpoint(result.latencies, result.errors, elapsed)
+        for name, result in results.items()
+    }
+    total_errors = {}
+    for result in results.values():
+        for reason, count in result.errors.items():
+            total_errors[reason] = total_errors.get(reason, 0) + count
+    endpoints['total'] = summarize_endpoint(
+        [latency for result in results.values() for latency in result.latencies], total_errors, elapsed,
+    )
+    return {'users': users, 'duration': round(elapsed, 2), 'endpoints': endpoints}
+
+'''
+Compare a summary with a baseline summary, return the regressions found, for every endpoint of both:
+a p95 latency or a throughput worse by more than `tolerance` (relative), or an error rate higher by more than 1%.
+'''
+def compare_with_baseline(summary: Dict, baseline: Dict, tolerance: float=0.2) -> List[str]:
+    regressions = []
+    for name, current in summary['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None or not previous['requests']:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p95 {current["p95_ms"]}ms, baseline {previous["p95_ms"]}ms')
+        if current['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append(f'{name}: {current["throughput"]} requests/s, baseline {previous["throughput"]} requests/s')
+        if current['error_rate'] > previous['error_rate'] + 0.01:
+            regressions.append(f'{name}: error rate {current["error_rate"]:.2%}, baseline {previous["error_rate"]:.2%}')
+    return regressions
+
+
+COURSE_TOPICS = [
+    'Calculus', 'Algebra', 'Statistics', 'Algorithms', 'Databases', 'Networks', 'Thermodynamics', 'Mechanics',
+    'Accounting', 'Finance', 'Marketing', 'Economics', 'Psychology', 'Sociology', 'Linguistics', 'Chemistry',
+    'Biology', 'Genetics', 'Materials', 'Circuits', 'Signals', 'Robotics', 'Design', 'Ethics', 'Philosophy',
+]
+COURSE_QUALIFIERS = ['Introduction to', 'Foundations of', 'Applied', 'Advanced', 'Topics in', 'Principles of']
+DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI']
+
+def random_class(generator: random.Random, type: str, group: str, hours: int, venue: str) -> Dict[str, str]:
+    hour = generator.randint(8, 18 - hours)
+    return {
+        'type': type,
+        'group': group,
+        'day': generator.choice(DAYS),
+        'time': f'{hour:02d}30-{hour + hours:02d}20',
+        'venue': venue,
+        'remark': '',
+    }
+
+'''
+Return the raw data (see `get_raw_data` in course_scraper.py) of `courses` synthetic courses,
+with 1 to 8 indexes sharing a lecture, each with its own tutorial and, for some courses, a lab.
+Course codes are made of the prefixes 'QA' to 'QZ' (not used by NTU), so that they never clash with scraped courses.
+'''
+def generate_raw_data(courses: int, generator: random.Random) -> List[Tuple[Dict, List]]:
+    prefixes = [f'Q{letter}' for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ']
+    codes = [f'{prefix}{level}{number:03d}' for number in range(1000) for prefix in prefixes for level in range(1, 5)]
+    raw_data = []
+    for code in sorted(codes[:courses]):
+        qualifier, topic = generator.choice(COURSE_QUALIFIERS), generator.choice(COURSE_TOPICS)
+        lecture = random_class(generator, 'LEC/STUDIO', 'LE', 2, f'LT{generator.randint(1, 30)}')
+        has_lab = generator.random() < 0.3
+        indexes = []
+        for number in range(generator.randint(1, 8)):
+            info = [lecture, random_class(generator, 'TUT', f'T{number + 1}', 1, f'TR+{generator.randint(1, 80)}')]
+            if has_lab:
+                info.append(random_class(generator, 'LAB', f'L{number + 1}', 2, f'SWLAB{generator.randint(1, 5)}'))
+            indexes.append({'index': '', 'info': info})
+        header = {'course_code': code, 'course_name': f'{qualifier} {topic} {code[-3:]}'.upper(), 'academic_units': generator.choice([3] * 8 + [1, 2, 4, 6])}
+        raw_data.append((header, indexes))
+
+    for number, index in enumerate(index for _, indexes in raw_data for index in indexes):
+        index['index'] = synthetic_index(number)
+    return raw_data
+
+'''
+Index number `number` of the synthetic catalogue, 'Q' and 4 base-36 digits, e.g. 'Q00A3'.
+Index numbers are unique within a semester and scraped ones are 5 decimal digits, so synthetic indexes seeded
+into a scraped semester never take the number of a scraped index, now or at the next scrape.
+'''
+def synthetic_index(number: int) -> str:
+    digits = ''
+    for _ in range(4):
+        number, digit = divmod(number, 36)
+        digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'[digit] + digits
+    return f'Q{digits}'
+
+'''
+Seed the database with `courses` synthetic courses offered in `semester_code`, and `programs` programmes
+of 20 to 60 courses each, replacing the synthetic catalogue seeded previously (see `delete_catalogue`). Courses above level 1 have a prerequisite on one or two courses of the same prefix
+and a lower level for half of them, compiled into prerequisite trees.
+Scraped courses of the semester are left untouched, they are not treated as removed from the catalogue.
+Returns the number of courses, indexes and programmes created.
+'''
+def seed_catalogue(courses: int=4000, programs: int=200, semester_code: Optional[str]=None, seed: int=0) -> Dict[str, int]:
+    delete_catalogue()
+    generator = random.Random(seed)
+    semester = Semester.get_or_create_from_code(semester_code or settings.CURRENT_SEMESTER)
+    raw_data = generate_raw_data(courses, generator)
+    save_course_data(process_data(raw_data), semester, remove_missing=False)
+
+    codes = [header['course_code'] for header, _ in raw_data]
+    by_prefix_and_level = {}
+    for code in codes:
+        by_prefix_and_level.setdefault((code[:2], int(code[2])), []).append(code)
+    seeded_courses = list(Course.objects.filter(code__in=codes))
+    for course in seeded_courses:
+        lower_level = by_prefix_and_level.get((course.prefix, int(course.level) - 1), [])
+        if lower_level and generator.random() < 0.5:
+            course.prerequisite = ' OR '.join(generator.sample(lower_level, min(len(lower_level), generator.randint(1, 2))))
+    Course.objects.bulk_update(seeded_courses, ['prerequisite'], batch_size=500)
+    compile_all_prerequisites()
+
+    seeded_programs = CourseProgram.objects.bulk_create([
+        CourseProgram(name=f'Load Test Programme {number}', value=f'QLT{number};;{number % 4 + 1};F', year=number % 4 + 1)
+        for number in range(programs)
+    ])
+    CourseProgram.courses.through.objects.bulk_create([
+        CourseProgram.courses.through(courseprogram_id=program.id, course_id=code)
+        for program in seeded_programs for code in generator.sample(codes, min(len(codes), generator.randint(20, 60)))
+    ], batch_size=1000)
+    bump_data_version()
+    return {
+        'courses': len(codes),
+        'indexes': sum(len(indexes) for _, indexes in raw_data),
+        'programs': len(seeded_programs),
+    }
+
+'''
+Delete the synthetic courses and programmes created by `seed_catalogue`, with their indexes and schedules.
+'''
+def delete_catalogue():
+    CourseProgram.objects.filter(value__startswith='QLT').delete()
+    Course.objects.filter(prefix__regex=r'^Q[A-Z]$').delete()
+    CoursePrefix.objects.filter(prefix__regex=r'^Q[A-Z]$').delete()
+    bump_data_version()
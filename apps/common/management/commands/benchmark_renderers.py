@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Prefetch
+from rest_framework.renderers import JSONRenderer
+from timeit import timeit
+
+from apps.common.renderers import ORJSONRenderer
+from apps.courses.models import Course, CourseIndex
+from apps.courses.serializers import CourseCompleteSerializer, CoursePartialSerializer
+
+
+'''
+Usage: python manage.py benchmark_renderers [--repeat 20] [--details 20]
+Compares the time spent by JSONRenderer (standard library) and ORJSONRenderer rendering the payloads of the largest
+endpoints, built from the courses in the database:
+- `/courses/all/`, every course,
+- `/courses/code/<code>/`, the courses with the most indexes, with nested indexes and schedules.
+'''
+class Command(BaseCommand):
+    help = 'Benchmarks the JSON renderers on the payloads of the largest endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Number of renders of every payload')
+        parser.add_argument('--details', type=int, default=20, help='Number of course details rendered')
+
+    def handle(self, *args, **kwargs):
+        courses = Course.objects.order_by('code')
+        largest_courses = Course.objects.annotate(index_count=Count('indexes')).order_by('-index_count', 'code')[:kwargs['details']]
+        largest_courses = largest_courses.prefetch_related(
+            Prefetch('indexes', queryset=CourseIndex.objects.select_related('semester').prefetch_related('schedules')),
+            'common_schedules',
+            'semesters',
+        )
+        payloads = [
+            ('/courses/all/', CoursePartialSerializer(courses, many=True).data),
+            ('/courses/code/<code>/', CourseCompleteSerializer(largest_courses, many=True).data),
+        ]
+
+        self.stdout.write(f'{"payload":<24}{"size (KB)":>12}{"json (ms)":>12}{"orjson (ms)":>14}{"speedup":>10}')
+        for name, data in payloads:
+            renderers = [JSONRenderer(), ORJSONRenderer()]
+            size = len(renderers[1].render(data)) / 1024
+            json_time, orjson_time = [
+                timeit(lambda: renderer.render(data), number=kwargs['repeat']) / kwargs['repeat'] * 1000
+                for renderer in renderers
+            ]
+            speedup = json_time / orjson_time if orjson_time else 0
+            self.stdout.write(f'{name:<24}{size:>12.1f}{json_time:>12.2f}{orjson_time:>14.2f}{speedup:>9.1f}x')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.openapi import build_openapi_document, get_openapi_document_path
+
+
+'''
+Usage: python manage.py build_openapi
+Generates the OpenAPI document of the API into STATIC_ROOT, served by `/docs/openapi.json` without generating it again.
+Run after `collectstatic` when building the production image, see `deployments/prod/Dockerfile`.
+'''
+class Command(BaseCommand):
+    help = 'Generates the OpenAPI document served by /docs/openapi.json'
+
+    def handle(self, *args, **kwargs):
+        path = get_openapi_document_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        document = build_openapi_document()
+        path.write_bytes(document)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(document) / 1024:.1f} KB to {path}'))
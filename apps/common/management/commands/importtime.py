@@ -0,0 +1,72 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from typing import Dict, List, Tuple
+import os
+import subprocess
+import sys
+
+
+# what a worker imports before serving its first request: Django, the installed apps and every view of the URL patterns
+STARTUP_CODE = '''
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+'''
+
+'''
+Parse the output of `python -X importtime`, lines like `import time: <self us> | <cumulative us> | <indented module>`,
+into (module, self time, cumulative time) tuples in microseconds.
+'''
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_time, cumulative_time, module = line[len('import time:'):].split('|')
+        if not self_time.strip().isdigit():
+            continue # header
+        modules.append((module.strip(), int(self_time), int(cumulative_time)))
+    return modules
+
+'''
+Sum the self time of the modules by top-level package, e.g. `rest_framework.serializers` -> `rest_framework`.
+'''
+def group_by_package(modules: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    packages = defaultdict(int)
+    for module, self_time, _ in modules:
+        packages[module.split('.')[0]] += self_time
+    return packages
+
+
+'''
+Usage: python manage.py importtime [--top 15] [--module drf_yasg.views]
+Measures the import time of a worker startup (Django setup and the views of every URL pattern) in a fresh interpreter,
+and lists the packages and the modules that cost the most. `--module` adds modules imported after startup,
+e.g. to measure what loading the swagger documentation would add.
+'''
+class Command(BaseCommand):
+    help = 'Measures the import time of a worker startup by package and module'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Number of packages and modules listed')
+        parser.add_argument('--module', action='append', default=[], help='Module imported after startup, repeatable')
+
+    def handle(self, *args, **kwargs):
+        code = STARTUP_CODE + ''.join(f'import {module}\n' for module in kwargs['module'])
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, env=env)
+        modules = parse_importtime(result.stderr)
+        if result.returncode != 0:
+            self.stderr.write(result.stderr.splitlines()[-1] if result.stderr else 'Startup failed')
+            return
+
+        total = sum(self_time for _, self_time, _ in modules)
+        self.stdout.write(f'{len(modules)} modules imported in {total / 1000:.1f} ms\n')
+        self.stdout.write(f'{"package":<40}{"self (ms)":>12}{"share":>8}')
+        packages = sorted(group_by_package(modules).items(), key=lambda item: -item[1])
+        for package, self_time in packages[:kwargs['top']]:
+            self.stdout.write(f'{package:<40}{self_time / 1000:>12.1f}{self_time / total:>8.1%}')
+        self.stdout.write(f'\n{"module":<60}{"cumulative (ms)":>16}')
+        for module, _, cumulative_time in sorted(modules, key=lambda module: -module[2])[:kwargs['top']]:
+            self.stdout.write(f'{module:<60}{cumulative_time / 1000:>16.1f}')
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+import asyncio
+import json
+import os
+
+from apps.common.loadtest import compare_with_baseline, run_load_test
+
+
+'''
+Usage: python manage.py loadtest [--url http://127.0.0.1:8000] [--users 20] [--duration 30] [--think-time 0]
+                                 [--baseline loadtest_baseline.json] [--save-baseline] [--tolerance 0.2] [--output run.json]
+Replays the registration-week traffic mix (see TRAFFIC_MIX in apps/common/loadtest.py) against a running server,
+seeded with `manage.py seed_loadtest`, and prints the throughput, latency percentiles and error rate per endpoint.
+When the baseline file exists, the run is compared with it and the command fails on regressions;
+`--save-baseline` stores the run as the new baseline instead.
+'''
+class Command(BaseCommand):
+    help = 'Load tests a running server with a registration-week traffic mix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server')
+        parser.add_argument('--users', type=int, default=20, help='Number of concurrent virtual users')
+        parser.add_argument('--duration', type=float, default=30, help='Duration of the test in seconds')
+        parser.add_argument('--think-time', type=float, default=0, help='Mean pause between two requests of a user, in seconds')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generators')
+        parser.add_argument('--baseline', default='loadtest_baseline.json', help='Baseline summary file')
+        parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Relative regression tolerated against the baseline')
+        parser.add_argument('--output', default=None, help='Write the summary of the run as JSON to this file')
+
+    def handle(self, *args, **kwargs):
+        try:
+            summary = asyncio.run(run_load_test(
+                kwargs['url'], kwargs['users'], kwargs['duration'], kwargs['think_time'], kwargs['seed'],
+            ))
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Load test failed: {e}')
+
+        baseline = None
+        if not kwargs['save_baseline'] and os.path.exists(kwargs['baseline']):
+            with open(kwargs['baseline'], 'r', encoding='utf-8') as fp:
+                baseline = json.load(fp)
+
+        self.stdout.write(f'{kwargs["users"]} users, {summary["duration"]}s')
+        self.stdout.write(
+            f'{"endpoint":<16}{"requests":>10}{"req/s":>10}{"errors":>9}{"p50 ms":>10}{"p90 ms":>10}'
+            f'{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}' + (f'{"p95 vs baseline":>18}' if baseline else '')
+        )
+        for name, endpoint in summary['endpoints'].items():
+            line = (
+                f'{name:<16}{endpoint["requests"]:>10}{endpoint["throughput"]:>10.1f}{endpoint["error_rate"]:>9.2%}'
+                f'{endpoint["p50_ms"]:>10.1f}{endpoint["p90_ms"]:>10.1f}{endpoint["p95_ms"]:>10.1f}'
+                f'{endpoint["p99_ms"]:>10.1f}{endpoint["max_ms"]:>10.1f}'
+            )
+            previous = baseline['endpoints'].get(name) if baseline else None
+            if previous and previous['p95_ms']:
+                line += f'{(endpoint["p95_ms"] / previous["p95_ms"] - 1):>+18.1%}'
+            self.stdout.write(line)
+            if endpoint['errors']:
+                self.stdout.write(f'{"":<16}errors: {", ".join(f"{reason} x{count}" for reason, count in endpoint["errors"].items())}')
+
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as fp:
+                json.dump(summary, fp, indent=2)
+        if kwargs['save_baseline']:
+            with open(kwargs['baseline'], 'w', encoding='utf-8') as fp:
+                json.dump(summary, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Saved the baseline to {kwargs["baseline"]}'))
+        elif baseline:
+            regressions = compare_with_baseline(summary, baseline, kwargs['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regression against the baseline'))
@@ -3,6 +3,8 @@ from django.apps import apps
 from django.conf import settings
 from django.db import connection
 
+from apps.common.cache import bump_data_version
+
 
 '''
 Usage: python manage.py reset_db
@@ -33,5 +35,8 @@ class Command(BaseCommand):
                     cursor.execute(f"ALTER SEQUENCE {table_name}_id_seq RESTART WITH 1;")
             else:
                 cursor.execute("DELETE FROM sqlite_sequence;")
+
+        # the data version row was deleted too, the new version is still above every version cached before
+        bump_data_version()
             
         self.stdout.write(self.style.SUCCESS('Successfully deleted all data from the database and reset primary key sequences'))
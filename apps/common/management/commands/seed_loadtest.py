@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.common.loadtest import delete_catalogue, seed_catalogue
+
+
+'''
+Usage: python manage.py seed_loadtest [--courses 4000] [--programs 200] [--semester 2024_1] [--seed 0] [--delete]
+Seeds the database with a synthetic catalogue for the `loadtest` command, see apps/common/loadtest.py.
+Synthetic courses use the prefixes 'QA' to 'QZ' and are replaced on every run, scraped data is left untouched.
+'''
+class Command(BaseCommand):
+    help = 'Seeds a synthetic course catalogue for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=4000, help='Number of courses (at most 104000)')
+        parser.add_argument('--programs', type=int, default=200, help='Number of programmes')
+        parser.add_argument('--semester', default=None, help='Semester code, defaults to CURRENT_SEMESTER')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+        parser.add_argument('--delete', action='store_true', help='Only delete the synthetic catalogue')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['delete']:
+            delete_catalogue()
+            self.stdout.write(self.style.SUCCESS('Deleted the synthetic catalogue'))
+            return
+        with transaction.atomic():
+            counts = seed_catalogue(kwargs['courses'], kwargs['programs'], kwargs['semester'], kwargs['seed'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {counts["courses"]} courses, {counts["indexes"]} indexes and {counts["programs"]} programmes'
+        ))
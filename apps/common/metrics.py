@@ -0,0 +1,98 @@
+'''
+In-process request metrics, exposed in the Prometheus text format by the `/metrics/` endpoint.
+
+Metrics are recorded by PerformanceMiddleware (see `apps/common/middleware.py`), labelled by route,
+the URL pattern of the view, e.g. 'courses/code/<str:code>/', and by method.
+They are kept per worker process: every gunicorn worker exposes its own values, identified by the `pid` label.
+'''
+
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, List, Tuple
+import os
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    '''
+    Per (route, method): histograms of the request and database durations, and totals of requests by status,
+    database queries and response bytes.
+    '''
+    def __init__(self):
+        self.lock = Lock()
+        self.durations: Dict[Tuple[str, str], Histogram] = {}
+        self.db_durations: Dict[Tuple[str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.db_queries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.response_bytes: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def record(self, route: str, method: str, status: int, duration: float, db_duration: float, db_queries: int, size: int):
+        key = (route, method)
+        with self.lock:
+            if key not in self.durations:
+                self.durations[key] = Histogram(DURATION_BUCKETS)
+                self.db_durations[key] = Histogram(DURATION_BUCKETS)
+            self.durations[key].observe(duration)
+            self.db_durations[key].observe(db_duration)
+            self.requests[route, method, status] += 1
+            self.db_queries[key] += db_queries
+            self.response_bytes[key] += size
+
+    def reset(self):
+        with self.lock:
+            self.__init__()
+
+    '''
+    Render all metrics in the Prometheus text exposition format.
+    '''
+    def render(self) -> str:
+        pid = os.getpid()
+        def labels(route: str, method: str, **extra) -> str:
+            values = {'route': route, 'method': method, 'pid': pid, **extra}
+            return ','.join(f'{name}="{str(value)}"' for name, value in values.items())
+
+        lines: List[str] = []
+        with self.lock:
+            for name, description, histograms in [
+                ('http_request_duration_seconds', 'Request duration', self.durations),
+                ('http_request_db_duration_seconds', 'Database time per request', self.db_durations),
+            ]:
+                lines += [f'# HELP {name} {description}.', f'# TYPE {name} histogram']
+                for (route, method), histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bucket, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels(route, method, le=bucket)}}} {cumulative}')
+                    lines.append(f'{name}_sum{{{labels(route, method)}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels(route, method)}}} {histogram.count}')
+
+            lines += ['# HELP http_requests_total Requests by status.', '# TYPE http_requests_total counter']
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{labels(route, method, status=status)}}} {count}')
+            for name, description, totals in [
+                ('http_request_db_queries_total', 'Database queries', self.db_queries),
+                ('http_response_bytes_total', 'Response body bytes', self.response_bytes),
+            ]:
+                lines += [f'# HELP {name} {description}.', f'# TYPE {name} counter']
+                for (route, method), total in sorted(totals.items()):
+                    lines.append(f'{name}{{{labels(route, method)}}} {total}')
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
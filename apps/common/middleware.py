@@ -0,0 +1,183 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextvars import ContextVar
+from django.conf import settings
+from django.http import HttpResponse
+from io import StringIO
+from time import perf_counter
+from typing import Optional
+import cProfile
+import json
+import logging
+import pstats
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+from apps.common.metrics import request_metrics
+
+
+logger = logging.getLogger('apps.performance')
+
+PROFILE_HEADER = 'X-Profile'
+
+
+class QueryTimer:
+    '''
+    Database execute wrapper (see `connection.execute_wrapper`) counting the queries and their total duration.
+    '''
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - start
+            self.count += 1
+
+
+# Timer of the current request. A context variable rather than `connection.execute_wrapper` around the request,
+# as the async ORM runs queries with the connection of another thread, to which the context is copied.
+_query_timer: ContextVar[Optional[QueryTimer]] = ContextVar('query_timer', default=None)
+
+def time_query(execute, sql, params, many, context):
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+'''
+Install `time_query` as execute wrapper of every database connection, see `CommonConfig.ready`.
+'''
+def install_query_timer(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class PerformanceMiddleware:
+    '''
+    Records, for every request: the wall time, the number and total duration of database queries,
+    the time spent rendering the response (serialising DRF responses into JSON) and the size of the response.
+    They are sent as a Server-Timing header, logged as a JSON line to the 'apps.performance' logger,
+    and aggregated per route for the `/metrics/` endpoint, see `apps/common/metrics.py`.
+
+    When a superuser sends the header `X-Profile: 1` (cProfile) or `X-Profile: pyinstrument` (sampling profiler,
+    if installed), the request is profiled and the profile report is returned as plain text instead of the response.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start, timer = perf_counter(), QueryTimer()
+        profiler = self.get_profiler(request, request.user.is_superuser) if request.headers.get(PROFILE_HEADER) else None
+        token = _query_timer.set(timer)
+        if profiler is not None:
+            profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            _query_timer.reset(token)
+        return self.finish(request, response, start, timer, profiler)
+
+    async def __acall__(self, request):
+        start, timer = perf_counter(), QueryTimer()
+        profiler = None
+        if request.headers.get(PROFILE_HEADER):
+            profiler = self.get_profiler(request, (await request.auser()).is_superuser)
+        token = _query_timer.set(timer)
+        if profiler is not None:
+            profiler.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            _query_timer.reset(token)
+        return self.finish(request, response, start, timer, profiler)
+
+    def get_profiler(self, request, is_superuser: bool):
+        if not is_superuser:
+            return None
+        if request.headers.get(PROFILE_HEADER) == 'pyinstrument' and Profiler is not None:
+            return PyinstrumentProfiler()
+        return CProfileProfiler()
+
+    # called by the handler right before rendering template responses (DRF responses), rendering is timed until
+    # the post render callback
+    def process_template_response(self, request, response):
+        render_start = perf_counter()
+        def record_render_duration(_):
+            request.render_duration = perf_counter() - render_start
+        response.add_post_render_callback(record_render_duration)
+        return response
+
+    def finish(self, request, response, start, timer, profiler):
+        duration = perf_counter() - start
+        render_duration = getattr(request, 'render_duration', 0.0)
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"',
+            f'render;dur={render_duration * 1000:.1f}',
+        ])
+        request_metrics.record(route, request.method, response.status_code, duration, timer.duration, timer.count, size)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': timer.count,
+                'db_duration_ms': round(timer.duration * 1000, 2),
+                'render_duration_ms': round(render_duration * 1000, 2),
+                'response_bytes': size,
+            }))
+        if profiler is not None:
+            return HttpResponse(profiler.report(), content_type='text/plain')
+        return response
+
+
+class CProfileProfiler:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def report(self) -> str:
+        output = StringIO()
+        pstats.Stats(self.profile, stream=output).sort_stats('cumulative').print_stats(settings.PROFILE_LINES)
+        return output.getvalue()
+
+
+class PyinstrumentProfiler:
+    def __init__(self):
+        self.profiler = Profiler(async_mode='enabled')
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def report(self) -> str:
+        return self.profiler.output_text(unicode=True)
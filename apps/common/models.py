@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class DataVersion(models.Model):
+    '''
+    DataVersion model, a single row holding the version of the data served by the API, bumped after every change
+    of the catalogue (scraper runs, compile commands, admin edits) to invalidate the shared cache (see `apps/common/cache.py`).
+    Fields include:
+    - version: increasing number, at least the time of the last bump in microseconds, so that it never goes back
+      to a version already cached, even after the row was deleted (e.g. by `reset_db`)
+    - updated_at: time of the last bump
+    '''
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'<DataVersion: {self.version}>'
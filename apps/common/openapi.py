@@ -0,0 +1,65 @@
+'''
+OpenAPI document of the API, generated by drf_yasg once per deploy instead of on every request of the documentation.
+
+`python manage.py build_openapi` (run after `collectstatic` in the production image) writes the document
+to OPENAPI_DOCUMENT in STATIC_ROOT. The document is then read from that file once per process,
+or generated once per process when the file was not built, e.g. in development.
+drf_yasg is only imported when the document is generated or the swagger UI is first requested.
+'''
+
+from django.conf import settings
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+
+OPENAPI_DOCUMENT = 'openapi.json'
+
+_document: Optional[bytes] = None
+_document_lock = Lock()
+
+def get_openapi_info():
+    from drf_yasg import openapi
+    return openapi.Info(
+        title='NTUMODS BACKEND API',
+        default_version='1.0.0',
+        description='''
+            Swagger auto-generated documentation for NTUMods Backend API.
+            Easily try all the API endpoints here.
+        '''
+    )
+
+'''
+Generate the OpenAPI document of every public endpoint, as JSON.
+The document has no host, so that the swagger UI sends requests to the host serving it.
+'''
+def build_openapi_document() -> bytes:
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+    schema = OpenAPISchemaGenerator(get_openapi_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+def get_openapi_document_path() -> Path:
+    return Path(settings.STATIC_ROOT) / OPENAPI_DOCUMENT
+
+'''
+Return the OpenAPI document, read from the file built at deploy if any, else generated, once per process.
+'''
+def get_openapi_document() -> bytes:
+    global _document
+    with _document_lock:
+        if _document is None:
+            path = get_openapi_document_path()
+            _document = path.read_bytes() if path.is_file() else build_openapi_document()
+        return _document
+
+
+_swagger_view = None
+
+# the swagger UI page only, generated without introspecting the endpoints, see SWAGGER_SETTINGS for its document
+def swagger_view(request, *args, **kwargs):
+    global _swagger_view
+    if _swagger_view is None:
+        from drf_yasg.views import get_schema_view
+        _swagger_view = get_schema_view(get_openapi_info(), public=True).with_ui('swagger')
+    return _swagger_view(request, *args, **kwargs)
@@ -1,3 +1,5 @@
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
@@ -9,6 +11,7 @@ Custom pagination class to be used in GenericAPIView classes.
 If client specifies a page number greater than the total number of pages, the last page is returned.
 - get_paginated_response: Returns a custom response with the total number of items,
     the previous and next page links, the total number of pages, and the results.
+- apaginate_queryset: Same as paginate_queryset, counting and fetching the page with the async ORM.
 '''
 class CustomPagination(PageNumberPagination):
     page_size = 10
@@ -26,3 +29,13 @@ class CustomPagination(PageNumberPagination):
             'total_pages': self.page.paginator.num_pages,
             'results': data,
         })
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        paginator.count = await queryset.acount()
+        try:
+            self.page = paginator.page(self.get_page_number(request, paginator))
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=request.query_params.get(self.page_query_param, 1), message=str(exc)))
+        self.request = request
+        return [instance async for instance in self.page.object_list]
@@ -0,0 +1,42 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+import orjson
+
+
+'''
+JSON renderer and parser backed by orjson, a drop-in replacement of DRF's JSONRenderer and JSONParser
+enabled with the ORJSON setting (see `config/settings.py`).
+Values orjson does not support natively (e.g. Decimal, lazy translation strings) fall back to DRF's JSONEncoder.
+The output is compact, or indented by 2 spaces when the client requests `application/json; indent=<n>`.
+'''
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=JSONEncoder().default, option=options)
+
+
+class ORJSONParser(BaseParser):
+    media_type = 'application/json'
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        content = stream.read() if stream is not None else b''
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            content = content.decode(encoding).encode('utf-8')
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,26 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+'''
+Test runner of the suite (TEST_RUNNER in `config/settings.py`), running every test without the shared cache,
+whatever CACHE_BACKEND is: tests change the data directly, without bumping the data version (see `apps/common/cache.py`).
+Tests of the cache itself enable a local memory cache with `override_settings(CACHES=...)`.
+The in-process indexes are keyed on the data version whatever the cache, so tests using them call
+`bump_data_version` after writing their data, as the scrapers do.
+'''
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.caches_override = override_settings(CACHES=TEST_CACHES)
+        self.caches_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches_override.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,370 @@
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from io import BytesIO, StringIO
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from tempfile import TemporaryDirectory
+import asyncio
+import json
+import os
+import time
+
+from apps.common import openapi
+from apps.common.cache import bump_data_version, get_data_version, get_or_compute, make_key
+from apps.common.loadtest import (
+    compare_with_baseline,
+    delete_catalogue,
+    percentile,
+    run_load_test,
+    seed_catalogue,
+    summarize_endpoint,
+    synthetic_index,
+)
+from apps.common.management.commands.importtime import group_by_package, parse_importtime
+from apps.common.metrics import request_metrics
+from apps.common.renderers import ORJSONParser, ORJSONRenderer
+from apps.common.warmup import Warmup, warmup
+from apps.courses.models import Course, CourseIndex, CourseSchedule, Semester
+from apps.scraper.models import ScraperRun
+from apps.scraper.utils.course_scraper import process_data, save_course_data
+from apps.scraper.utils.instrumentation import RunRecorder
+
+
+class DatabaseStatsTestCase(APITestCase):
+    ENDPOINT = reverse('common:database-stats')
+
+    def test_superuser_only(self):
+        response = self.client.get(self.ENDPOINT)
+        self.assertEqual(response.status_code, 403)
+
+    def test_stats(self):
+        self.client.force_authenticate(user=User.objects.create_superuser('admin'))
+        response = self.client.get(self.ENDPOINT)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pid'], os.getpid())
+        self.assertEqual(response.data['mode'], 'sqlite' if connection.vendor == 'sqlite' else settings.PG_CONNECTION_MODE)
+        self.assertTrue(response.data['connected'])
+        self.assertNotIn('pool', response.data)
+
+
+class ORJSONRendererTestCase(APITestCase):
+    fixtures = ['sample_data.json']
+
+    def test_same_content_as_json_renderer(self):
+        data = {'code': 'MH1100', 'units': Decimal('4.0'), 'values': [1, 2.5, None, True], 1: 'non string key'}
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        self.assertIn(b'\n  ', ORJSONRenderer().render(data, 'application/json; indent=4'))
+
+    def test_parser(self):
+        self.assertEqual(ORJSONParser().parse(BytesIO('{"name": "Café"}'.encode())), {'name': 'Café'})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"name": '))
+
+    def test_responses(self):
+        response = self.client.get(reverse('courses:course-list-all'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(len(json.loads(response.content)), 20)
+        response = self.client.post(reverse('courses:course-eligible'), b'{"completed": ["MH1810"]}', content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command('benchmark_renderers', repeat=1, details=2, stdout=output)
+        self.assertIn('/courses/all/', output.getvalue())
+
+
+class PerformanceMiddlewareTestCase(APITestCase):
+    fixtures = ['sample_data.json']
+
+    def setUp(self):
+        request_metrics.reset()
+        self.superuser = User.objects.create_superuser('admin')
+
+    def get_metrics(self):
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse('metrics'))
+        self.client.logout()
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('courses:course-detail', kwargs={'code': 'MH1100'}))
+        timings = {timing.split(';')[0]: timing for timing in response['Server-Timing'].split(', ')}
+        self.assertEqual(set(timings), {'total', 'db', 'render'})
+        self.assertRegex(timings['db'], r'desc="[1-9]\d* queries"')
+
+    async def test_server_timing_async(self):
+        response = await self.async_client.get(reverse('courses:course-list-all'))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="1 queries"')
+
+    def test_logs(self):
+        with self.assertLogs('apps.performance', 'INFO') as logs:
+            response = self.client.get(reverse('courses:course-list'), {'page_size': 5})
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['route'], 'courses/')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['response_bytes'], len(response.content))
+        self.assertGreater(record['db_queries'], 0)
+
+    def test_metrics(self):
+        self.client.get(reverse('courses:course-detail', kwargs={'code': 'MH1100'}))
+        self.client.get(reverse('courses:course-detail', kwargs={'code': 'XX0000'}))
+        metrics = self.get_metrics()
+        labels = f'route="courses/code/<str:code>/",method="GET",pid="{os.getpid()}"'
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', metrics)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', metrics)
+        self.assertIn(f'http_requests_total{{{labels},status="404"}} 1', metrics)
+        self.assertIn('http_response_bytes_total{', metrics)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_access(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_profile(self):
+        endpoint = reverse('courses:course-list-all')
+        response = self.client.get(endpoint, HTTP_X_PROFILE='1')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.client.force_login(self.superuser)
+        response = self.client.get(endpoint, HTTP_X_PROFILE='1')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn('function calls', response.content.decode())
+
+
+class WarmupTestCase(APITestCase):
+    def test_tasks(self):
+        loaded = []
+        def fail():
+            raise ValueError('no database')
+        state = Warmup([('first', lambda: loaded.append('first')), ('failing', fail), ('last', lambda: loaded.append('last'))])
+        self.assertFalse(state.ready)
+        state.run()
+        # a failing task does not stop the warmup
+        self.assertTrue(state.ready)
+        self.assertEqual(loaded, ['first', 'last'])
+        self.assertEqual(list(state.durations), ['first', 'failing', 'last'])
+        self.assertEqual(state.errors, {'failing': 'ValueError: no database'})
+
+    def test_default_tasks(self):
+        state = Warmup()
+        state.run()
+        self.assertEqual(state.errors, {})
+
+    # gunicorn with --preload: the workers are forked while the warmup of the parent is running
+    def test_fork(self):
+        state = Warmup([('slow', lambda: time.sleep(0.2))])
+        os.register_at_fork(before=state.before_fork, after_in_child=state.after_fork_in_child)
+        state.start()
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            os.write(write_end, json.dumps({**state.to_dict(), 'warmup_pid': state.pid}).encode())
+            os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            child = json.loads(pipe.read())
+        os.waitpid(pid, 0)
+        # the child inherits the finished warmup
+        self.assertEqual(child['status'], 'ready')
+        self.assertEqual(list(child['tasks']), ['slow'])
+        self.assertEqual(child['warmup_pid'], pid)
+
+    @override_settings(WARMUP=True)
+    def test_readiness(self):
+        status = warmup.status
+        try:
+            warmup.status = 'running'
+            response = self.client.get(reverse('readiness'))
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()['status'], 'running')
+            warmup.status = 'ready'
+            self.assertEqual(self.client.get(reverse('readiness')).status_code, 200)
+        finally:
+            warmup.status = status
+        self.assertEqual(self.client.get(reverse('liveness')).status_code, 200)
+        with override_settings(WARMUP=False):
+            self.assertEqual(self.client.get(reverse('readiness')).status_code, 200)
+
+
+class OpenAPIDocumentTestCase(APITestCase):
+    def setUp(self):
+        openapi._document = None
+        self.addCleanup(setattr, openapi, '_document', None)
+
+    def test_root(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['docs'], '/docs/')
+
+    def test_generated_once(self):
+        response = self.client.get(reverse('openapi-document'))
+        self.assertEqual(response.status_code, 200)
+        document = response.json()
+        self.assertIn('/courses/code/{code}/', document['paths'])
+        self.assertNotIn('host', document)
+        self.assertEqual(
+            document['paths']['/courses/prerequisites/{code}/unlocks/']['get']['responses']['200']['schema'],
+            {'$ref': '#/definitions/PrerequisiteRelations'},
+        )
+        with self.assertNumQueries(0):
+            self.assertIs(openapi.get_openapi_document(), openapi.get_openapi_document())
+
+    def test_built_file(self):
+        with TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            call_command('build_openapi', stdout=StringIO())
+            with open(os.path.join(static_root, 'openapi.json'), 'rb') as file:
+                self.assertEqual(self.client.get(reverse('openapi-document')).content, file.read())
+
+    def test_swagger_ui(self):
+        response = self.client.get(reverse('swagger'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse('openapi-document'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}})
+class SharedCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        Course.objects.create(code='MH1100', name='Calculus I', academic_units=3, prefix='MH')
+
+    def test_data_version(self):
+        self.assertEqual(get_data_version(), 0)
+        version = bump_data_version()
+        self.assertGreater(version, 0)
+        next_version = bump_data_version()
+        self.assertGreater(next_version, version)
+        self.assertEqual(get_data_version(), next_version)
+
+    def test_get_or_compute(self):
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual([get_or_compute('test', ('a',), compute) for _ in range(2)], [1, 1])
+        self.assertEqual(get_or_compute('test', ('b',), compute), 2)
+        bump_data_version()
+        self.assertEqual(get_or_compute('test', ('a',), compute), 3)
+        self.assertNotEqual(make_key('test', 'a', 'b'), make_key('test', 'ab'))
+
+    def test_responses(self):
+        detail_url = reverse('courses:course-detail', kwargs={'code': 'MH1100'})
+        list_url, prefixes_url = reverse('courses:course-list'), reverse('courses:course-prefix-list')
+        self.assertEqual(self.client.get(detail_url).data['name'], 'Calculus I')
+        self.assertEqual(self.client.get(list_url).data['count'], 1)
+        self.assertEqual(self.client.get(prefixes_url).json(), {'prefixes': ['MH']})
+
+        # changed without bumping the data version, the cached responses are served
+        Course.objects.filter(code='MH1100').update(name='Calculus II')
+        Course.objects.create(code='SC1007', name='Data Structures', academic_units=3, prefix='SC')
+        self.assertEqual(self.client.get(detail_url).data['name'], 'Calculus I')
+        self.assertEqual(self.client.get(list_url).data['count'], 1)
+        self.assertEqual(self.client.get(list_url, {'search__icontains': 'SC'}).data['count'], 1) # other query parameters
+
+        bump_data_version()
+        self.assertEqual(self.client.get(detail_url).data['name'], 'Calculus II')
+        self.assertEqual(self.client.get(list_url).data['count'], 2)
+        self.assertEqual(self.client.get(prefixes_url).json(), {'prefixes': ['MH', 'SC']})
+
+    def test_errors_not_cached(self):
+        url = reverse('courses:course-detail', kwargs={'code': 'SC1007'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        Course.objects.create(code='SC1007', name='Data Structures', academic_units=3)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_scraper_run_bumps_version(self):
+        with RunRecorder(ScraperRun.Scraper.EXAM):
+            list(Course.objects.all())
+        self.assertEqual(get_data_version(), 0)
+        with RunRecorder(ScraperRun.Scraper.EXAM):
+            Course.objects.filter(code='MH1100').update(exam_schedule='')
+        self.assertGreater(get_data_version(), 0)
+
+
+class ImportTimeTestCase(SimpleTestCase):
+    OUTPUT = '''import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   rest_framework.settings
+import time:       300 |        420 | rest_framework
+import time:        50 |         50 | drf_yasg
+'''
+
+    def test_parse(self):
+        modules = parse_importtime(self.OUTPUT)
+        self.assertEqual(modules[0], ('rest_framework.settings', 120, 120))
+        self.assertEqual(group_by_package(modules), {'rest_framework': 420, 'drf_yasg': 50})
+
+
+class LoadTestSummaryTestCase(SimpleTestCase):
+    def test_percentile(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.05)
+        self.assertEqual(percentile(values, 99), 0.099)
+        self.assertEqual(percentile([0.2], 95), 0.2)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_summarize_endpoint(self):
+        summary = summarize_endpoint([0.01] * 8 + [0.5] * 2, {'500': 2, 'ConnectionError': 1}, elapsed=2)
+        self.assertEqual((summary['requests'], summary['throughput'], summary['error_rate']), (11, 5.5, 0.2727))
+        self.assertEqual((summary['p50_ms'], summary['p95_ms'], summary['max_ms']), (10.0, 500.0, 500.0))
+
+    def test_compare_with_baseline(self):
+        baseline = {'endpoints': {
+            'search': {'requests': 100, 'throughput': 50, 'error_rate': 0, 'p95_ms': 100},
+            'bulk': {'requests': 10, 'throughput': 5, 'error_rate': 0, 'p95_ms': 300},
+        }}
+        summary = {'endpoints': {
+            'search': {'requests': 100, 'throughput': 30, 'error_rate': 0.05, 'p95_ms': 150},
+            'bulk': {'requests': 10, 'throughput': 5, 'error_rate': 0, 'p95_ms': 330},
+            'detail': {'requests': 10, 'throughput': 5, 'error_rate': 0, 'p95_ms': 1000},
+        }}
+        regressions = compare_with_baseline(summary, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(regression.startswith('search:') for regression in regressions))
+
+
+class SeedCatalogueTestCase(TestCase):
+    def test_scraped_data_kept(self):
+        semester = Semester.get_or_create_from_code('2024_1')
+        save_course_data(process_data([(
+            {'course_code': 'MH1100', 'course_name': 'CALCULUS I', 'academic_units': 3},
+            [
+                {'index': index, 'info': [{'type': 'TUT', 'group': index, 'day': day, 'time': '0930-1020', 'venue': '', 'remark': ''}]}
+                for index, day in [('70181', 'TUE'), ('70182', 'WED')]
+            ],
+        )]), semester)
+        seed_catalogue(courses=30, programs=2, semester_code='2024_1')
+        delete_catalogue()
+        self.assertTrue(Course.objects.filter(code='MH1100', semesters=semester).exists())
+        self.assertEqual(set(CourseIndex.objects.filter(semester=semester).values_list('index', flat=True)), {'70181', '70182'})
+        self.assertEqual(CourseSchedule.objects.filter(index__course_code='MH1100', semester=semester).count(), 2)
+
+    def test_synthetic_index(self):
+        self.assertEqual([synthetic_index(number) for number in (0, 35, 36)], ['Q0000', 'Q000Z', 'Q0010'])
+
+
+class LoadTestTestCase(LiveServerTestCase):
+    def test_seed_and_run(self):
+        counts = seed_catalogue(courses=60, programs=5, semester_code='2024_1')
+        self.assertEqual((counts['courses'], counts['programs']), (60, 5))
+        summary = asyncio.run(run_load_test(self.live_server_url, users=2, duration=1))
+        total = summary['endpoints']['total']
+        self.assertGreater(total['requests'], 0)
+        self.assertEqual(total['errors'], {})
+        self.assertEqual(total['requests'], sum(
+            endpoint['requests'] for name, endpoint in summary['endpoints'].items() if name != 'total'
+        ))
+
+        # seeding again replaces the synthetic catalogue
+        seed_catalogue(courses=30, programs=5, semester_code='2024_1')
+        delete_catalogue()
+        self.assertFalse(Course.objects.exists())
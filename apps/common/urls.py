@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = 'common'
+
+urlpatterns = [
+    path('database/', views.get_database_stats, name='database-stats'),
+]
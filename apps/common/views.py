@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from apps.common.database import get_connection_stats
+from apps.common.metrics import request_metrics
+from apps.common.openapi import get_openapi_document as load_openapi_document
+from apps.common.permissions import IsSuperUser
+from apps.common.warmup import warmup
+
+
+# statistics of the worker process serving the request, query repeatedly to sample every worker
+@api_view(['GET'])
+@permission_classes([IsSuperUser])
+def get_database_stats(request):
+    return Response(get_connection_stats())
+
+
+# Prometheus text format, readable by superusers or with the METRICS_TOKEN bearer token
+def get_metrics(request):
+    authorization = request.headers.get('Authorization', '')
+    has_token = bool(settings.METRICS_TOKEN) and constant_time_compare(authorization, f'Bearer {settings.METRICS_TOKEN}')
+    if not has_token and not request.user.is_superuser:
+        return HttpResponse(status=403)
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4')
+
+
+# liveness probe, answered without touching the database
+def get_liveness(request):
+    return JsonResponse({'status': 'alive'})
+
+
+# readiness probe of the worker process serving the request: 503 until its warmup has run (see apps/common/warmup.py),
+# always 200 when WARMUP is disabled
+def get_readiness(request):
+    if not settings.WARMUP:
+        return JsonResponse({'status': 'ready'})
+    return JsonResponse(warmup.to_dict(), status=200 if warmup.ready else 503)
+
+
+def get_root(request):
+    return JsonResponse({'name': 'NTUMods Backend API', 'docs': '/docs/'})
+
+
+# generated once per deploy or process, see apps/common/openapi.py
+def get_openapi_document(request):
+    response = HttpResponse(load_openapi_document(), content_type='application/json')
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
@@ -0,0 +1,140 @@
+'''
+Warmup of a worker process, run in a background thread when the server loads the application (see `config/asgi.py`
+and `config/wsgi.py`), so that the first requests do not pay for loading the views and building the in-process caches.
+
+Every task of WARMUP_TASKS is run in order and timed, a failing task is logged and recorded but does not stop the
+others: its cache is then built lazily by the first request that needs it, as without warmup.
+The worker is ready once every task has run, see the readiness probe `/healthz/ready` (`apps/common/views.py`).
+
+When the application is loaded before forking the workers (gunicorn with `--preload`), the warmup thread of the parent
+does not exist in the workers: a fork first waits for the warmup to finish, so that every worker inherits
+the built caches and a ready state, and no lock of the caches held by the warmup thread.
+'''
+
+from django.db import close_old_connections, connection
+from django.urls import get_resolver
+from threading import Lock, Thread, current_thread
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import os
+
+
+logger = logging.getLogger('apps.performance')
+
+
+def load_views():
+    # importing every view module (and their serializers and filters) through the URL patterns
+    get_resolver().url_patterns
+
+def load_prerequisite_graph():
+    from apps.courses.prerequisite_graph import get_prerequisite_graph
+    get_prerequisite_graph()
+
+def load_eligibility_evaluator():
+    from apps.courses.eligibility import get_eligibility_evaluator
+    get_eligibility_evaluator()
+
+def load_degree_planner():
+    from apps.courses.planner import get_degree_planner
+    get_degree_planner()
+
+# the schedule bitmasks of the current semester, the semester queried by default
+def load_schedule_indexes():
+    from apps.courses.free_slots import get_free_slot_index
+    from apps.courses.models import Semester
+    from apps.courses.venues import get_venue_occupancy
+    semester = Semester.get_current()
+    if semester is not None:
+        get_free_slot_index(semester)
+        get_venue_occupancy(semester)
+
+
+WARMUP_TASKS: List[Tuple[str, Callable[[], None]]] = [
+    ('views', load_views),
+    ('prerequisite_graph', load_prerequisite_graph),
+    ('eligibility', load_eligibility_evaluator),
+    ('degree_planner', load_degree_planner),
+    ('schedule_indexes', load_schedule_indexes),
+]
+
+
+class Warmup:
+    '''
+    Warmup state of the worker process: `status` is 'pending' until started, then 'running' and 'ready',
+    `tasks` holds the duration in seconds of every task run, `errors` the error of every failed task.
+    '''
+    def __init__(self, tasks: List[Tuple[str, Callable[[], None]]]=WARMUP_TASKS):
+        self.tasks = tasks
+        self.status = 'pending'
+        self.durations: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.duration: Optional[float] = None
+        self.pid: Optional[int] = None
+        self.thread: Optional[Thread] = None
+        self.lock = Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'ready'
+
+    def run(self):
+        self.status = 'running'
+        start = perf_counter()
+        for name, task in self.tasks:
+            task_start = perf_counter()
+            try:
+                task()
+            except Exception as e:
+                self.errors[name] = f'{type(e).__name__}: {e}'
+                logger.warning(f'warmup task {name} failed: {self.errors[name]}')
+            self.durations[name] = round(perf_counter() - task_start, 3)
+        self.duration = round(perf_counter() - start, 3)
+        self.status = 'ready'
+        logger.info(f'worker {os.getpid()} warmed up in {self.duration}s: {self.durations}')
+
+    # the thread owns its database connection, which is given back once warm
+    def run_in_thread(self):
+        try:
+            close_old_connections()
+            self.run()
+        finally:
+            connection.close()
+
+    '''
+    Start the warmup in a daemon thread, once per process.
+    '''
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.status = 'pending'
+            self.durations, self.errors = {}, {}
+            self.thread = Thread(target=self.run_in_thread, name='warmup', daemon=True)
+            self.thread.start()
+
+    # registered with `os.register_at_fork`, see the module docstring
+    def before_fork(self):
+        thread = self.thread
+        if thread is not None and thread is not current_thread() and thread.is_alive():
+            thread.join()
+
+    def after_fork_in_child(self):
+        self.lock = Lock()
+        self.thread = None
+        if self.pid is not None:
+            self.pid = os.getpid()
+
+    def to_dict(self) -> Dict:
+        return {
+            'status': self.status,
+            'pid': os.getpid(),
+            'duration': self.duration,
+            'tasks': self.durations,
+            'errors': self.errors,
+        }
+
+
+warmup = Warmup()
+os.register_at_fork(before=warmup.before_fork, after_in_child=warmup.after_fork_in_child)
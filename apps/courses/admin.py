@@ -2,10 +2,11 @@ from django.contrib import admin
 from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
 
-from apps.courses.models import Course, CourseIndex, CoursePrefix, CourseProgram
+from apps.common.admin import DataVersionAdminMixin
+from apps.courses.models import Course, CourseIndex, CourseOffering, CoursePrefix, CourseProgram, Semester, VenueOccupancy
 
 
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ['code', 'name', 'AU', 'level', 'prefix', 'last_updated', 'indexes_count']
 
     def AU(self, obj):
@@ -16,11 +17,25 @@ class CourseAdmin(admin.ModelAdmin):
         return obj.indexes.count()
 
 
-class CourseIndexAdmin(admin.ModelAdmin):
-    list_display = ['index', 'course_code']
+class CourseIndexAdmin(DataVersionAdminMixin, admin.ModelAdmin):
+    list_display = ['index', 'course_code', 'semester']
+    list_filter = ['semester']
 
 
-class CoursePrefixAdmin(admin.ModelAdmin):
+class SemesterAdmin(DataVersionAdminMixin, admin.ModelAdmin):
+    list_display = ['code', 'year', 'semester', 'is_current', 'last_updated', 'courses_count']
+
+    def courses_count(self, obj):
+        return obj.courses.count()
+
+
+class CourseOfferingAdmin(DataVersionAdminMixin, admin.ModelAdmin):
+    list_display = ['course', 'semester', 'last_updated']
+    search_fields = ['course__code']
+    list_filter = ['semester']
+
+
+class CoursePrefixAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'prefix', 'last_updated', 'courses_count']
     readonly_fields = ['courses_count', 'courses_list']
 
@@ -42,7 +57,7 @@ class CoursePrefixAdmin(admin.ModelAdmin):
     courses_list.short_description = "Courses with this prefix"
 
 
-class CourseProgramAdmin(admin.ModelAdmin):
+class CourseProgramAdmin(DataVersionAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'name', 'year', 'value', 'last_updated', 'courses_count']
     search_fields = ['name', 'year', 'value']
     list_filter = ['year']
@@ -51,7 +66,16 @@ class CourseProgramAdmin(admin.ModelAdmin):
         return obj.courses.count()
 
 
+class VenueOccupancyAdmin(DataVersionAdminMixin, admin.ModelAdmin):
+    list_display = ['venue', 'semester', 'classes']
+    search_fields = ['venue']
+    list_filter = ['semester']
+
+
 admin.site.register(Course, CourseAdmin)
 admin.site.register(CourseIndex, CourseIndexAdmin)
 admin.site.register(CoursePrefix, CoursePrefixAdmin)
 admin.site.register(CourseProgram, CourseProgramAdmin)
+admin.site.register(Semester, SemesterAdmin)
+admin.site.register(CourseOffering, CourseOfferingAdmin)
+admin.site.register(VenueOccupancy, VenueOccupancyAdmin)
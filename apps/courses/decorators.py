@@ -0,0 +1,13 @@
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+
+
+semester_parameter = openapi.Parameter('semester', openapi.IN_QUERY, description="Semester, e.g. 2024_1 (defaults to the current semester)", type=openapi.TYPE_STRING, default=None)
+day_parameter = openapi.Parameter('day', openapi.IN_QUERY, description="Day of the free venue search, e.g. MON", type=openapi.TYPE_STRING, enum=['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT'])
+time_parameter = openapi.Parameter('time', openapi.IN_QUERY, description="Time range of the free venue search, e.g. 0930-1130", type=openapi.TYPE_STRING)
+from_parameter = openapi.Parameter('from', openapi.IN_QUERY, description="Course to start from (defaults to the closest course without prerequisite)", type=openapi.TYPE_STRING)
+
+
+# GET views answering a single object from in-memory structures, documented with a response serializer
+def response_schema(serializer_class, manual_parameters=()):
+    return swagger_auto_schema(responses={200: serializer_class}, manual_parameters=list(manual_parameters))
@@ -0,0 +1,181 @@
+'''
+Evaluator of the courses a student is eligible for, given the completed courses, programme and admission year.
+
+The compiled prerequisite trees, mutual exclusions and programme restrictions of all courses
+(pre-parsed by the course detail scraper into CourseExclusion and CourseProgrammeRestriction rows) are loaded once
+into per-course records, where every course code is a node id and sets of courses are Python int bitsets
+(bit `i` set for node id `i`). A request is then a single pass over the records with bitmask tests only:
+- a prerequisite DNF term is satisfied when `term & completed == term`,
+- a course is mutually exclusive with a completed course when `exclusive & completed != 0`.
+Programme restrictions are evaluated once per distinct restriction list, as many courses share the same list.
+'''
+
+from collections import defaultdict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from apps.common.cache import get_data_version
+from apps.courses.models import Course, CourseExclusion, CourseProgrammeRestriction
+from apps.courses.prerequisites import tree_to_dnf
+from apps.courses.restrictions import Restriction, restriction_applies
+
+
+@dataclass
+class CourseEligibility:
+    code: str
+    name: str
+    academic_units: int
+    node: int
+    prerequisite_terms: Tuple[int, ...]
+    exclusive: int
+    not_available: Tuple[Restriction, ...]
+    not_available_all: Tuple[Restriction, ...]
+    not_offered_as_core_to: Tuple[Restriction, ...]
+    not_offered_as_pe_to: Tuple[Restriction, ...]
+    not_offered_as_bde_ue_to: Tuple[Restriction, ...]
+    offered_as_ue: bool
+    offered_as_bde: bool
+
+
+ELIGIBILITY_FIELDS = ['code', 'name', 'academic_units', 'prerequisites_tree', 'offered_as_ue', 'offered_as_bde']
+
+
+class EligibilityEvaluator:
+    '''
+    Built from dicts with the `ELIGIBILITY_FIELDS` of every course ordered by code,
+    (course code, excluded code) pairs of CourseExclusion,
+    and (course code, kind, programme, first year, last year) tuples of CourseProgrammeRestriction.
+    Mutual exclusion is symmetric: a course excludes the courses it lists and the courses listing it.
+    '''
+    def __init__(
+        self,
+        rows: Iterable[Dict],
+        exclusions: Iterable[Tuple[str, str]]=(),
+        restrictions: Iterable[Tuple[str, str, Optional[str], Optional[int], Optional[int]]]=(),
+    ):
+        self.ids: Dict[str, int] = {}
+        rows = list(rows)
+        for row in rows:
+            self._get_id(row['code'])
+
+        exclusives = [0] * len(rows)
+        for code, excluded_code in exclusions:
+            node, other = self.ids[code], self._get_id(excluded_code)
+            exclusives[node] |= 1 << other
+            if other < len(rows):
+                exclusives[other] |= 1 << node
+
+        # restrictions are sorted so that equal lists are equal tuples, shared across courses by `evaluate`
+        course_restrictions = defaultdict(list)
+        for code, kind, *restriction in restrictions:
+            course_restrictions[code, kind].append(tuple(restriction))
+        get_restrictions = lambda code, kind: tuple(sorted(
+            course_restrictions.get((code, kind), ()),
+            key=lambda restriction: tuple((value is None, value) for value in restriction),
+        ))
+
+        self.courses: List[CourseEligibility] = []
+        for row in rows:
+            code, node = row['code'], self.ids[row['code']]
+            dnf = tree_to_dnf(row['prerequisites_tree']) or ()
+            self.courses.append(CourseEligibility(
+                code=code,
+                name=row['name'],
+                academic_units=row['academic_units'],
+                node=node,
+                prerequisite_terms=tuple(self.to_mask(term) for term in dnf),
+                exclusive=exclusives[node],
+                not_available=get_restrictions(code, 'not_available'),
+                not_available_all=get_restrictions(code, 'not_available_all'),
+                not_offered_as_core_to=get_restrictions(code, 'not_offered_as_core_to'),
+                not_offered_as_pe_to=get_restrictions(code, 'not_offered_as_pe_to'),
+                not_offered_as_bde_ue_to=get_restrictions(code, 'not_offered_as_bde_ue_to'),
+                offered_as_ue=row['offered_as_ue'],
+                offered_as_bde=row['offered_as_bde'],
+            ))
+
+    def _get_id(self, code: str) -> int:
+        return self.ids.setdefault(code, len(self.ids))
+
+    '''
+    Bitset of the given course codes, adding node ids for codes that are not courses (e.g. retired courses).
+    '''
+    def to_mask(self, codes: Iterable[str]) -> int:
+        mask = 0
+        for code in codes:
+            if code not in self.ids:
+                self._get_id(code)
+            mask |= 1 << self.ids[code]
+        return mask
+
+    '''
+    Return the courses the student is eligible for, as dicts with `code`, `name`, `academic_units` and `offered_as`,
+    the list of ways the course can be taken by the student among 'core', 'pe', 'bde' and 'ue'.
+    A course is eligible when it is not completed, one of its prerequisite terms is completed,
+    it is not mutually exclusive with a completed course, and it is available to the programme and admission year.
+    '''
+    def evaluate(
+        self,
+        completed_codes: Iterable[str],
+        programme_codes: Iterable[str]=(),
+        admission_year: Optional[int]=None,
+    ) -> List[Dict]:
+        completed = 0
+        for code in completed_codes:
+            if code in self.ids:
+                completed |= 1 << self.ids[code]
+        programme_codes = tuple(programme_codes)
+
+        applies_cache = {(): False}
+        def applies(restrictions: Tuple[Restriction, ...]) -> bool:
+            if restrictions not in applies_cache:
+                applies_cache[restrictions] = restriction_applies(restrictions, programme_codes, admission_year)
+            return applies_cache[restrictions]
+
+        eligible = []
+        for course in self.courses:
+            if (completed >> course.node) & 1 or course.exclusive & completed:
+                continue
+            if course.prerequisite_terms and not any(term & completed == term for term in course.prerequisite_terms):
+                continue
+            if applies(course.not_available) or applies(course.not_available_all):
+                continue
+            bde_ue_restricted = applies(course.not_offered_as_bde_ue_to)
+            offered_as = [
+                offered for offered, is_offered in [
+                    ('core', not applies(course.not_offered_as_core_to)),
+                    ('pe', not applies(course.not_offered_as_pe_to)),
+                    ('bde', course.offered_as_bde and not bde_ue_restricted),
+                    ('ue', course.offered_as_ue and not bde_ue_restricted),
+                ] if is_offered
+            ]
+            eligible.append({
+                'code': course.code,
+                'name': course.name,
+                'academic_units': course.academic_units,
+                'offered_as': offered_as,
+            })
+        return eligible
+
+
+_evaluator: Optional[EligibilityEvaluator] = None
+_evaluator_version: Optional[int] = None
+_evaluator_lock = Lock()
+
+'''
+Return the eligibility evaluator, loaded once per process and reloaded only when the data version changed
+(see `apps/common/cache.py`), i.e. after a scraper run, a compile command or an admin edit.
+'''
+def get_eligibility_evaluator() -> EligibilityEvaluator:
+    global _evaluator, _evaluator_version
+    version = get_data_version()
+    with _evaluator_lock:
+        if _evaluator is None or _evaluator_version != version:
+            _evaluator = EligibilityEvaluator(
+                Course.objects.order_by('code').values(*ELIGIBILITY_FIELDS),
+                CourseExclusion.objects.values_list('course_id', 'excluded_code'),
+                CourseProgrammeRestriction.objects.values_list('course_id', 'kind', 'programme', 'first_year', 'last_year'),
+            )
+            _evaluator_version = version
+        return _evaluator
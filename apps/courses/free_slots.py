@@ -0,0 +1,92 @@
+'''
+Free-slot index of the courses of a semester: which courses have at least one index fitting into a student's
+timetable, i.e. whose weekly schedule does not intersect the occupied slots.
+
+Every index of the semester is precomputed once into a weekly bitmask (see `apps/courses/schedules.py`), the union
+of its own classes and of the classes common to all indexes of its course, computed from the parsed slots of the
+classes, and every course into its exam key
+(see `exam_key`). The masks are kept as Python ints, a 192-bit AND being a single integer operation,
+so that a query is one pass over the indexes of the semester without any database query.
+'''
+
+from threading import Lock
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from apps.common.cache import get_data_version
+from apps.courses.models import Course, CourseIndex, CourseSchedule, Semester
+from apps.courses.schedules import SCHEDULE_SLOT_FIELDS, exam_key, slots_to_mask
+
+
+class FreeSlotIndex:
+    '''
+    Built from the (course code, index id) pairs of CourseIndex of a semester, the
+    (index id, course code, weekday, start slot, end slot) rows of CourseSchedule of the semester
+    (course code set for the classes common to all indexes of a course),
+    and the (course code, exam schedule) pairs of Course.
+    '''
+    def __init__(
+        self,
+        indexes: Iterable[Tuple[str, int]],
+        schedules: Iterable[Tuple[Optional[int], Optional[str], Optional[int], Optional[int], Optional[int]]],
+        exams: Iterable[Tuple[str, str]]=(),
+    ):
+        index_masks: Dict[int, int] = {}
+        common_masks: Dict[str, int] = {}
+        for index_id, code, *slots in schedules:
+            if index_id is not None:
+                index_masks[index_id] = index_masks.get(index_id, 0) | slots_to_mask(*slots)
+            else:
+                common_masks[code] = common_masks.get(code, 0) | slots_to_mask(*slots)
+
+        course_masks: Dict[str, Set[int]] = {}
+        for code, index_id in indexes:
+            course_masks.setdefault(code, set()).add(index_masks.get(index_id, 0) | common_masks.get(code, 0))
+        # indexes with the same schedule (e.g. the tutorial groups of a course only differing by venue) are kept once
+        self.masks: Dict[str, Tuple[int, ...]] = {code: tuple(masks) for code, masks in course_masks.items()}
+        self.exams: Dict[str, Tuple[str, int]] = {
+            code: key for code, exam_schedule in exams if (key := exam_key(exam_schedule)) is not None
+        }
+
+    '''
+    Return the codes of the courses with at least one index that does not intersect the `occupied` bitmask,
+    and whose exam does not clash with the exams of the courses `exam_clash_with`, if given
+    (these courses themselves are not checked against their own exams).
+    '''
+    def fitting_courses(self, occupied: int, exam_clash_with: Iterable[str]=()) -> Set[str]:
+        fitting = {code for code, masks in self.masks.items() if any(not mask & occupied for mask in masks)}
+        exam_clash_with = set(exam_clash_with)
+        exams: Dict[str, int] = {}
+        for code in exam_clash_with:
+            if code in self.exams:
+                date, mask = self.exams[code]
+                exams[date] = exams.get(date, 0) | mask
+        if exams:
+            fitting = {
+                code for code in fitting
+                if code in exam_clash_with or code not in self.exams or not self.exams[code][1] & exams.get(self.exams[code][0], 0)
+            }
+        return fitting
+
+
+_indexes: Dict[int, FreeSlotIndex] = {}
+_indexes_version: Optional[int] = None
+_indexes_lock = Lock()
+
+'''
+Return the free-slot index of the semester, loaded once per process and semester, and reloaded only when the data
+version changed (see `apps/common/cache.py`), e.g. after a course or exam scraper run.
+'''
+def get_free_slot_index(semester: Semester) -> FreeSlotIndex:
+    global _indexes_version
+    version = get_data_version()
+    with _indexes_lock:
+        if _indexes_version != version:
+            _indexes.clear()
+            _indexes_version = version
+        if semester.id not in _indexes:
+            _indexes[semester.id] = FreeSlotIndex(
+                CourseIndex.objects.filter(semester=semester).values_list('course_code', 'id'),
+                CourseSchedule.objects.filter(semester=semester).values_list('index_id', 'common_schedule_for_course', *SCHEDULE_SLOT_FIELDS),
+                Course.objects.filter(semesters=semester).exclude(exam_schedule='').values_list('code', 'exam_schedule'),
+            )
+        return _indexes[semester.id]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+'''
+First of the migrations scoping courses, indexes and schedules by semester, split so that on PostgreSQL
+no schema change runs in the transaction of a data migration (pending trigger events):
+- 0017: Semester and CourseOffering tables, CourseSchedule.index_code to keep the index codes aside
+- 0017b: data, the initial semester, its offerings and the index codes of the schedules
+- 0017c: CourseIndex gets an auto primary key, indexes and schedules a semester
+- 0017d: data, the indexes and schedules are assigned to the initial semester
+- 0017e: CourseSchedule.index_code is removed
+'''
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_course_content_hash_course_detail_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Semester',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True)),
+                ('year', models.IntegerField()),
+                ('semester', models.CharField(max_length=2)),
+                ('is_current', models.BooleanField(default=False)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Semesters',
+                'ordering': ['year', 'semester'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseOffering',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(blank=True, max_length=64, null=True)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.semester')),
+            ],
+            options={
+                'verbose_name_plural': 'Course Offerings',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='courseoffering',
+            constraint=models.UniqueConstraint(fields=('course', 'semester'), name='unique_course_offering'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='semesters',
+            field=models.ManyToManyField(blank=True, related_name='courses', through='courses.CourseOffering', to='courses.semester'),
+        ),
+        # CourseSchedule.index referenced CourseIndex.index (the former primary key),
+        # keep the index codes aside while CourseIndex gets an auto primary key
+        migrations.AddField(
+            model_name='courseschedule',
+            name='index_code',
+            field=models.CharField(max_length=5, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:51
+
+from django.db import migrations, models
+
+
+'''
+Existing courses, indexes and schedules were scraped for AY2024/25 semester 1,
+they are assigned to that semester which is marked as the current semester.
+'''
+INITIAL_SEMESTER_CODE = '2024_1'
+
+
+def create_initial_semester(apps, schema_editor):
+    Semester = apps.get_model('courses', 'Semester')
+    Course = apps.get_model('courses', 'Course')
+    CourseOffering = apps.get_model('courses', 'CourseOffering')
+    if not Course.objects.exists():
+        return
+    year, semester = INITIAL_SEMESTER_CODE.split('_')
+    initial_semester = Semester.objects.create(code=INITIAL_SEMESTER_CODE, year=int(year), semester=semester, is_current=True)
+    CourseOffering.objects.bulk_create([
+        CourseOffering(course_id=code, semester=initial_semester, content_hash=content_hash)
+        for code, content_hash in Course.objects.values_list('code', 'content_hash')
+    ])
+
+
+def copy_schedule_index_code(apps, schema_editor):
+    CourseSchedule = apps.get_model('courses', 'CourseSchedule')
+    CourseSchedule.objects.filter(index__isnull=False).update(index_code=models.F('index_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_semester_courseoffering_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_initial_semester, migrations.RunPython.noop),
+        migrations.RunPython(copy_schedule_index_code, migrations.RunPython.noop),
+    ]
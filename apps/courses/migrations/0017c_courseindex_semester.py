@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:51
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017b_initial_semester_offerings'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='course',
+            name='content_hash',
+        ),
+        migrations.RemoveField(
+            model_name='courseschedule',
+            name='index',
+        ),
+        migrations.AlterField(
+            model_name='courseindex',
+            name='index',
+            field=models.CharField(max_length=5, validators=[django.core.validators.RegexValidator(code='invalid_format', message='The value must be 5 numeric digits.', regex='^\\d{5}$')]),
+        ),
+        migrations.AddField(
+            model_name='courseindex',
+            name='id',
+            field=models.BigAutoField(auto_created=True, default=None, primary_key=True, serialize=False, verbose_name='ID'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='courseindex',
+            name='semester',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='indexes', to='courses.semester'),
+        ),
+        migrations.AddConstraint(
+            model_name='courseindex',
+            constraint=models.UniqueConstraint(fields=('semester', 'index'), name='unique_index_per_semester'),
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='semester',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='courses.semester'),
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='index',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='courses.courseindex'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:51
+
+from django.db import migrations
+
+
+INITIAL_SEMESTER_CODE = '2024_1'
+
+
+def assign_initial_semester(apps, schema_editor):
+    Semester = apps.get_model('courses', 'Semester')
+    CourseIndex = apps.get_model('courses', 'CourseIndex')
+    CourseSchedule = apps.get_model('courses', 'CourseSchedule')
+    initial_semester = Semester.objects.filter(code=INITIAL_SEMESTER_CODE).first()
+    if initial_semester is None:
+        return
+    CourseIndex.objects.update(semester=initial_semester)
+    CourseSchedule.objects.update(semester=initial_semester)
+    index_ids = dict(CourseIndex.objects.values_list('index', 'id'))
+    schedules = list(CourseSchedule.objects.filter(index_code__isnull=False))
+    for schedule in schedules:
+        schedule.index_id = index_ids.get(schedule.index_code)
+    CourseSchedule.objects.bulk_update(schedules, ['index'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017c_courseindex_semester'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_initial_semester, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017d_assign_initial_semester'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='courseschedule',
+            name='index_code',
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:02
+
+import django.db.models.deletion
+import re
+from django.db import migrations, models
+
+
+RESTRICTION_FIELDS = ['not_available', 'not_available_all', 'not_offered_as_core_to', 'not_offered_as_pe_to', 'not_offered_as_bde_ue_to']
+
+# frozen copy of the parsers of apps/courses/restrictions.py, so that this migration does not change with them
+MAX_PROGRAMME_LENGTH = 50
+COURSE_CODE_REGEX = re.compile(r'\b(?!AY\d)[A-Z]{1,3}\d{4}[A-Z]?\b', re.IGNORECASE)
+YEAR_RANGE_REGEX = re.compile(r'\(\s*(?:Admyr\s*)?(\d{4})\s*(?:-\s*(\d{4}|onwards))?\s*\)', re.IGNORECASE)
+
+
+def parse_course_codes(text):
+    if not text:
+        return ()
+    return tuple(sorted({code.upper() for code in COURSE_CODE_REGEX.findall(text)}))
+
+def parse_programme_restrictions(text):
+    if not text:
+        return ()
+    restrictions = []
+    for item in text.split(','):
+        match = YEAR_RANGE_REGEX.search(item)
+        first_year = last_year = None
+        if match:
+            first_year = int(match.group(1))
+            last_year = None if match.group(2) and match.group(2).lower() == 'onwards' else int(match.group(2) or first_year)
+            item = item[:match.start()] + item[match.end():]
+        programme = item.strip().upper() or None
+        if programme is None and first_year is None:
+            continue
+        if programme is not None and len(programme) > MAX_PROGRAMME_LENGTH:
+            continue
+        restrictions.append((programme, first_year, last_year))
+    return tuple(restrictions)
+
+
+def parse_existing_restrictions(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseExclusion = apps.get_model('courses', 'CourseExclusion')
+    CourseProgrammeRestriction = apps.get_model('courses', 'CourseProgrammeRestriction')
+    courses = Course.objects.values('code', 'mutually_exclusive', *RESTRICTION_FIELDS)
+    CourseExclusion.objects.bulk_create([
+        CourseExclusion(course_id=course['code'], excluded_code=code)
+        for course in courses
+        for code in parse_course_codes(course['mutually_exclusive'])
+        if code != course['code']
+    ], batch_size=1000)
+    CourseProgrammeRestriction.objects.bulk_create([
+        CourseProgrammeRestriction(
+            course_id=course['code'],
+            kind=kind,
+            programme=programme,
+            first_year=first_year,
+            last_year=last_year,
+        )
+        for course in courses
+        for kind in RESTRICTION_FIELDS
+        for programme, first_year, last_year in dict.fromkeys(parse_programme_restrictions(course[kind]))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017e_remove_courseschedule_index_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseExclusion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('excluded_code', models.CharField(db_index=True, max_length=10)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exclusions', to='courses.course')),
+            ],
+            options={
+                'verbose_name_plural': 'Course Exclusions',
+                'constraints': [models.UniqueConstraint(fields=('course', 'excluded_code'), name='unique_course_exclusion')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseProgrammeRestriction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('not_available', 'Not available to programme'), ('not_available_all', 'Not available to all programmes'), ('not_offered_as_core_to', 'Not available as core to programme'), ('not_offered_as_pe_to', 'Not available as PE to programme'), ('not_offered_as_bde_ue_to', 'Not available as BDE/UE to programme')], max_length=30)),
+                ('programme', models.CharField(blank=True, max_length=50, null=True)),
+                ('first_year', models.IntegerField(blank=True, null=True)),
+                ('last_year', models.IntegerField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='programme_restrictions', to='courses.course')),
+            ],
+            options={
+                'verbose_name_plural': 'Course Programme Restrictions',
+                'indexes': [models.Index(fields=['kind', 'programme'], name='restriction_kind_programme')],
+            },
+        ),
+        migrations.RunPython(parse_existing_restrictions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0018_courseexclusion_courseprogrammerestriction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['level', 'code'], name='course_level_code'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['prefix', 'code'], name='course_prefix_code'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['academic_units', 'code'], name='course_au_code'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('offered_as_ue', False)), fields=['code'], name='course_not_offered_as_ue'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('offered_as_bde', False)), fields=['code'], name='course_not_offered_as_bde'),
+        ),
+        migrations.AddIndex(
+            model_name='courseprogram',
+            index=models.Index(fields=['year'], name='courseprogram_year'),
+        ),
+        migrations.AddIndex(
+            model_name='courseschedule',
+            index=models.Index(fields=['index', 'semester'], name='schedule_index_semester'),
+        ),
+        migrations.AddIndex(
+            model_name='courseschedule',
+            index=models.Index(fields=['common_schedule_for_course', 'semester'], name='schedule_course_semester'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+'''
+Trigram indexes serving the `icontains` searches of course code and name (`search__icontains`, `code__icontains`,
+`name__icontains`), PostgreSQL only: the indexed expression is the one Django filters `icontains` on,
+`UPPER(column::text) LIKE UPPER(pattern)`.
+Other databases are left without them, SQLite cannot use an index for `LIKE '%...%'`.
+'''
+TRIGRAM_INDEXES = [
+    ('course_code_trgm', 'code'),
+    ('course_name_trgm', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON courses_course USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0019_course_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
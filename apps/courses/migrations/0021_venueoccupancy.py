@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:33
+
+import apps.courses.validations
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0020_course_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('venue', models.CharField(max_length=200)),
+                ('schedule', models.CharField(max_length=192, validators=[apps.courses.validations.validate_weekly_schedule])),
+                ('classes', models.IntegerField(default=0)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='venues', to='courses.semester')),
+            ],
+            options={
+                'verbose_name_plural': 'Venue Occupancies',
+                'constraints': [models.UniqueConstraint(fields=('semester', 'venue'), name='unique_venue_per_semester')],
+            },
+        ),
+    ]
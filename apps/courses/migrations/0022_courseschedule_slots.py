@@ -0,0 +1,70 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:36
+
+from django.db import migrations, models
+
+
+# frozen copy of the parsers of apps/courses/schedules.py, so that this migration does not change with them
+DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
+SLOTS_PER_DAY = 32
+FIRST_HOUR = 8
+CLASS_TYPES = {'LEC', 'TUT', 'LAB', 'SEM', 'OTH'}
+
+
+def class_to_slots(day, time):
+    if day not in DAYS:
+        return None, None, None
+    try:
+        start_time, end_time = time.split('-')
+        start_minutes = (int(start_time[0:2]) - FIRST_HOUR) * 60 + int(start_time[2:4])
+        end_minutes = (int(end_time[0:2]) - FIRST_HOUR) * 60 + int(end_time[2:4])
+    except (ValueError, IndexError):
+        return None, None, None
+    start_slot = max(start_minutes // 30, 0)
+    end_slot = min(-(-end_minutes // 30), SLOTS_PER_DAY)
+    return DAYS.index(day), start_slot, max(end_slot, start_slot)
+
+def parse_class_type(type):
+    class_type = type.strip().upper()[:3]
+    return class_type if class_type in CLASS_TYPES else 'OTH'
+
+def parse_existing_schedules(apps, schema_editor):
+    CourseSchedule = apps.get_model('courses', 'CourseSchedule')
+    schedules = list(CourseSchedule.objects.only('type', 'day', 'time'))
+    for schedule in schedules:
+        schedule.weekday, schedule.start_slot, schedule.end_slot = class_to_slots(schedule.day, schedule.time)
+        schedule.class_type = parse_class_type(schedule.type)
+    CourseSchedule.objects.bulk_update(schedules, ['weekday', 'start_slot', 'end_slot', 'class_type'], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0021_venueoccupancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseschedule',
+            name='class_type',
+            field=models.CharField(choices=[('LEC', 'Lecture'), ('TUT', 'Tutorial'), ('LAB', 'Laboratory'), ('SEM', 'Seminar'), ('OTH', 'Other')], default='OTH', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='end_slot',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='start_slot',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='weekday',
+            field=models.SmallIntegerField(blank=True, choices=[(0, 'MON'), (1, 'TUE'), (2, 'WED'), (3, 'THU'), (4, 'FRI'), (5, 'SAT')], null=True),
+        ),
+        migrations.AddIndex(
+            model_name='courseschedule',
+            index=models.Index(fields=['semester', 'weekday', 'start_slot', 'end_slot'], name='schedule_semester_time'),
+        ),
+        migrations.RunPython(parse_existing_schedules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-19 18:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0022_courseschedule_slots'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='courseschedule',
+            name='schedule_index_semester',
+        ),
+    ]
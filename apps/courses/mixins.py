@@ -1,9 +1,40 @@
-from django.db.models import Q
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef, Q
+from django_filters import rest_framework as filters
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from typing import Optional
+import re
 
 from apps.common.pagination import CustomPagination
-from apps.courses.models import CourseProgram
+from apps.courses.free_slots import FreeSlotIndex, get_free_slot_index
+from apps.courses.models import Course, CourseExclusion, CourseProgram, CourseProgrammeRestriction, Semester
+from apps.courses.schedules import schedule_to_mask
+
+
+'''
+Return the semester requested with query parameter `semester`, e.g. `semester=2024_1`.
+Defaults to the current semester (see `Semester.get_current`), or None if no semester has been scraped yet.
+Raises NotFound if the requested semester does not exist.
+'''
+def get_requested_semester(request) -> Optional[Semester]:
+    semester_qp = request.query_params.get('semester', None)
+    if not semester_qp:
+        return Semester.get_current()
+    semester = Semester.objects.filter(code=semester_qp).first()
+    if semester is None:
+        raise NotFound(f'Semester {semester_qp} not found.')
+    return semester
+
+async def aget_requested_semester(request) -> Optional[Semester]:
+    semester_qp = request.query_params.get('semester', None)
+    if not semester_qp:
+        return await Semester.aget_current()
+    semester = await Semester.objects.filter(code=semester_qp).afirst()
+    if semester is None:
+        raise NotFound(f'Semester {semester_qp} not found.')
+    return semester
 
 
 '''
@@ -79,6 +110,113 @@ class PrefixMultipleFilter(BaseFilterBackend):
         return queryset.filter(prefix__in=programs)
 
 
+'''
+When query parameter `semester` is provided, filter courses offered in that semester, e.g. `semester=2024_1`.
+'''
+class SemesterFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        semester_qp = request.query_params.get('semester', None)
+        if not semester_qp:
+            return queryset
+        return queryset.filter(semesters__code=semester_qp)
+
+
+'''
+When query parameter `fits_occupied` is provided, a weekly schedule (see `common_schedule` in Course model) of the
+slots already occupied by the student, filter courses with at least one index of the semester (`semester` query
+parameter, defaults to the current semester) that does not clash with it.
+With `no_exam_clash_with`, course codes separated by semicolons, e.g. `no_exam_clash_with=MH1100;SC1007`,
+courses whose exam clashes with the exam of one of these courses are excluded too.
+Backed by the in-process free-slot index of the semester, see `apps/courses/free_slots.py`.
+'''
+class FreeSlotFilter(BaseFilterBackend):
+    def get_occupied(self, request) -> Optional[int]:
+        occupied_qp = request.query_params.get('fits_occupied', None)
+        if not occupied_qp:
+            return None
+        if not re.fullmatch(r'[OX]{192}', occupied_qp):
+            raise ValidationError({'fits_occupied': 'Must be a weekly schedule of 192 `O` and `X` characters.'})
+        return schedule_to_mask(occupied_qp)
+
+    def filter_fitting(self, request, queryset, index: Optional[FreeSlotIndex], occupied: int):
+        if index is None:
+            return queryset.none()
+        exam_qp = request.query_params.get('no_exam_clash_with', '')
+        exam_codes = [code.strip().upper() for code in exam_qp.split(';') if code.strip()]
+        return queryset.filter(code__in=index.fitting_courses(occupied, exam_codes))
+
+    def filter_queryset(self, request, queryset, view):
+        occupied = self.get_occupied(request)
+        if occupied is None:
+            return queryset
+        semester = get_requested_semester(request)
+        index = get_free_slot_index(semester) if semester is not None else None
+        return self.filter_fitting(request, queryset, index, occupied)
+
+    async def afilter_queryset(self, request, queryset, view):
+        occupied = self.get_occupied(request)
+        if occupied is None:
+            return queryset
+        semester = await aget_requested_semester(request)
+        index = await sync_to_async(get_free_slot_index)(semester) if semester is not None else None
+        return self.filter_fitting(request, queryset, index, occupied)
+
+
+'''
+Filter set of the text columns of Course that are kept as they are, and of the relations parsed from the
+exclusion and programme restriction texts (see `apps/scraper/utils/restriction_compiler.py`),
+which are filtered with indexed lookups on CourseExclusion and CourseProgrammeRestriction.
+The relation filters keep the `<field>__icontains` query parameters of the text columns they replace:
+- `mutually_exclusive__icontains` matches excluded course codes starting with the value, e.g. `MH11`.
+- `not_available__icontains`, `not_offered_as_core_to__icontains`, `not_offered_as_pe_to__icontains` and
+  `not_offered_as_bde_ue_to__icontains` match programme codes starting with the value, e.g. `CSC`.
+- `not_available_all__icontains` matches an admission year within the restricted range, e.g. `2020`.
+- `program_list__icontains` matches the names of the programmes the course belongs to.
+'''
+class CourseFilterSet(filters.FilterSet):
+    mutually_exclusive__icontains = filters.CharFilter(method='filter_exclusion')
+    not_available__icontains = filters.CharFilter(method='filter_restriction')
+    not_available_all__icontains = filters.CharFilter(method='filter_restriction')
+    not_offered_as_core_to__icontains = filters.CharFilter(method='filter_restriction')
+    not_offered_as_pe_to__icontains = filters.CharFilter(method='filter_restriction')
+    not_offered_as_bde_ue_to__icontains = filters.CharFilter(method='filter_restriction')
+    program_list__icontains = filters.CharFilter(method='filter_program')
+
+    class Meta:
+        model = Course
+        fields = {
+            'code': ['icontains'],
+            'name': ['icontains'],
+            'academic_units': ['lte', 'gte'],
+            'prerequisite': ['icontains'],
+            'offered_as_ue': ['exact'],
+            'offered_as_bde': ['exact'],
+            'grade_type': ['icontains'],
+            'department_maintaining': ['icontains'],
+        }
+
+    def filter_exclusion(self, queryset, name, value):
+        exclusions = CourseExclusion.objects.filter(course=OuterRef('pk'), excluded_code__startswith=value.strip().upper())
+        return queryset.filter(Exists(exclusions))
+
+    def filter_restriction(self, queryset, name, value):
+        kind = name.removesuffix('__icontains')
+        value = value.strip().upper()
+        restrictions = CourseProgrammeRestriction.objects.filter(course=OuterRef('pk'), kind=kind)
+        if value.isdigit():
+            year = int(value)
+            restrictions = restrictions.filter(
+                Q(first_year__lte=year) & (Q(last_year__isnull=True) | Q(last_year__gte=year))
+            )
+        else:
+            restrictions = restrictions.filter(programme__startswith=value)
+        return queryset.filter(Exists(restrictions))
+
+    def filter_program(self, queryset, name, value):
+        programs = CourseProgram.objects.filter(courses=OuterRef('pk'), name__icontains=value.strip())
+        return queryset.filter(Exists(programs))
+
+
 '''
 Custom mixin class to be used in CourseListView.
 Applied various query parameters for filtering, ordering, and searching.
@@ -93,23 +231,9 @@ class CourseQueryParamsMixin:
         CustomYearSearch,
         CustomLevelMultipleFilter,
         PrefixMultipleFilter,
+        SemesterFilter,
+        FreeSlotFilter,
     ]
-    filterset_fields = {
-        'code': ['icontains'],
-        'name': ['icontains'],
-        'academic_units': ['lte', 'gte'],
-        'prerequisite': ['icontains'],
-        'mutually_exclusive': ['icontains'],
-        'not_available': ['icontains'],
-        'not_available_all': ['icontains'],
-        'offered_as_ue': ['exact'],
-        'offered_as_bde': ['exact'],
-        'grade_type': ['icontains'],
-        'not_offered_as_core_to': ['icontains'],
-        'not_offered_as_pe_to': ['icontains'],
-        'not_offered_as_bde_ue_to': ['icontains'],
-        'department_maintaining': ['icontains'],
-        'program_list': ['icontains'],
-    }
+    filterset_class = CourseFilterSet
     ordering_fields = ['code', 'name', 'academic_units',]
     pagination_class = CustomPagination
@@ -1,14 +1,27 @@
+from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from operator import attrgetter
 
+from apps.courses.schedules import CLASS_TYPE_CHOICES, DAYS
 from apps.courses.validations import (
     validate_index,
     validate_exam_schedule,
     validate_information,
+    validate_semester_code,
     validate_weekly_schedule,
 )
 
 
+INFORMATION_KEYS = ('type', 'group', 'day', 'time', 'venue', 'remark')
+
+'''
+Parse information groups stored as text, see `common_information` in Course model.
+'''
+def parse_information(information: str):
+    return [dict(zip(INFORMATION_KEYS, info.split('^'))) for info in information.split(';')] if information else []
+
+
 class CoursePrefix(models.Model):
     '''
     Store unique course code prefixes, e.g. 'MH', 'SC', 'E', 'AAA', etc.
@@ -24,6 +37,73 @@ class CoursePrefix(models.Model):
         return f'<{self.prefix}>'
 
 
+class Semester(models.Model):
+    '''
+    An academic semester that courses are scraped for.
+
+    `code` is the academic year and semester joined by '_', e.g. '2024_1', '2024_2'.
+    It is the `acadsem` value used by the NTU website, and the value of the `semester` query parameter of the API.
+    `year` is the academic year, e.g. 2024 for AY2024/25.
+    `semester` is the semester within the academic year, e.g. '1', '2', or 'S' / 'T' for special terms.
+    `is_current` marks the semester served by default when no `semester` query parameter is given.
+    It follows the `CURRENT_SEMESTER` setting: the semester of that code is marked as current when it is scraped.
+    If no semester is marked as current, the `CURRENT_SEMESTER` semester, or else the latest semester, is served by default.
+    '''
+    code = models.CharField(max_length=10, unique=True)
+    year = models.IntegerField()
+    semester = models.CharField(max_length=2)
+    is_current = models.BooleanField(default=False)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Semesters'
+        ordering = ['year', 'semester']
+
+    def __str__(self):
+        return f'<Semester {self.code}>'
+
+    def save(self, *args, **kwargs):
+        # only one semester can be the current semester
+        if self.is_current:
+            Semester.objects.filter(is_current=True).exclude(pk=self.pk).update(is_current=False)
+        super().save(*args, **kwargs)
+
+    '''
+    Get the semester with the given code, e.g. '2024_1', creating it if it does not exist.
+    The semester of the `CURRENT_SEMESTER` setting is marked as the current semester.
+    Raises ValidationError if the code is not a semester code.
+    '''
+    @classmethod
+    def get_or_create_from_code(cls, code: str) -> 'Semester':
+        validate_semester_code(code)
+        year, semester = code.split('_')
+        is_current = code == settings.CURRENT_SEMESTER
+        instance, _ = cls.objects.get_or_create(
+            code=code,
+            defaults={'year': int(year), 'semester': semester, 'is_current': is_current},
+        )
+        if is_current and not instance.is_current:
+            instance.is_current = True
+            instance.save()
+        return instance
+
+    @classmethod
+    def get_current(cls) -> 'Semester':
+        return (
+            cls.objects.filter(is_current=True).first()
+            or cls.objects.filter(code=settings.CURRENT_SEMESTER).first()
+            or cls.objects.last()
+        )
+
+    @classmethod
+    async def aget_current(cls) -> 'Semester':
+        return (
+            await cls.objects.filter(is_current=True).afirst()
+            or await cls.objects.filter(code=settings.CURRENT_SEMESTER).afirst()
+            or await cls.objects.alast()
+        )
+
+
 class Course(models.Model):
     '''
     General information about a course.
@@ -100,24 +180,39 @@ class Course(models.Model):
     '''
     common_information = models.TextField(null=True, blank=True, validators=[validate_information])
 
+    '''
+    `prerequisites_tree` is the `prerequisite` text compiled into its minimal disjunctive normal form,
+    e.g. {"or": [{"and": ["MH1200", "MH2500"]}, {"and": ["MH1201"]}]}, empty if there is no checkable prerequisite.
+    It is compiled by the course detail scraper, see `apps/courses/prerequisites.py`.
+    '''
     prerequisites_tree = models.JSONField(null=True, blank=True)
 
+    '''
+    Semesters in which the course is offered, see CourseOffering.
+    Indexes and schedules are scoped by semester, so multiple semesters can coexist.
+    `exam_schedule`, `common_schedule` and `common_information` above are those of the semester
+    the course was last scraped for, stored in `scraped_for` as the semester code, e.g. '2024_1'.
+    '''
+    semesters = models.ManyToManyField(Semester, through='CourseOffering', related_name='courses', blank=True)
     scraped_for = models.CharField(max_length=100, null=True, blank=True)
 
+    '''
+    Hash of the raw course detail page, used by the scrapers for change detection,
+    see `apps/scraper/utils/change_detection.py`. Like the details, it is that of the semester scraped last.
+    The details are only written to the database when the newly scraped hash differs from the stored one.
+    '''
+    detail_hash = models.CharField(max_length=64, null=True, blank=True)
+
+    '''
+    Served from the class rows common to all indexes of the course (prefetched for the requested semester,
+    see CourseDetailView) without parsing `common_information`, which is only parsed for courses without class rows.
+    '''
     @property
     def get_common_information(self):
-        def serialize_info(info):
-            single_infos = info.split('^')
-            return {
-                'type': single_infos[0],
-                'group': single_infos[1],
-                'day': single_infos[2],
-                'time': single_infos[3],
-                'venue': single_infos[4],
-                'remark': single_infos[5],
-            }
-        return [serialize_info(info_group) for info_group in self.common_information.split(';')] if \
-            self.common_information else []
+        schedules = sorted(self.common_schedules.all(), key=attrgetter('id'))
+        if schedules:
+            return [schedule.information for schedule in schedules]
+        return parse_information(self.common_information)
     
     @property
     def get_exam_schedule(self):
@@ -129,8 +224,23 @@ class Course(models.Model):
             'timecode': self.exam_schedule[21:],
         }
 
+    '''
+    Indexes of the filters of the course list (see `CourseQueryParamsMixin`), which is always ordered by code:
+    the filtered column is followed by `code`, so that matching rows are read in order without sorting.
+    Courses are offered as UE / BDE by default, so only the courses that are not are indexed.
+    On SQLite, `course_prefix_code` also serves the distinct prefixes of PrefixListView without reading the rows,
+    PostgreSQL may rather scan the course table, which is small.
+    On PostgreSQL, trigram indexes of `code` and `name` serve `icontains` searches, see migration 0020.
+    '''
     class Meta:
         verbose_name_plural = 'Courses'
+        indexes = [
+            models.Index(fields=['level', 'code'], name='course_level_code'),
+            models.Index(fields=['prefix', 'code'], name='course_prefix_code'),
+            models.Index(fields=['academic_units', 'code'], name='course_au_code'),
+            models.Index(fields=['code'], condition=models.Q(offered_as_ue=False), name='course_not_offered_as_ue'),
+            models.Index(fields=['code'], condition=models.Q(offered_as_bde=False), name='course_not_offered_as_bde'),
+        ]
 
     def __str__(self):
         return f'<{self.code}: {self.name}>'
@@ -141,7 +251,8 @@ class CourseIndex(models.Model):
     General information about a course index.
 
     `course` is the course that the index belongs to.
-    `index` is a unique index number, e.g. '70501', '70523', '15104', etc.
+    `semester` is the semester of the index, may be empty for indexes scraped before semesters were introduced.
+    `index` is an index number, e.g. '70501', '70523', '15104', etc., unique within a semester.
     `information` stores the information about the index, in the following format:
     type^group^day^time^venue^remark;type^group^day^time^venue^remark;...
     Example: LEC^1^MON^08:30-10:30^LT1^;TUT^1^WED^08:30-10:30^TR1^
@@ -149,7 +260,8 @@ class CourseIndex(models.Model):
     (S)(S)(S)(S)(S)(S), refer to `common_schedule` in Course model for more details.
     '''
     course_code = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='indexes', to_field='code')
-    index = models.CharField(max_length=5, unique=True, validators=[validate_index], primary_key=True)
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='indexes', null=True, blank=True)
+    index = models.CharField(max_length=5, validators=[validate_index])
     # schedule = models.CharField(max_length=192)
     
     '''
@@ -157,31 +269,37 @@ class CourseIndex(models.Model):
     '''
     filtered_information = models.TextField(null=True, blank=True, validators=[validate_information])
     
-    def serialize_info(self, info):
-        single_infos = info.split('^')
-        return {
-            'type': single_infos[0],
-            'group': single_infos[1],
-            'day': single_infos[2],
-            'time': single_infos[3],
-            'venue': single_infos[4],
-            'remark': single_infos[5],
-        }
-    
+    # served from the class rows of the index, see `get_common_information`
     @property
     def get_filtered_information(self):
-        return [self.serialize_info(info_group) for info_group in self.filtered_information.split(';')] if \
-            self.filtered_information else []
+        schedules = sorted(self.schedules.all(), key=attrgetter('id'))
+        if schedules:
+            return [schedule.information for schedule in schedules]
+        return parse_information(self.filtered_information)
 
     class Meta:
         verbose_name_plural = 'Course Indexes'
+        constraints = [
+            models.UniqueConstraint(fields=['semester', 'index'], name='unique_index_per_semester'),
+        ]
 
     def __str__(self):
         return f'<Index {self.index} for course {self.course_code}>'
 
 
 class CourseSchedule(models.Model):
-    index = models.ForeignKey(CourseIndex, on_delete=models.CASCADE, related_name='schedules', to_field='index', null=True)
+    '''
+    A single class of an index (`index`), or a class common to all indexes of a course (`common_schedule_for_course`).
+    `semester` is the semester of the class, may be empty for classes scraped before semesters were introduced.
+
+    The scraped `type`, `day` and `time` strings are also stored parsed by the course scraper, so that they are
+    queried and converted to bitmasks without parsing (see `apps/courses/schedules.py`):
+    `weekday` is the index of the day in DAYS (0 for Monday), `start_slot` and `end_slot` the half-hour slots
+    of the day (0 for 8am, end exclusive), all empty for classes without a scheduled time,
+    and `class_type` the type of the class, e.g. 'LEC' for 'LEC/STUDIO'.
+    '''
+    index = models.ForeignKey(CourseIndex, on_delete=models.CASCADE, related_name='schedules', null=True)
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='schedules', null=True, blank=True)
     type = models.CharField(max_length=200)
     group = models.CharField(max_length=200)
     day = models.CharField(max_length=200)
@@ -190,6 +308,69 @@ class CourseSchedule(models.Model):
     remark = models.CharField(max_length=200)
     schedule = models.CharField(max_length=200)
     common_schedule_for_course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='common_schedules', to_field='code', null=True)
+    weekday = models.SmallIntegerField(choices=list(enumerate(DAYS)), null=True, blank=True)
+    start_slot = models.SmallIntegerField(null=True, blank=True)
+    end_slot = models.SmallIntegerField(null=True, blank=True)
+    class_type = models.CharField(max_length=3, choices=CLASS_TYPE_CHOICES, default='OTH')
+
+    # schedules are read per index (an index belongs to a single semester, so the index of the `index` foreign key
+    # is enough) / course of a semester, see CourseDetailView,
+    # and the classes of a semester held during a time range by `schedule_semester_time`
+    class Meta:
+        indexes = [
+            models.Index(fields=['common_schedule_for_course', 'semester'], name='schedule_course_semester'),
+            models.Index(fields=['semester', 'weekday', 'start_slot', 'end_slot'], name='schedule_semester_time'),
+        ]
+
+    @property
+    def information(self):
+        return {key: getattr(self, key) for key in INFORMATION_KEYS}
+
+
+class VenueOccupancy(models.Model):
+    '''
+    Weekly occupancy of a venue in a semester, the union of the schedules of all classes held there
+    (see `common_schedule` in Course model for the format), one row per venue and semester.
+    Rebuilt from the CourseSchedule rows of the semester after every course scraping,
+    see `apps/scraper/utils/venue_compiler.py`.
+    '''
+    venue = models.CharField(max_length=200)
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='venues')
+    schedule = models.CharField(max_length=192, validators=[validate_weekly_schedule])
+    classes = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Venue Occupancies'
+        constraints = [
+            models.UniqueConstraint(fields=['semester', 'venue'], name='unique_venue_per_semester'),
+        ]
+
+    def __str__(self):
+        return f'<Venue {self.venue} in {self.semester}>'
+
+
+class CourseOffering(models.Model):
+    '''
+    Through model of the many-to-many relationship between Course and Semester,
+    stating that the course is offered in the semester.
+
+    `content_hash` is the hash of the processed course listing data (name, AU, schedules, indexes) for the semester,
+    used by the course scraper for change detection, see `apps/scraper/utils/change_detection.py`.
+    The course is only written to the database when the newly scraped hash differs from the stored one.
+    '''
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, to_field='code')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Course Offerings'
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'semester'], name='unique_course_offering'),
+        ]
+
+    def __str__(self):
+        return f'<Course {self.course_id} offered in {self.semester}>'
 
 
 class CourseProgram(models.Model):
@@ -204,20 +385,78 @@ class CourseProgram(models.Model):
     `value` is based on the value attribute in the HTML option tag of the html, e.g. 'ACC;GA;1;F'.
     `last_updated` is the last date and time the CourseProgram instance was updated.
     `year` is the year of the program, derived from the value attribute, may be empty if not applicable (such as minor programs).
+    `content_hash` is the hash of the raw program course listing page and of the course codes stored when it was saved,
+    used by the scraper for change detection. Like `courses`, it is that of the semester scraped last.
     '''
     name = models.CharField(max_length=300, unique=True)
     value = models.CharField(max_length=300, unique=True)
     last_updated = models.DateTimeField(auto_now=True)
     courses = models.ManyToManyField(Course, related_name='programs')
     year = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)], null=True, blank=True)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
         verbose_name_plural = 'Course Programs'
+        indexes = [
+            models.Index(fields=['year'], name='courseprogram_year'),
+        ]
 
     def __str__(self):
         return f'<CourseProgram #{self.id}: {self.name}>'
 
 
+class CourseExclusion(models.Model):
+    '''
+    Course codes parsed from the `mutually_exclusive` text of a course, one row per excluded course.
+    `excluded_code` is not a foreign key, as excluded courses are often retired courses that are no longer scraped.
+    Rows are written by the course detail scraper, see `apps/scraper/utils/restriction_compiler.py`.
+    '''
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='exclusions')
+    excluded_code = models.CharField(max_length=10, db_index=True)
+
+    class Meta:
+        verbose_name_plural = 'Course Exclusions'
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'excluded_code'], name='unique_course_exclusion'),
+        ]
+
+    def __str__(self):
+        return f'<Course {self.course_id} mutually exclusive with {self.excluded_code}>'
+
+
+class CourseProgrammeRestriction(models.Model):
+    '''
+    Programme restrictions parsed from the restriction texts of a course, one row per restricted programme,
+    see `apps/courses/restrictions.py` for the text format.
+
+    `kind` is the Course field the restriction was parsed from.
+    `programme` is the restricted programme code in upper case, e.g. 'CSC', 'ENG(EEE)', 'CEE 1', empty for all programmes.
+    `first_year` and `last_year` is the range of admission years restricted, empty when unbounded.
+    Rows are written by the course detail scraper, see `apps/scraper/utils/restriction_compiler.py`.
+    '''
+    KIND_CHOICES = [
+        ('not_available', 'Not available to programme'),
+        ('not_available_all', 'Not available to all programmes'),
+        ('not_offered_as_core_to', 'Not available as core to programme'),
+        ('not_offered_as_pe_to', 'Not available as PE to programme'),
+        ('not_offered_as_bde_ue_to', 'Not available as BDE/UE to programme'),
+    ]
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='programme_restrictions')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    programme = models.CharField(max_length=50, null=True, blank=True)
+    first_year = models.IntegerField(null=True, blank=True)
+    last_year = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'Course Programme Restrictions'
+        indexes = [
+            models.Index(fields=['kind', 'programme'], name='restriction_kind_programme'),
+        ]
+
+    def __str__(self):
+        return f'<{self.get_kind_display()} {self.programme or "(all)"} for course {self.course_id}>'
+
+
 class CoursePrerequisite(models.Model):
     '''
     Stores the prerequisite requirements for a given course.
@@ -228,6 +467,8 @@ class CoursePrerequisite(models.Model):
     Example:
     - "MH1810"
     - {"or": [{"and": ["MH1200", "MH1811"]}, {"and": ["MH1100", {"and": ["MH1810", "MH1300"]}]}]}
+    The course detail scraper stores the compiled prerequisite in its minimal conjunctive normal form,
+    where at least one course of every clause is required, e.g. {"and": [{"or": ["MH1200", "MH1201"]}, {"or": ["MH2500"]}]}.
     '''
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     child_nodes = models.JSONField()
@@ -0,0 +1,220 @@
+'''
+Multi-semester degree planner.
+
+Given target courses, completed courses and per-semester AU limits, produce a semester-by-semester plan in which
+every course is taken after its prerequisites, in a semester it is offered in, without exceeding the AU limit.
+
+1. Requirement closure: for every target course, one DNF term of its prerequisite (see `apps/courses/prerequisites.py`)
+   is chosen, preferring the term that needs the fewest courses not already completed or required,
+   and the courses of that term are required too, recursively.
+2. Layered list scheduling: semester by semester, the courses whose required prerequisites are all taken in earlier
+   semesters and that are offered in that semester are added by priority (longest chain of required courses
+   depending on them first, then larger AU), as long as they fit in the AU limit.
+Both steps are linear in the number of required courses and their prerequisites, so that plans of 40+ courses
+are produced in milliseconds.
+'''
+
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from apps.common.cache import get_data_version
+from apps.courses.models import Course, CourseOffering
+from apps.courses.prerequisites import tree_to_dnf
+
+
+@dataclass
+class PlannerCourse:
+    code: str
+    academic_units: int
+    prerequisite_terms: Tuple[FrozenSet[str], ...] = ()
+    # semesters within the academic year the course is offered in, e.g. {'1', '2'}, empty if unknown (always offered)
+    offered_in: FrozenSet[str] = frozenset()
+
+
+@dataclass
+class DegreePlan:
+    semesters: List[Dict] = field(default_factory=list)
+    unscheduled: List[str] = field(default_factory=list)
+    unresolved: List[str] = field(default_factory=list)
+
+
+'''
+Return the semester code following `code` within regular semesters, e.g. '2024_1' -> '2024_2' -> '2025_1'.
+'''
+def next_semester_code(code: str) -> str:
+    year, semester = code.split('_')
+    return f'{year}_2' if semester == '1' else f'{int(year) + 1}_1'
+
+
+class DegreePlanner:
+    '''
+    Built from a dict of course code to PlannerCourse of all courses, see `load_planner_courses`.
+    '''
+    def __init__(self, courses: Dict[str, PlannerCourse]):
+        self.courses = courses
+
+    '''
+    Return (required prerequisites of every required course, courses that cannot be planned), where required courses
+    are the targets and the prerequisites chosen for them, excluding completed courses.
+    Courses that do not exist, and courses whose every prerequisite term needs such a course, cannot be planned.
+    '''
+    def resolve_requirements(
+        self,
+        targets: Iterable[str],
+        completed: Set[str],
+    ) -> Tuple[Dict[str, Set[str]], List[str]]:
+        requirements: Dict[str, Set[str]] = {}
+        unresolved = []
+        queue = deque(code for code in dict.fromkeys(targets) if code not in completed)
+        queued = set(queue)
+        while queue:
+            code = queue.popleft()
+            course = self.courses.get(code)
+            if course is None:
+                unresolved.append(code)
+                continue
+            terms = [term for term in course.prerequisite_terms if all(prerequisite in self.courses or prerequisite in completed for prerequisite in term)]
+            if course.prerequisite_terms and not terms:
+                unresolved.append(code)
+                continue
+            chosen = min(
+                terms,
+                key=lambda term: (len(term - completed - queued), len(term), sorted(term)),
+                default=frozenset(),
+            )
+            requirements[code] = set(chosen - completed)
+            for prerequisite in sorted(chosen - completed - queued):
+                queued.add(prerequisite)
+                queue.append(prerequisite)
+
+        # drop the courses depending on an unplannable course
+        blocked = set(unresolved)
+        changed = True
+        while changed:
+            changed = False
+            for code, prerequisites in list(requirements.items()):
+                if prerequisites & blocked:
+                    del requirements[code]
+                    blocked.add(code)
+                    unresolved.append(code)
+                    changed = True
+        return requirements, unresolved
+
+    '''
+    Length of the longest chain of required courses starting at every required course, used as scheduling priority.
+    '''
+    def chain_lengths(self, requirements: Dict[str, Set[str]]) -> Dict[str, int]:
+        dependents = {code: [] for code in requirements}
+        for code, prerequisites in requirements.items():
+            for prerequisite in prerequisites:
+                dependents[prerequisite].append(code)
+        lengths: Dict[str, int] = {}
+        def get_length(code: str, visiting: Set[str]) -> int:
+            if code not in lengths:
+                visiting.add(code)
+                lengths[code] = 1 + max(
+                    (get_length(dependent, visiting) for dependent in dependents[code] if dependent not in visiting),
+                    default=0,
+                )
+                visiting.discard(code)
+            return lengths[code]
+        for code in requirements:
+            get_length(code, set())
+        return lengths
+
+    '''
+    Plan the targets over the semesters starting at `start_semester` (e.g. '2024_1'), one per AU limit.
+    Returns a DegreePlan with the courses of every semester, the required courses that did not fit in the
+    semesters given (`unscheduled`), and the courses that cannot be planned (`unresolved`).
+    '''
+    def plan(
+        self,
+        targets: Iterable[str],
+        au_limits: List[int],
+        start_semester: str,
+        completed: Iterable[str]=(),
+    ) -> DegreePlan:
+        completed = set(completed)
+        requirements, unresolved = self.resolve_requirements(targets, completed)
+        lengths = self.chain_lengths(requirements)
+        priority = lambda code: (-lengths[code], -self.courses[code].academic_units, code)
+
+        plan = DegreePlan(unresolved=sorted(set(unresolved)))
+        taken = set(completed)
+        remaining = set(requirements)
+        semester_code = start_semester
+        for au_limit in au_limits:
+            semester = semester_code.split('_')[1]
+            available = sorted(
+                (
+                    code for code in remaining
+                    if requirements[code] <= taken
+                    and (not self.courses[code].offered_in or semester in self.courses[code].offered_in)
+                ),
+                key=priority,
+            )
+            planned, academic_units = [], 0
+            for code in available:
+                if academic_units + self.courses[code].academic_units <= au_limit:
+                    planned.append(code)
+                    academic_units += self.courses[code].academic_units
+            plan.semesters.append({'semester': semester_code, 'courses': planned, 'academic_units': academic_units})
+            taken.update(planned)
+            remaining.difference_update(planned)
+            semester_code = next_semester_code(semester_code)
+        plan.unscheduled = sorted(remaining, key=priority)
+        return plan
+
+
+'''
+Return a dict of course code to PlannerCourse of all courses, given the course rows (`code`, `academic_units`,
+`prerequisites_tree`) and (course code, academic year, semester within the academic year) triples of CourseOffering.
+The semesters a course is offered in are only known from academic years whose two regular semesters were both scraped:
+a course missing from the only scraped semester of a year may well be offered in the other one,
+so courses are considered offered in every semester (`offered_in` empty) until then.
+'''
+def load_planner_courses(
+    rows: Iterable[Dict],
+    offerings: Iterable[Tuple[str, int, str]]=(),
+) -> Dict[str, PlannerCourse]:
+    offerings = list(offerings)
+    scraped: Dict[int, Set[str]] = {}
+    for _, year, semester in offerings:
+        scraped.setdefault(year, set()).add(semester)
+    complete_years = {year for year, semesters in scraped.items() if {'1', '2'} <= semesters}
+    offered_in: Dict[str, Set[str]] = {}
+    for code, year, semester in offerings:
+        if year in complete_years and semester in ('1', '2'):
+            offered_in.setdefault(code, set()).add(semester)
+    return {
+        row['code']: PlannerCourse(
+            code=row['code'],
+            academic_units=row['academic_units'],
+            prerequisite_terms=tuple(tree_to_dnf(row['prerequisites_tree']) or ()),
+            offered_in=frozenset(offered_in.get(row['code'], ())),
+        )
+        for row in rows
+    }
+
+
+_planner: Optional[DegreePlanner] = None
+_planner_version: Optional[int] = None
+_planner_lock = Lock()
+
+'''
+Return the degree planner, loaded once per process and reloaded only when the data version changed
+(see `apps/common/cache.py`), i.e. after a scraper run, a compile command or an admin edit.
+'''
+def get_degree_planner() -> DegreePlanner:
+    global _planner, _planner_version
+    version = get_data_version()
+    with _planner_lock:
+        if _planner is None or _planner_version != version:
+            _planner = DegreePlanner(load_planner_courses(
+                Course.objects.values('code', 'academic_units', 'prerequisites_tree'),
+                CourseOffering.objects.values_list('course_id', 'semester__year', 'semester__semester'),
+            ))
+            _planner_version = version
+        return _planner
@@ -0,0 +1,185 @@
+'''
+In-memory prerequisite graph of all courses, for transitive prerequisite queries.
+
+There is an edge from course A to course B when A appears in the compiled prerequisite of B
+(`CoursePrerequisite.child_nodes`, see `apps/courses/prerequisites.py`), i.e. A can lead to B.
+The graph is loaded once into adjacency lists of integer node ids, and the topological order and the transitive
+ancestors / descendants of every course are precomputed as Python int bitsets (bit `i` set for node id `i`),
+so that answering a query is a lookup and a conversion of a bitset to course codes, without any database query.
+'''
+
+from collections import deque
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+import heapq
+
+from apps.common.cache import get_data_version
+from apps.courses.models import Course, CoursePrerequisite
+from apps.courses.prerequisites import tree_to_dnf
+
+
+class PrerequisiteGraphEngine:
+    '''
+    Built from an iterable of (course code, prerequisite codes) pairs, and the codes of courses without prerequisite.
+    `codes[i]` is the course code of node id `i`, `ids` maps course codes back to node ids.
+    `predecessors[i]` / `successors[i]` are the node ids of the direct prerequisites of / courses unlocked by node `i`.
+    `order` is a topological order of the node ids; courses in a prerequisite cycle (scraped data is not guaranteed
+    to be acyclic) are placed after all other courses, and are their own ancestor and descendant.
+    `ancestors[i]` / `descendants[i]` are the bitsets of all transitive prerequisites of / courses unlocked by node `i`.
+    '''
+    def __init__(self, edges: Iterable[Tuple[str, Iterable[str]]], codes: Iterable[str]=()):
+        self.codes: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.predecessors: List[List[int]] = []
+        self.successors: List[List[int]] = []
+        for code in codes:
+            self._get_id(code)
+        for code, prerequisite_codes in edges:
+            node = self._get_id(code)
+            for prerequisite_code in sorted(set(prerequisite_codes)):
+                prerequisite = self._get_id(prerequisite_code)
+                if prerequisite != node:
+                    self.predecessors[node].append(prerequisite)
+                    self.successors[prerequisite].append(node)
+        self.order = self._topological_order()
+        self.position = [0] * len(self.codes)
+        for position, node in enumerate(self.order):
+            self.position[node] = position
+        self.ancestors = self._closure(self.order, self.predecessors)
+        self.descendants = self._closure(self.order[::-1], self.successors)
+
+    def _get_id(self, code: str) -> int:
+        if code not in self.ids:
+            self.ids[code] = len(self.codes)
+            self.codes.append(code)
+            self.predecessors.append([])
+            self.successors.append([])
+        return self.ids[code]
+
+    # Kahn's algorithm, taking available courses by code so that the order is deterministic,
+    # nodes left with unvisited predecessors are part of (or behind) a cycle
+    def _topological_order(self) -> List[int]:
+        in_degrees = [len(predecessors) for predecessors in self.predecessors]
+        heap = [(self.codes[node], node) for node, in_degree in enumerate(in_degrees) if in_degree == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            _, node = heapq.heappop(heap)
+            order.append(node)
+            for successor in self.successors[node]:
+                in_degrees[successor] -= 1
+                if in_degrees[successor] == 0:
+                    heapq.heappush(heap, (self.codes[successor], successor))
+        visited = set(order)
+        order.extend(node for node in range(len(self.codes)) if node not in visited)
+        return order
+
+    # bitset of every node reachable through `neighbours`, computed once per node in dependency order,
+    # then repeated until stable for the nodes in a cycle
+    def _closure(self, order: List[int], neighbours: List[List[int]]) -> List[int]:
+        closure = [0] * len(self.codes)
+        changed = True
+        while changed:
+            changed = False
+            for node in order:
+                mask = closure[node]
+                for neighbour in neighbours[node]:
+                    mask |= closure[neighbour] | (1 << neighbour)
+                if mask != closure[node]:
+                    closure[node] = mask
+                    changed = True
+        return closure
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.ids
+
+    '''
+    Convert a bitset of node ids into course codes, in topological order.
+    '''
+    def to_codes(self, mask: int) -> List[str]:
+        nodes = []
+        while mask:
+            lowest_bit = mask & -mask
+            nodes.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return [self.codes[node] for node in sorted(nodes, key=self.position.__getitem__)]
+
+    def direct_prerequisites(self, code: str) -> List[str]:
+        return [self.codes[node] for node in self.predecessors[self.ids[code]]]
+
+    def direct_unlocks(self, code: str) -> List[str]:
+        return [self.codes[node] for node in self.successors[self.ids[code]]]
+
+    '''
+    All courses that have `code` anywhere in their prerequisite chain.
+    '''
+    def unlocks(self, code: str) -> List[str]:
+        node = self.ids[code]
+        return self.to_codes(self.descendants[node] & ~(1 << node))
+
+    '''
+    All courses anywhere in the prerequisite chain of `code`, in the order they can be taken.
+    '''
+    def prerequisite_chain(self, code: str) -> List[str]:
+        node = self.ids[code]
+        return self.to_codes(self.ancestors[node] & ~(1 << node))
+
+    '''
+    Shortest sequence of courses from `source` to `target` (both included) following prerequisite edges.
+    Without `source`, start from the closest course without prerequisite.
+    Returns None if `target` cannot be reached from `source`.
+    '''
+    def shortest_path(self, target: str, source: Optional[str]=None) -> Optional[List[str]]:
+        target_node = self.ids[target]
+        if source is not None:
+            source_node = self.ids[source]
+            if source_node != target_node and not (self.ancestors[target_node] >> source_node) & 1:
+                return None
+            is_start = lambda node: node == source_node
+        else:
+            is_start = lambda node: not self.predecessors[node]
+
+        # breadth first search backwards from the target, restricted to its ancestors
+        parents = {target_node: None}
+        queue = deque([target_node])
+        while queue:
+            node = queue.popleft()
+            if is_start(node):
+                path = []
+                while node is not None:
+                    path.append(self.codes[node])
+                    node = parents[node]
+                return path
+            for predecessor in self.predecessors[node]:
+                if predecessor not in parents:
+                    parents[predecessor] = node
+                    queue.append(predecessor)
+        return None
+
+
+_graph: Optional[PrerequisiteGraphEngine] = None
+_graph_version: Optional[int] = None
+_graph_lock = Lock()
+
+'''
+Load the prerequisite graph of all courses from the database.
+'''
+def load_prerequisite_graph() -> PrerequisiteGraphEngine:
+    edges = []
+    for code, child_nodes in CoursePrerequisite.objects.values_list('course_id', 'child_nodes'):
+        dnf = tree_to_dnf(child_nodes)
+        if dnf:
+            edges.append((code, set().union(*dnf)))
+    return PrerequisiteGraphEngine(edges, Course.objects.order_by('code').values_list('code', flat=True))
+
+'''
+Return the prerequisite graph, loaded once per process and reloaded only when the data version changed
+(see `apps/common/cache.py`), i.e. after a scraper run, a compile command or an admin edit.
+'''
+def get_prerequisite_graph() -> PrerequisiteGraphEngine:
+    global _graph, _graph_version
+    version = get_data_version()
+    with _graph_lock:
+        if _graph is None or _graph_version != version:
+            _graph, _graph_version = load_prerequisite_graph(), version
+        return _graph
@@ -0,0 +1,198 @@
+'''
+Compiler of the scraped prerequisite text (`prerequisite` in Course model) into prerequisite trees.
+
+Prerequisite text looks like 'MH1200 & MH2500 OR MH1201', '(SC1003 OR CZ1103) & MH1810' or 'SC2002(Corequisite)'.
+`&` / `AND` bind tighter than `OR`, and parentheses group sub-expressions.
+Words that are not course codes (e.g. 'A or H2 Level Mathematics') and corequisites cannot be checked,
+they are operands always satisfied: 'MH1100 OR A Level Maths' has no checkable prerequisite, as an alternative
+to MH1100 may have been met, while 'MH1810 & A Level Physics' requires MH1810.
+Operators left dangling (e.g. 'MH1200 OR') are ignored.
+
+A parsed prerequisite is normalised to its minimal disjunctive normal form (DNF),
+a frozenset of terms where every term is a frozenset of course codes that are all required,
+e.g. frozenset({frozenset({'MH1200', 'MH2500'}), frozenset({'MH1201'})}).
+Terms are minimised by absorption: a term that is a superset of another term is redundant.
+`None` means that there is no checkable prerequisite.
+
+Trees are stored as JSON:
+- DNF: {"or": [{"and": ["MH1200", "MH2500"]}, {"and": ["MH1201"]}]}
+- CNF: {"and": [{"or": ["MH1200", "MH1201"]}, {"or": ["MH1201", "MH2500"]}]}
+'''
+
+from functools import lru_cache, reduce
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import re
+
+
+Term = FrozenSet[str]
+NormalForm = FrozenSet[Term]
+
+# course codes, e.g. 'MH1100', 'E3102L', excluding academic years such as 'AY2017'
+COURSE_CODE_PATTERN = r'\b(?!AY\d)[A-Z]{1,3}\d{4}[A-Z]?\b'
+_TOKEN_REGEX = re.compile(
+    rf'(?P<code>{COURSE_CODE_PATTERN})(?P<corequisite>\s*\(\s*Corequisite\s*\))?'
+    r'|(?P<and>&|\bAND\b)'
+    r'|(?P<or>\bOR\b)'
+    r'|(?P<open>\()'
+    r'|(?P<close>\))',
+    re.IGNORECASE,
+)
+_WORD_REGEX = re.compile(r'\w')
+AND, OR, OPEN, CLOSE = 'AND', 'OR', '(', ')'
+UNCHECKABLE = ''
+
+
+'''
+Split prerequisite text into course codes and the tokens AND, OR, ( and ).
+Corequisites and the words between two tokens are replaced by UNCHECKABLE.
+'''
+def tokenize(text: str) -> Tuple[str, ...]:
+    tokens = []
+    end = 0
+    for match in _TOKEN_REGEX.finditer(text):
+        if _WORD_REGEX.search(text, end, match.start()):
+            tokens.append(UNCHECKABLE)
+        end = match.end()
+        if match.group('code'):
+            tokens.append(UNCHECKABLE if match.group('corequisite') else match.group('code').upper())
+        elif match.group('and'):
+            tokens.append(AND)
+        elif match.group('or'):
+            tokens.append(OR)
+        else:
+            tokens.append(match.group())
+    if _WORD_REGEX.search(text, end):
+        tokens.append(UNCHECKABLE)
+    return tuple(tokens)
+
+'''
+Remove duplicated terms and terms that are a superset of another term (absorption).
+'''
+def minimize(terms: FrozenSet[Term]) -> NormalForm:
+    kept = []
+    for term in sorted(terms, key=len):
+        if not any(other <= term for other in kept):
+            kept.append(term)
+    return frozenset(kept)
+
+'''
+Disjunction and conjunction of two DNFs, where None is a missing operand.
+Both are memoised, so that sub-expressions repeated across courses are only expanded once.
+'''
+@lru_cache(maxsize=None)
+def or_dnf(left: Optional[NormalForm], right: Optional[NormalForm]) -> Optional[NormalForm]:
+    if left is None or right is None:
+        return left if right is None else right
+    return minimize(left | right)
+
+@lru_cache(maxsize=None)
+def and_dnf(left: Optional[NormalForm], right: Optional[NormalForm]) -> Optional[NormalForm]:
+    if left is None or right is None:
+        return left if right is None else right
+    return minimize(frozenset(left_term | right_term for left_term in left for right_term in right))
+
+class _Parser:
+    '''
+    Lenient recursive descent parser over the tokens of `tokenize`, building the DNF bottom-up:
+    expression := conjunction (OR conjunction)*
+    conjunction := operand (AND? operand)*
+    operand := course code | UNCHECKABLE | ( expression )
+    UNCHECKABLE is the DNF of a single empty term, always satisfied.
+    Missing operands, dangling operators and unbalanced parentheses are skipped.
+    '''
+    def __init__(self, tokens: Tuple[str, ...]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def parse(self) -> Optional[NormalForm]:
+        result = self.parse_expression()
+        while self.peek() is not None: # stray closing parentheses
+            self.position += 1
+            result = or_dnf(result, self.parse_expression())
+        return result
+
+    def parse_expression(self) -> Optional[NormalForm]:
+        result = self.parse_conjunction()
+        while self.peek() == OR:
+            self.position += 1
+            result = or_dnf(result, self.parse_conjunction())
+        return result
+
+    def parse_conjunction(self) -> Optional[NormalForm]:
+        result = None
+        while self.peek() not in (None, OR, CLOSE):
+            token = self.tokens[self.position]
+            self.position += 1
+            if token == OPEN:
+                operand = self.parse_expression()
+                if self.peek() == CLOSE:
+                    self.position += 1
+            elif token == AND:
+                continue
+            elif token == UNCHECKABLE:
+                operand = frozenset({frozenset()})
+            else:
+                operand = frozenset({frozenset({token})})
+            result = and_dnf(result, operand)
+        return result
+
+'''
+Parse prerequisite text into its minimal DNF, or None if it has no checkable prerequisite.
+Memoised on the text, as many courses share the same prerequisite text.
+'''
+@lru_cache(maxsize=None)
+def parse_prerequisite(text: Optional[str]) -> Optional[NormalForm]:
+    if not text:
+        return None
+    dnf = _Parser(tokenize(text)).parse()
+    if not dnf or frozenset() in dnf:
+        return None
+    return dnf
+
+def sort_terms(terms: NormalForm) -> List[List[str]]:
+    return sorted((sorted(term) for term in terms), key=lambda term: (len(term), term))
+
+'''
+Convert a DNF into its minimal CNF, a frozenset of clauses where at least one course of every clause is required.
+'''
+def dnf_to_cnf(dnf: NormalForm) -> NormalForm:
+    return reduce(
+        lambda cnf, term: minimize(frozenset(clause | {code} for clause in cnf for code in term)),
+        sort_terms(dnf),
+        frozenset({frozenset()}),
+    )
+
+def dnf_to_tree(dnf: Optional[NormalForm]) -> Optional[Dict]:
+    if dnf is None:
+        return None
+    return {'or': [{'and': term} for term in sort_terms(dnf)]}
+
+def cnf_to_tree(cnf: Optional[NormalForm]) -> Optional[Dict]:
+    if cnf is None:
+        return None
+    return {'and': [{'or': clause} for clause in sort_terms(cnf)]}
+
+'''
+Convert a stored prerequisite tree back into a DNF. Accepts every form of `child_nodes` in CoursePrerequisite model:
+a course code, or nested {"and": [...]} / {"or": [...]} nodes.
+'''
+def tree_to_dnf(tree) -> Optional[NormalForm]:
+    if not tree:
+        return None
+    if isinstance(tree, str):
+        return frozenset({frozenset({tree})})
+    if 'and' in tree:
+        return reduce(and_dnf, (tree_to_dnf(node) for node in tree['and']), None)
+    return reduce(or_dnf, (tree_to_dnf(node) for node in tree['or']), None)
+
+'''
+Compile prerequisite text into its (DNF tree, CNF tree), both None if it has no checkable prerequisite.
+'''
+def compile_prerequisite(text: Optional[str]) -> Tuple[Optional[Dict], Optional[Dict]]:
+    dnf = parse_prerequisite(text)
+    if dnf is None:
+        return None, None
+    return dnf_to_tree(dnf), cnf_to_tree(dnf_to_cnf(dnf))
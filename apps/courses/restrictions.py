@@ -0,0 +1,85 @@
+'''
+Parsers of the free-text exclusion and programme restriction fields of Course model.
+
+- `mutually_exclusive` lists course codes, e.g. 'MH1100, MH1101'.
+- `not_available`, `not_offered_as_core_to`, `not_offered_as_pe_to` and `not_offered_as_bde_ue_to` list programmes,
+  optionally restricted to a range of admission years, e.g. 'ACBS, CE(2018-onwards), CSC(2018-2020), REP(CSC)'.
+- `not_available_all` restricts all programmes for a range of admission years, e.g. '(Admyr 2021-onwards)'.
+
+A programme restriction is a (programme, first admission year, last admission year) tuple,
+where the programme is None for all programmes and the years are None when unbounded.
+'''
+
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+import re
+
+from apps.courses.prerequisites import COURSE_CODE_PATTERN
+
+
+Restriction = Tuple[Optional[str], Optional[int], Optional[int]]
+MAX_PROGRAMME_LENGTH = 50
+
+_COURSE_CODE_REGEX = re.compile(COURSE_CODE_PATTERN, re.IGNORECASE)
+_YEAR_RANGE_REGEX = re.compile(r'\(\s*(?:Admyr\s*)?(\d{4})\s*(?:-\s*(\d{4}|onwards))?\s*\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def parse_course_codes(text: Optional[str]) -> Tuple[str, ...]:
+    if not text:
+        return ()
+    return tuple(sorted({code.upper() for code in _COURSE_CODE_REGEX.findall(text)}))
+
+'''
+Parse a comma separated list of programmes with optional admission year ranges into restrictions.
+'''
+@lru_cache(maxsize=None)
+def parse_programme_restrictions(text: Optional[str]) -> Tuple[Restriction, ...]:
+    if not text:
+        return ()
+    restrictions = []
+    for item in text.split(','):
+        match = _YEAR_RANGE_REGEX.search(item)
+        first_year = last_year = None
+        if match:
+            first_year = int(match.group(1))
+            last_year = None if match.group(2) and match.group(2).lower() == 'onwards' else int(match.group(2) or first_year)
+            item = item[:match.start()] + item[match.end():]
+        programme = item.strip().upper() or None
+        if programme is None and first_year is None:
+            continue
+        if programme is not None and len(programme) > MAX_PROGRAMME_LENGTH: # free text, not a programme code
+            continue
+        restrictions.append((programme, first_year, last_year))
+    return tuple(restrictions)
+
+'''
+Return the codes identifying a CourseProgram in restriction lists, given its `value`: the programme abbreviation
+with its specialisation ('NULL' if none), each also followed by the year of study,
+e.g. 'ACC;GA;1;F' -> ['ACC', 'ACC(GA)', 'ACC 1', 'ACC(GA) 1'], 'CEE;;1;F' -> ['CEE', 'CEE(NULL)', 'CEE 1', 'CEE(NULL) 1'].
+'''
+def get_programme_codes(program_value: str) -> List[str]:
+    parts = program_value.upper().split(';')
+    codes = [parts[0], f'{parts[0]}({parts[1] if len(parts) > 1 and parts[1] else "NULL"})']
+    if len(parts) > 2 and parts[2].isdigit():
+        codes.extend([f'{code} {parts[2]}' for code in codes])
+    return codes
+
+'''
+Whether any of the restrictions applies to a student of one of `programme_codes` admitted in `admission_year`.
+When the admission year is unknown, only the restrictions without year range apply.
+'''
+def restriction_applies(
+    restrictions: Iterable[Restriction],
+    programme_codes: Iterable[str],
+    admission_year: Optional[int],
+) -> bool:
+    programme_codes = set(programme_codes)
+    for programme, first_year, last_year in restrictions:
+        if programme is not None and programme not in programme_codes:
+            continue
+        if first_year is None:
+            return True
+        if admission_year is not None and first_year <= admission_year and (last_year is None or admission_year <= last_year):
+            return True
+    return False
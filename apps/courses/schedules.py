@@ -0,0 +1,139 @@
+'''
+Helpers to convert weekly schedules between their string form and integer bitmasks.
+
+A weekly schedule string (S)(S)(S)(S)(S)(S) (see `common_schedule` in Course model) has 192 characters,
+32 half-hour slots from 8am to 12am for each day from Monday to Saturday.
+The same schedule is represented as a Python int where bit `i` is set if character `i` is 'X',
+so that unions, intersections and clash checks are single integer operations.
+An exam schedule (see `exam_schedule` in Course model) is reduced to its date and the bitmask of its slots on that day.
+A single class is stored parsed (see CourseSchedule model) as its weekday (index in DAYS), start and end slots,
+so that its bitmask is computed without parsing any string, see `slots_to_mask`.
+'''
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+
+DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
+SLOTS_PER_DAY = 32
+WEEK_SLOTS = SLOTS_PER_DAY * len(DAYS)
+FULL_WEEK_MASK = (1 << WEEK_SLOTS) - 1
+FIRST_HOUR = 8
+
+# class types of CourseSchedule, from the first three letters of the scraped type, e.g. 'LEC/STUDIO' -> 'LEC'
+CLASS_TYPE_CHOICES = [
+    ('LEC', 'Lecture'),
+    ('TUT', 'Tutorial'),
+    ('LAB', 'Laboratory'),
+    ('SEM', 'Seminar'),
+    ('OTH', 'Other'),
+]
+_CLASS_TYPES = {class_type for class_type, _ in CLASS_TYPE_CHOICES}
+# parsed slots of a class in CourseSchedule, in the order of the arguments of `slots_to_mask`
+SCHEDULE_SLOT_FIELDS = ('weekday', 'start_slot', 'end_slot')
+
+_TO_BITS = str.maketrans('XO', '10')
+_FROM_BITS = str.maketrans('10', 'XO')
+
+
+'''
+Convert a time range like '0930-1120' to (start_slot, end_slot) within a day, end exclusive.
+The start is rounded down and the end is rounded up to the nearest half hour,
+e.g. '0930-1120' -> (3, 7), i.e. 9.30am to 11.30am.
+'''
+@lru_cache(maxsize=None)
+def time_to_slots(time: str) -> Tuple[int, int]:
+    start_time, end_time = time.split('-')
+    start_minutes = (int(start_time[0:2]) - FIRST_HOUR) * 60 + int(start_time[2:4])
+    end_minutes = (int(end_time[0:2]) - FIRST_HOUR) * 60 + int(end_time[2:4])
+    start_slot = max(start_minutes // 30, 0)
+    end_slot = min(-(-end_minutes // 30), SLOTS_PER_DAY)
+    return start_slot, max(end_slot, start_slot)
+
+'''
+Parse a single class given its day (e.g. 'MON') and time (e.g. '0930-1120') to (weekday, start_slot, end_slot),
+e.g. (0, 3, 7). Classes without a scheduled day (e.g. online courses) or with an unparseable time
+are (None, None, None), they occupy no slot.
+'''
+@lru_cache(maxsize=None)
+def class_to_slots(day: str, time: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    if day not in DAYS:
+        return None, None, None
+    try:
+        start_slot, end_slot = time_to_slots(time)
+    except (ValueError, IndexError):
+        return None, None, None
+    return DAYS.index(day), start_slot, end_slot
+
+'''
+Return the weekly bitmask of a class parsed by `class_to_slots`.
+'''
+def slots_to_mask(weekday: Optional[int], start_slot: Optional[int], end_slot: Optional[int]) -> int:
+    if weekday is None:
+        return 0
+    return ((1 << (end_slot - start_slot)) - 1) << (SLOTS_PER_DAY * weekday + start_slot)
+
+'''
+Return the weekly bitmask of a single class given its day (e.g. 'MON') and time (e.g. '0930-1120').
+'''
+@lru_cache(maxsize=None)
+def class_to_mask(day: str, time: str) -> int:
+    return slots_to_mask(*class_to_slots(day, time))
+
+'''
+Return the class type of a scraped type, e.g. 'LEC/STUDIO' -> 'LEC', see CLASS_TYPE_CHOICES.
+'''
+def parse_class_type(type: str) -> str:
+    class_type = type.strip().upper()[:3]
+    return class_type if class_type in _CLASS_TYPES else 'OTH'
+
+'''
+Return the weekly schedule string of a single class, see `class_to_mask`.
+'''
+@lru_cache(maxsize=None)
+def class_to_schedule(day: str, time: str) -> str:
+    return mask_to_schedule(class_to_mask(day, time))
+
+def mask_to_schedule(mask: int, length: int=WEEK_SLOTS) -> str:
+    return format(mask, f'0{length}b')[::-1].translate(_FROM_BITS)
+
+def schedule_to_mask(schedule: str) -> int:
+    return int(schedule[::-1].translate(_TO_BITS), 2) if schedule else 0
+
+'''
+Format the start of a slot of the day in the format of class times, e.g. 3 -> '0930'.
+'''
+def format_slot(slot: int) -> str:
+    minutes = FIRST_HOUR * 60 + slot * 30
+    return f'{minutes // 60:02d}{minutes % 60:02d}'
+
+'''
+Return the occupied slots of a bitmask as a list of contiguous ranges, each one a dict with key `day`
+(omitted for masks of a single day, e.g. exam masks) and `time`, in the format of class times, e.g. '0930-1130'.
+'''
+def mask_to_ranges(mask: int, days: List[Optional[str]]=DAYS) -> List[Dict[str, str]]:
+    ranges = []
+    for day_number, day in enumerate(days):
+        day_mask = (mask >> (day_number * SLOTS_PER_DAY)) & ((1 << SLOTS_PER_DAY) - 1)
+        slot = 0
+        while day_mask:
+            if not day_mask & 1:
+                skipped = (day_mask & -day_mask).bit_length() - 1 # jump to the next occupied slot
+                day_mask >>= skipped
+                slot += skipped
+                continue
+            length = (~day_mask & (day_mask + 1)).bit_length() - 1 # number of consecutive occupied slots
+            time = f'{format_slot(slot)}-{format_slot(slot + length)}'
+            ranges.append({'day': day, 'time': time} if day is not None else {'time': time})
+            day_mask >>= length
+            slot += length
+    return ranges
+
+'''
+Return the exam key of an exam schedule string, e.g. '2023-11-0713:00-15:00OOOOOOOOOOXXXXOOOOOOOOOOOOOOOOOO'
+-> ('2023-11-07', <bitmask of 1pm to 3pm>), or None if the course has no exam.
+'''
+def exam_key(exam_schedule: Optional[str]) -> Optional[Tuple[str, int]]:
+    if not exam_schedule or len(exam_schedule) < 21 + SLOTS_PER_DAY:
+        return None
+    return exam_schedule[:10], schedule_to_mask(exam_schedule[21:21 + SLOTS_PER_DAY])
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from apps.courses.models import Course, CourseIndex, CourseProgram, CourseSchedule, CoursePrefix
+from apps.courses.models import Course, CourseIndex, CourseProgram, CourseSchedule, CoursePrefix, Semester
+from apps.courses.schedules import DAYS, class_to_mask
 
 
 class CourseScheduleSerializer(serializers.ModelSerializer):
@@ -14,6 +15,10 @@ class CourseScheduleSerializer(serializers.ModelSerializer):
             'venue',
             'remark',
             'schedule',
+            'weekday',
+            'start_slot',
+            'end_slot',
+            'class_type',
         ]
 
 class CoursePartialSerializer(serializers.ModelSerializer):
@@ -28,11 +33,13 @@ class CoursePartialSerializer(serializers.ModelSerializer):
 
 class CourseIndexSerializer(serializers.ModelSerializer):
     schedules = CourseScheduleSerializer(many=True, read_only=True)
+    semester = serializers.SlugRelatedField(slug_field='code', read_only=True)
 
     class Meta:
         model = CourseIndex
         fields = [
             'index',
+            'semester',
             'get_filtered_information',
             'schedules',
         ]
@@ -42,6 +49,7 @@ class CourseCompleteSerializer(serializers.ModelSerializer):
     indexes = CourseIndexSerializer(many=True, read_only=True)
     program_list = serializers.SerializerMethodField()
     common_schedules = CourseScheduleSerializer(many=True, read_only=True)
+    semesters = serializers.SlugRelatedField(slug_field='code', many=True, read_only=True)
 
     class Meta:
         model = Course
@@ -71,6 +79,8 @@ class CourseCompleteSerializer(serializers.ModelSerializer):
             'program_list',
             'common_schedules',
             'prerequisites_tree',
+            'semesters',
+            'scraped_for',
         ]
         
     def get_program_list(self, obj):
@@ -93,4 +103,105 @@ class CoursePrefixSerializer(serializers.ModelSerializer):
         model = CoursePrefix
         fields = [
             'prefix',
-        ]
\ No newline at end of file
+        ]
+
+class SemesterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Semester
+        fields = [
+            'code',
+            'year',
+            'semester',
+            'is_current',
+            'last_updated',
+        ]
+
+
+class EligibilityInputSerializer(serializers.Serializer):
+    '''
+    `completed` is the list of completed course codes.
+    `program` is the id of the student's CourseProgram, `admission_year` the year the student was admitted, e.g. 2023,
+    both optional and used to check programme restrictions.
+    `semester` optionally restricts the result to the courses offered in that semester, e.g. '2024_1'.
+    '''
+    completed = serializers.ListField(child=serializers.CharField(max_length=10), allow_empty=True)
+    program = serializers.PrimaryKeyRelatedField(queryset=CourseProgram.objects.all(), required=False)
+    admission_year = serializers.IntegerField(min_value=1990, max_value=2100, required=False)
+    semester = serializers.SlugRelatedField(slug_field='code', queryset=Semester.objects.all(), required=False)
+
+    def validate_completed(self, value):
+        return [code.strip().upper() for code in value]
+
+class DegreePlanInputSerializer(serializers.Serializer):
+    '''
+    `targets` is the list of course codes to plan, `program` the id of a CourseProgram whose courses of every year of
+    study are planned too; at least one of them is required.
+    `completed` is the list of completed course codes.
+    `au_limits` is the maximum number of AUs of every semester planned, in order.
+    `start_semester` is the first semester planned, e.g. '2024_1', defaults to the current semester.
+    '''
+    targets = serializers.ListField(child=serializers.CharField(max_length=10), allow_empty=True, default=list)
+    program = serializers.PrimaryKeyRelatedField(queryset=CourseProgram.objects.all(), required=False)
+    completed = serializers.ListField(child=serializers.CharField(max_length=10), allow_empty=True, default=list)
+    au_limits = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=40),
+        min_length=1,
+        max_length=16,
+    )
+    start_semester = serializers.RegexField(r'^\d{4}_[12]$', required=False)
+
+    def validate_targets(self, value):
+        return [code.strip().upper() for code in value]
+
+    def validate_completed(self, value):
+        return [code.strip().upper() for code in value]
+
+    def validate(self, data):
+        if not data['targets'] and 'program' not in data:
+            raise serializers.ValidationError('Either targets or program is required.')
+        return data
+
+class FreeVenueQuerySerializer(serializers.Serializer):
+    '''
+    Query parameters of the free venue search: `day`, e.g. 'MON', and `time`, a range in the format of class times,
+    e.g. '0930-1130', within 8am to 12am.
+    '''
+    day = serializers.ChoiceField(choices=DAYS)
+    time = serializers.RegexField(r'^\d{4}-\d{4}$')
+
+    def validate(self, data):
+        data['slots'] = class_to_mask(data['day'], data['time'])
+        if not data['slots']:
+            raise serializers.ValidationError({'time': 'Must be a non-empty range within 0800-2400.'})
+        return data
+
+
+'''
+Response serializers of the views answering from in-memory structures, used for the schema only.
+'''
+class PrerequisiteRelationsSerializer(serializers.Serializer):
+    code = serializers.CharField()
+    direct = serializers.ListField(child=serializers.CharField())
+    all = serializers.ListField(child=serializers.CharField())
+
+class PrerequisitePathSerializer(serializers.Serializer):
+    code = serializers.CharField()
+    path = serializers.ListField(child=serializers.CharField())
+
+    # `from` is a Python keyword, it cannot be declared as a class attribute
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['from'] = serializers.CharField()
+        return fields
+
+class VenueListSerializer(serializers.Serializer):
+    semester = serializers.CharField(allow_null=True)
+    count = serializers.IntegerField()
+    results = serializers.ListField(child=serializers.CharField())
+
+class VenueOccupancySerializer(serializers.Serializer):
+    venue = serializers.CharField()
+    semester = serializers.CharField()
+    classes = serializers.IntegerField()
+    schedule = serializers.CharField()
+    occupied = serializers.ListField(child=serializers.DictField(child=serializers.CharField()))
@@ -0,0 +1,57 @@
+from django.urls import reverse
+
+from apps.common.cache import bump_data_version
+from apps.courses.models import Course, CourseProgram, Semester
+from apps.courses.prerequisites import compile_prerequisite
+from apps.courses.tests.test_get_api import BaseAPITestCase
+from apps.scraper.utils.restriction_compiler import compile_all_restrictions
+
+
+class EligibilityAPITestCase(BaseAPITestCase):
+    fixtures = ['sample_data.json']
+    ENDPOINT = reverse('courses:course-eligible')
+
+    def setUp(self):
+        Course.objects.filter(code='MH1811').update(prerequisites_tree=compile_prerequisite('MH1810')[0])
+        Course.objects.filter(code='SC2207').update(prerequisites_tree=compile_prerequisite('SC1003 & MH1810')[0])
+        compile_all_restrictions() # fixtures only contain the restriction texts
+        bump_data_version()
+
+    def get_codes(self, data):
+        resp = self.client_anonymous.post(self.ENDPOINT, data, format='json')
+        self.assertEqual(resp.status_code, 200)
+        return {course['code']: course for course in resp.data['results']}
+
+    def test_prerequisites(self):
+        codes = self.get_codes({'completed': []})
+        self.assertNotIn('MH1811', codes)
+        codes = self.get_codes({'completed': ['mh1810']})
+        self.assertIn('MH1811', codes)
+        self.assertNotIn('MH1810', codes)
+        self.assertNotIn('SC2207', codes)
+        self.assertIn('SC2207', self.get_codes({'completed': ['MH1810', 'SC1003']}))
+
+    def test_mutually_exclusive(self):
+        # MH1100 lists MH1810 as mutually exclusive, and MH1810 lists MH1100
+        self.assertIn('MH1100', self.get_codes({'completed': []}))
+        self.assertNotIn('MH1100', self.get_codes({'completed': ['MH1810']}))
+
+    def test_programme_restrictions(self):
+        Course.objects.filter(code='MH1100').update(not_available='MACS', not_offered_as_bde_ue_to='CSEC(2020-onwards)')
+        compile_all_restrictions()
+        bump_data_version()
+        macs = CourseProgram.objects.get(value='MACS;;1;F')
+        csec = CourseProgram.objects.get(value='CSEC;;1;F')
+        self.assertNotIn('MH1100', self.get_codes({'completed': [], 'program': macs.id}))
+        offered_as = self.get_codes({'completed': [], 'program': csec.id, 'admission_year': 2023})['MH1100']['offered_as']
+        self.assertEqual(offered_as, ['core', 'pe'])
+        offered_as = self.get_codes({'completed': [], 'program': csec.id, 'admission_year': 2019})['MH1100']['offered_as']
+        self.assertEqual(offered_as, ['core', 'pe', 'bde', 'ue'])
+
+    def test_semester(self):
+        Course.objects.get(code='MH1810').semesters.add(Semester.get_or_create_from_code('2024_1'))
+        self.assertEqual(list(self.get_codes({'completed': [], 'semester': '2024_1'})), ['MH1810'])
+
+    def test_invalid_input(self):
+        resp = self.client_anonymous.post(self.ENDPOINT, {'completed': [], 'program': 9999}, format='json')
+        self.assertEqual(resp.status_code, 400)
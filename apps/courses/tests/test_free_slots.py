@@ -0,0 +1,78 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.common.cache import bump_data_version
+from apps.courses.free_slots import FreeSlotIndex, get_free_slot_index
+from apps.courses.models import Course, Semester
+from apps.courses.schedules import class_to_mask, class_to_slots, mask_to_schedule
+from apps.scraper.utils.course_scraper import process_data, save_course_data
+
+
+def raw_course(code, indexes, lecture=None):
+    info = [lecture] if lecture else []
+    return (
+        {'course_code': code, 'course_name': code, 'academic_units': 3},
+        [
+            {'index': index, 'info': info + [{'type': 'TUT', 'group': index, 'day': day, 'time': time, 'venue': '', 'remark': ''}]}
+            for index, day, time in indexes
+        ],
+    )
+
+
+class FreeSlotsTestCase(APITestCase):
+    ENDPOINT = reverse('courses:course-list')
+    LECTURE = {'type': 'LEC/STUDIO', 'group': 'LE', 'day': 'FRI', 'time': '0930-1120', 'venue': 'LT1', 'remark': ''}
+    EXAM = '2024-11-2513:00-15:00OOOOOOOOOOXXXXOOOOOOOOOOOOOOOOOO'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.semester = Semester.get_or_create_from_code('2024_1')
+        save_course_data(process_data([
+            raw_course('MH1100', [('70181', 'TUE', '0930-1020'), ('70182', 'WED', '0930-1020')], cls.LECTURE),
+            raw_course('SC1007', [('10301', 'TUE', '1000-1120'), ('10302', 'TUE', '1000-1120')]),
+            raw_course('HE9091', [('20001', 'THU', '1030-1220')]),
+        ]), cls.semester)
+        Course.objects.filter(code__in=['MH1100', 'HE9091']).update(exam_schedule=cls.EXAM)
+        bump_data_version()
+
+    def fitting(self, occupied, **params):
+        response = self.client.get(self.ENDPOINT, {'fits_occupied': mask_to_schedule(occupied), 'semester': '2024_1', **params})
+        self.assertEqual(response.status_code, 200)
+        return sorted(course['code'] for course in response.data['results'])
+
+    def test_index(self):
+        index = get_free_slot_index(self.semester)
+        self.assertEqual(len(index.masks['SC1007']), 1) # both indexes have the same schedule
+        self.assertEqual(index.fitting_courses(class_to_mask('TUE', '0930-1030')), {'MH1100', 'HE9091'})
+        self.assertEqual(index.fitting_courses(0, ['MH1100']), {'MH1100', 'SC1007'})
+        self.assertIs(get_free_slot_index(self.semester), index)
+        Course.objects.filter(code='HE9091').update(exam_schedule='')
+        bump_data_version() # as the exam scraper run does
+        self.assertEqual(get_free_slot_index(self.semester).fitting_courses(0, ['MH1100']), {'MH1100', 'SC1007', 'HE9091'})
+
+    def test_filter(self):
+        self.assertEqual(self.fitting(0), ['HE9091', 'MH1100', 'SC1007'])
+        # MH1100 still fits with its Wednesday index
+        self.assertEqual(self.fitting(class_to_mask('TUE', '0930-1030')), ['HE9091', 'MH1100'])
+        # the common lecture of MH1100 on Friday clashes with all of its indexes
+        self.assertEqual(self.fitting(class_to_mask('FRI', '1100-1130') | class_to_mask('THU', '1200-1230')), ['SC1007'])
+        self.assertEqual(self.fitting(0, no_exam_clash_with='mh1100;'), ['MH1100', 'SC1007'])
+        self.assertEqual(self.fitting(class_to_mask('WED', '0900-1000'), no_exam_clash_with='HE9091'), ['HE9091', 'SC1007'])
+
+    def test_invalid(self):
+        response = self.client.get(self.ENDPOINT, {'fits_occupied': 'X' * 10})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fits_occupied', response.data)
+        response = self.client.get(self.ENDPOINT, {'fits_occupied': 'O' * 192, 'semester': '1999_1'})
+        self.assertEqual(response.status_code, 404)
+
+
+class FreeSlotIndexTestCase(TestCase):
+    def test_common_schedule(self):
+        index = FreeSlotIndex(
+            [('MH1100', 1), ('MH1100', 2), ('SC1007', 3)],
+            [(1, None, *class_to_slots('MON', '0800-0850')), (None, 'MH1100', *class_to_slots('TUE', '0800-0850')), (3, None, None, None, None)],
+        )
+        self.assertEqual(set(index.masks['MH1100']), {class_to_mask('MON', '0800-0850') | class_to_mask('TUE', '0800-0850'), class_to_mask('TUE', '0800-0850')})
+        self.assertEqual(index.fitting_courses(class_to_mask('TUE', '0800-0830')), {'SC1007'})
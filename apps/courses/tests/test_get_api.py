@@ -1,7 +1,13 @@
+from asgiref.sync import iscoroutinefunction
 from django.contrib.auth.models import User
-from django.urls import reverse
+from django.test import override_settings
+from django.urls import resolve, reverse
 from rest_framework.test import APIClient, APITestCase
 
+from apps.courses.models import Course, CourseIndex, CourseProgram, CourseSchedule, Semester
+from apps.courses.serializers import CoursePartialSerializer, CourseProgramSerializer
+from apps.scraper.utils.restriction_compiler import compile_all_restrictions
+
 
 class BaseAPITestCase(APITestCase):
     @classmethod
@@ -43,6 +49,17 @@ class CourseListAPITestCase(BaseAPITestCase):
         self.assertEqual(resp.data['results'][0]['code'], 'SC2207')
         self.assertEqual(resp.data['results'][0]['name'], 'INTRODUCTION TO DATABASES')
 
+    def test_relation_filters(self):
+        compile_all_restrictions() # fixtures only contain the restriction texts
+        resp = self.client_anonymous.get(self.ENDPOINT, {'mutually_exclusive__icontains': 'mh1100'})
+        self.assertEqual([course['code'] for course in resp.data['results']], ['MH1810', 'MH1811'])
+        resp = self.client_anonymous.get(self.ENDPOINT, {'not_available__icontains': 'DSAI'})
+        self.assertEqual([course['code'] for course in resp.data['results']], ['MH1810', 'SC5002'])
+        resp = self.client_anonymous.get(self.ENDPOINT, {'not_available_all__icontains': '2015'})
+        self.assertEqual(resp.data['count'], 5)
+        resp = self.client_anonymous.get(self.ENDPOINT, {'program_list__icontains': 'year 1'})
+        self.assertEqual(resp.status_code, 200)
+
     def test_search_icontains_no_match_when_one_term_missing(self):
         # 'MH1201' matches no course; under AND semantics the whole query returns 0.
         resp = self.client_anonymous.get(self.ENDPOINT, {'search__icontains': 'MH1201 lin'})
@@ -77,3 +94,107 @@ class CourseDetailAPITestCase(BaseAPITestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data['code'], 'MH1100')
         self.assertEqual(resp.data['name'], 'CALCULUS I')
+
+
+@override_settings(CURRENT_SEMESTER='2024_1')
+class SemesterAPITestCase(BaseAPITestCase):
+    fixtures = ['sample_data.json']
+    LIST_ENDPOINT = reverse('courses:course-list')
+    INDEX_ENDPOINT = reverse('courses:course-index-detail', kwargs={'index': '70181'})
+
+    def setUp(self):
+        self.semester = Semester.get_or_create_from_code('2024_1')
+        self.next_semester = Semester.get_or_create_from_code('2024_2')
+        Course.objects.get(code='MH1100').semesters.add(self.semester, self.next_semester)
+        Course.objects.get(code='MH1810').semesters.add(self.next_semester)
+        CourseIndex.objects.filter(index='70181').update(semester=self.semester)
+        CourseIndex.objects.create(course_code_id='MH1100', index='70181', semester=self.next_semester)
+
+    def test_list_semesters(self):
+        resp = self.client_anonymous.get(reverse('courses:semester-list'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([semester['code'] for semester in resp.data], ['2024_1', '2024_2'])
+        self.assertEqual([semester['is_current'] for semester in resp.data], [True, False])
+
+    def test_current_semester_follows_setting(self):
+        with override_settings(CURRENT_SEMESTER='2024_2'):
+            self.assertEqual(Semester.get_or_create_from_code('2024_2'), self.next_semester)
+            self.assertEqual(Semester.get_current(), self.next_semester)
+        self.assertEqual(list(Semester.objects.filter(is_current=True)), [self.next_semester])
+
+    def test_filter_courses_by_semester(self):
+        resp = self.client_anonymous.get(self.LIST_ENDPOINT, {'semester': '2024_2'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([course['code'] for course in resp.data['results']], ['MH1100', 'MH1810'])
+
+    def test_index_of_requested_semester(self):
+        resp = self.client_anonymous.get(self.INDEX_ENDPOINT)
+        self.assertEqual(resp.data['semester'], '2024_1')
+        resp = self.client_anonymous.get(self.INDEX_ENDPOINT, {'semester': '2024_2'})
+        self.assertEqual(resp.data['semester'], '2024_2')
+        resp = self.client_anonymous.get(self.INDEX_ENDPOINT, {'semester': '2023_1'})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_course_detail_indexes_of_requested_semester(self):
+        endpoint = reverse('courses:course-detail', kwargs={'code': 'MH1100'})
+        resp = self.client_anonymous.get(endpoint, {'semester': '2024_2'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['semesters'], ['2024_1', '2024_2'])
+        self.assertEqual([index['semester'] for index in resp.data['indexes']], ['2024_2'])
+
+
+class AsyncViewsTestCase(BaseAPITestCase):
+    fixtures = ['sample_data.json']
+
+    def test_views_are_async(self):
+        for name, kwargs in [
+            ('courses:course-list', {}),
+            ('courses:course-list-all', {}),
+            ('courses:course-detail', {'code': 'MH1100'}),
+            ('courses:course-prefix-list', {}),
+            ('courses:course-program-list', {}),
+        ]:
+            self.assertTrue(iscoroutinefunction(resolve(reverse(name, kwargs=kwargs)).func), name)
+
+    async def test_list_pages(self):
+        resp = await self.async_client.get(reverse('courses:course-list'), {'page': 2, 'page_size': 15})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['count'], 20)
+        self.assertEqual(resp.json()['total_pages'], 2)
+        self.assertEqual(len(resp.json()['results']), 5)
+        resp = await self.async_client.get(reverse('courses:course-list'), {'page': 0})
+        self.assertEqual(resp.status_code, 404)
+
+    async def test_detail_schedules(self):
+        semester = await Semester.objects.acreate(code='2024_1', year=2024, semester='1', is_current=True)
+        index = await CourseIndex.objects.filter(course_code_id='MH1100').afirst()
+        index.semester = semester
+        await index.asave()
+        await CourseSchedule.objects.acreate(
+            index=index, semester=semester, type='LEC', group='1', day='MON', time='0830-0930', venue='LT1', remark='', schedule='',
+        )
+        resp = await self.async_client.get(reverse('courses:course-detail', kwargs={'code': 'MH1100'}))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['semesters'], [])
+        self.assertEqual([schedule['venue'] for schedule in resp.json()['indexes'][0]['schedules']], ['LT1'])
+        self.assertEqual(resp.json()['indexes'][0]['get_filtered_information'][0]['time'], '0830-0930')
+        resp = await self.async_client.get(reverse('courses:course-detail', kwargs={'code': 'MH1100'}), {'semester': '2023_1'})
+        self.assertEqual(resp.status_code, 404)
+
+    async def test_prefixes_and_programs(self):
+        resp = await self.async_client.get(reverse('courses:course-prefix-list'))
+        prefixes = sorted({course.prefix async for course in Course.objects.filter(prefix__isnull=False)})
+        self.assertEqual(resp.json()['prefixes'], prefixes)
+        resp = await self.async_client.get(reverse('courses:course-program-list'))
+        self.assertEqual(len(resp.json()), 16)
+
+    # the `values()` fast path returns the same content as the serializers, which are kept for the schema
+    async def test_values_same_as_serializer(self):
+        courses = [course async for course in Course.objects.order_by('code')]
+        resp = await self.async_client.get(reverse('courses:course-list-all'))
+        self.assertEqual(resp.json(), CoursePartialSerializer(courses, many=True).data)
+        resp = await self.async_client.get(reverse('courses:course-list'))
+        self.assertEqual(resp.json()['results'], CoursePartialSerializer(courses[:10], many=True).data)
+        programs = [program async for program in CourseProgram.objects.all()]
+        resp = await self.async_client.get(reverse('courses:course-program-list'))
+        self.assertEqual(resp.json(), CourseProgramSerializer(programs, many=True).data)
@@ -0,0 +1,135 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+import time
+
+from apps.common.cache import bump_data_version
+from apps.courses.models import Course, CourseProgram, Semester
+from apps.courses.planner import DegreePlanner, PlannerCourse, load_planner_courses, next_semester_code
+from apps.courses.prerequisites import compile_prerequisite, parse_prerequisite
+from apps.courses.tests.test_get_api import BaseAPITestCase
+
+
+def make_course(code, academic_units=3, prerequisite=None, offered_in=()):
+    return PlannerCourse(code, academic_units, tuple(parse_prerequisite(prerequisite) or ()), frozenset(offered_in))
+
+
+class DegreePlannerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.planner = DegreePlanner({course.code: course for course in [
+            make_course('SC1003', 3),
+            make_course('SC1007', 3, 'SC1003'),
+            make_course('MH1810', 4),
+            make_course('SC2001', 3, 'SC1007 & MH1810'),
+            make_course('SC3000', 3, 'SC2001 OR SC2002'),
+            make_course('SC2002', 3, 'SC9999'),
+            make_course('SC4000', 4, 'SC3000', offered_in=['2']),
+        ]})
+
+    def get_semesters(self, plan):
+        return [semester['courses'] for semester in plan.semesters]
+
+    def test_next_semester_code(self):
+        self.assertEqual(next_semester_code('2024_1'), '2024_2')
+        self.assertEqual(next_semester_code('2024_2'), '2025_1')
+
+    def test_prerequisite_order(self):
+        plan = self.planner.plan(['SC3000'], [10, 10, 10, 10], '2024_1')
+        # the longest prerequisite chain is scheduled first
+        self.assertEqual(self.get_semesters(plan), [['SC1003', 'MH1810'], ['SC1007'], ['SC2001'], ['SC3000']])
+        self.assertEqual([semester['semester'] for semester in plan.semesters], ['2024_1', '2024_2', '2025_1', '2025_2'])
+        self.assertEqual(plan.unscheduled, [])
+
+    def test_completed(self):
+        plan = self.planner.plan(['SC3000'], [10, 10], '2024_1', completed=['SC1007', 'MH1810'])
+        self.assertEqual(self.get_semesters(plan), [['SC2001'], ['SC3000']])
+
+    def test_au_limits(self):
+        plan = self.planner.plan(['SC2001'], [4, 4, 3, 3], '2024_1')
+        self.assertEqual(self.get_semesters(plan), [['SC1003'], ['MH1810'], ['SC1007'], ['SC2001']])
+        self.assertEqual(plan.semesters[0]['academic_units'], 3)
+        plan = self.planner.plan(['SC2001'], [4, 3], '2024_1')
+        self.assertEqual(plan.unscheduled, ['MH1810', 'SC2001'])
+
+    def test_offered_semester(self):
+        plan = self.planner.plan(['SC4000'], [20] * 6, '2024_1', completed=['SC2001'])
+        # SC3000 is taken in 2024_1, but SC4000 is only offered in semester 2
+        self.assertEqual(self.get_semesters(plan), [['SC3000'], ['SC4000'], [], [], [], []])
+        plan = self.planner.plan(['SC4000'], [20] * 3, '2024_2', completed=['SC2001'])
+        self.assertEqual(self.get_semesters(plan), [['SC3000'], [], ['SC4000']])
+
+    def test_offerings_of_one_semester(self):
+        rows = [
+            {'code': 'SC1003', 'academic_units': 3, 'prerequisites_tree': None},
+            {'code': 'SC1007', 'academic_units': 3, 'prerequisites_tree': None},
+        ]
+        # only 2024_1 was scraped, SC1007 may be offered in 2024_2
+        courses = load_planner_courses(rows, [('SC1003', 2024, '1')])
+        self.assertEqual(courses['SC1003'].offered_in, frozenset())
+        self.assertEqual(courses['SC1007'].offered_in, frozenset())
+        plan = DegreePlanner(courses).plan(['SC1003', 'SC1007'], [3, 3], '2024_2')
+        self.assertEqual(self.get_semesters(plan), [['SC1003'], ['SC1007']])
+        # both regular semesters of AY2024/25 were scraped
+        courses = load_planner_courses(rows, [('SC1003', 2024, '1'), ('SC1007', 2024, '1'), ('SC1007', 2024, '2'), ('SC1003', 2025, '1')])
+        self.assertEqual(courses['SC1003'].offered_in, frozenset({'1'}))
+        self.assertEqual(courses['SC1007'].offered_in, frozenset({'1', '2'}))
+
+    def test_unresolved(self):
+        plan = self.planner.plan(['SC2002', 'XX0000', 'SC1003'], [10], '2024_1')
+        self.assertEqual(plan.unresolved, ['SC2002', 'XX0000'])
+        self.assertEqual(self.get_semesters(plan), [['SC1003']])
+
+    def test_performance(self):
+        # 60 courses in chains of 5, where every course also requires a course of the previous chain
+        courses = {}
+        for chain in range(12):
+            for level in range(5):
+                prerequisites = [f'C{chain:02d}{level - 1}0'] if level else []
+                if chain and level:
+                    prerequisites.append(f'C{chain - 1:02d}{level - 1}0')
+                courses[f'C{chain:02d}{level}0'] = make_course(f'C{chain:02d}{level}0', 3, ' & '.join(prerequisites))
+        planner = DegreePlanner(courses)
+        start = time.perf_counter()
+        plan = planner.plan(list(courses), [21] * 12, '2024_1')
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(plan.unscheduled, [])
+        self.assertEqual(sum(len(semester['courses']) for semester in plan.semesters), 60)
+
+
+class DegreePlanAPITestCase(BaseAPITestCase):
+    fixtures = ['sample_data.json']
+    ENDPOINT = reverse('courses:course-plan')
+
+    def setUp(self):
+        Course.objects.filter(code='MH1811').update(prerequisites_tree=compile_prerequisite('MH1810')[0])
+        Course.objects.filter(code='SC2207').update(prerequisites_tree=compile_prerequisite('SC1003 & MH1810')[0])
+        bump_data_version()
+
+    def test_targets(self):
+        resp = self.client_anonymous.post(self.ENDPOINT, {
+            'targets': ['sc2207', 'MH1811'],
+            'au_limits': [4, 12],
+            'start_semester': '2024_2',
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['semesters'], [
+            {'semester': '2024_2', 'courses': ['MH1810'], 'academic_units': 3},
+            {'semester': '2025_1', 'courses': ['MH1811'], 'academic_units': 3},
+        ])
+        # SC1003 is not in the fixtures, so SC2207 cannot be taken
+        self.assertEqual(resp.data['unresolved'], ['SC2207'])
+
+    def test_program(self):
+        Semester.get_or_create_from_code('2024_1')
+        csec = CourseProgram.objects.get(value='CSEC;;1;F')
+        resp = self.client_anonymous.post(self.ENDPOINT, {'program': csec.id, 'au_limits': [30] * 8}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['semesters'][0]['semester'], '2024_1')
+        planned = {code for semester in resp.data['semesters'] for code in semester['courses']}
+        # courses of CSEC in every year of study
+        self.assertTrue({'MH1810', 'SC1007', 'SC2006', 'SC4013'} <= planned | set(resp.data['unresolved']))
+
+    def test_invalid_input(self):
+        resp = self.client_anonymous.post(self.ENDPOINT, {'au_limits': [20]}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client_anonymous.post(self.ENDPOINT, {'targets': ['MH1810'], 'au_limits': [20], 'start_semester': '2024_S'}, format='json')
+        self.assertEqual(resp.status_code, 400)
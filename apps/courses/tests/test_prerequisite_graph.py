@@ -0,0 +1,73 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from apps.common.cache import bump_data_version
+from apps.courses.models import Course, CoursePrerequisite
+from apps.courses.prerequisite_graph import PrerequisiteGraphEngine
+from apps.courses.prerequisites import compile_prerequisite
+from apps.courses.tests.test_get_api import BaseAPITestCase
+
+
+EDGES = [
+    ('MH1811', ['MH1810']),
+    ('MH2100', ['MH1811', 'MH1101']),
+    ('MH3100', ['MH2100']),
+    ('SC2001', ['SC1007']),
+]
+
+
+class PrerequisiteGraphEngineTestCase(SimpleTestCase):
+    def setUp(self):
+        self.graph = PrerequisiteGraphEngine(EDGES, ['MH1100', 'MH1810'])
+
+    def test_unlocks(self):
+        self.assertEqual(self.graph.direct_unlocks('MH1810'), ['MH1811'])
+        self.assertEqual(self.graph.unlocks('MH1810'), ['MH1811', 'MH2100', 'MH3100'])
+        self.assertEqual(self.graph.unlocks('MH1100'), [])
+
+    def test_prerequisite_chain_in_topological_order(self):
+        chain = self.graph.prerequisite_chain('MH3100')
+        self.assertEqual(set(chain), {'MH1810', 'MH1811', 'MH1101', 'MH2100'})
+        self.assertLess(chain.index('MH1810'), chain.index('MH1811'))
+        self.assertEqual(chain[-1], 'MH2100')
+
+    def test_shortest_path(self):
+        self.assertEqual(self.graph.shortest_path('MH3100'), ['MH1101', 'MH2100', 'MH3100'])
+        self.assertEqual(self.graph.shortest_path('MH3100', 'MH1810'), ['MH1810', 'MH1811', 'MH2100', 'MH3100'])
+        self.assertIsNone(self.graph.shortest_path('MH3100', 'SC1007'))
+
+    def test_cycle(self):
+        graph = PrerequisiteGraphEngine([('AB1001', ['AB1002']), ('AB1002', ['AB1001']), ('AB2001', ['AB1002'])])
+        self.assertEqual(set(graph.prerequisite_chain('AB2001')), {'AB1001', 'AB1002'})
+        self.assertEqual(set(graph.unlocks('AB1001')), {'AB1002', 'AB2001'})
+
+
+class PrerequisiteGraphAPITestCase(BaseAPITestCase):
+    fixtures = ['sample_data.json']
+
+    def setUp(self):
+        for code, prerequisite in [('MH1811', 'MH1810'), ('MH1100', 'MH1810 OR MH1300')]:
+            CoursePrerequisite.objects.create(course_id=code, child_nodes=compile_prerequisite(prerequisite)[1])
+        bump_data_version()
+
+    def test_unlocks(self):
+        resp = self.client_anonymous.get(reverse('courses:course-unlocks', kwargs={'code': 'MH1810'}))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['all'], ['MH1100', 'MH1811'])
+
+    def test_chain_reloads_after_change(self):
+        endpoint = reverse('courses:course-prerequisite-chain', kwargs={'code': 'MH1811'})
+        self.assertEqual(self.client_anonymous.get(endpoint).data['all'], ['MH1810'])
+        CoursePrerequisite.objects.create(course_id='MH1810', child_nodes=compile_prerequisite('MH1300')[1])
+        bump_data_version() # as the detail scraper run or `compile_prerequisites` does
+        self.assertEqual(self.client_anonymous.get(endpoint).data['all'], ['MH1300', 'MH1810'])
+
+    def test_path(self):
+        endpoint = reverse('courses:course-prerequisite-path', kwargs={'code': 'MH1811'})
+        self.assertEqual(self.client_anonymous.get(endpoint).data['path'], ['MH1810', 'MH1811'])
+        self.assertEqual(self.client_anonymous.get(endpoint, {'from': 'MH1300'}).status_code, 404)
+        self.assertEqual(self.client_anonymous.get(endpoint, {'from': 'XX0000'}).status_code, 404)
+
+    def test_unknown_course(self):
+        resp = self.client_anonymous.get(reverse('courses:course-unlocks', kwargs={'code': 'XX0000'}))
+        self.assertEqual(resp.status_code, 404)
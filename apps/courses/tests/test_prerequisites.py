@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from apps.courses.prerequisites import compile_prerequisite, parse_prerequisite, tree_to_dnf
+
+
+class PrerequisiteCompilerTestCase(SimpleTestCase):
+    def test_and_binds_tighter_than_or(self):
+        dnf_tree, cnf_tree = compile_prerequisite('MH1200 & MH2500 OR MH1201')
+        self.assertEqual(dnf_tree, {'or': [{'and': ['MH1201']}, {'and': ['MH1200', 'MH2500']}]})
+        self.assertEqual(cnf_tree, {'and': [{'or': ['MH1200', 'MH1201']}, {'or': ['MH1201', 'MH2500']}]})
+
+    def test_parentheses_are_distributed(self):
+        dnf_tree, cnf_tree = compile_prerequisite('(SC1003 OR CZ1103) & MH1810')
+        self.assertEqual(dnf_tree, {'or': [{'and': ['CZ1103', 'MH1810']}, {'and': ['MH1810', 'SC1003']}]})
+        self.assertEqual(cnf_tree, {'and': [{'or': ['MH1810']}, {'or': ['CZ1103', 'SC1003']}]})
+
+    def test_redundant_terms_are_absorbed(self):
+        self.assertEqual(compile_prerequisite('MH1100 OR MH1100 & MH1200')[0], {'or': [{'and': ['MH1100']}]})
+
+    def test_unparseable_text_is_ignored(self):
+        self.assertEqual(compile_prerequisite('A or H2 Level Mathematics or equivalent'), (None, None))
+        self.assertEqual(compile_prerequisite('SC2002(Corequisite)'), (None, None))
+        self.assertEqual(compile_prerequisite(None), (None, None))
+        self.assertEqual(compile_prerequisite('MH1200 & MH2500 OR')[0], {'or': [{'and': ['MH1200', 'MH2500']}]})
+        self.assertEqual(
+            compile_prerequisite('Pre-requisite, MH1810 applicable to AY2017 cohorts onwards')[0],
+            {'or': [{'and': ['MH1810']}]},
+        )
+
+    def test_uncheckable_alternative_is_satisfied(self):
+        # an alternative that cannot be checked may have been met, so the prerequisite cannot be enforced
+        self.assertEqual(compile_prerequisite('MH1100 OR A Level Maths'), (None, None))
+        self.assertEqual(compile_prerequisite('SC1003 OR SC2002(Corequisite)'), (None, None))
+        self.assertEqual(
+            compile_prerequisite('MH1810 & (MH1100 OR H2 Mathematics)')[0],
+            {'or': [{'and': ['MH1810']}]},
+        )
+        self.assertEqual(
+            compile_prerequisite('Physics & MH1100 OR MH1101')[0],
+            {'or': [{'and': ['MH1100']}, {'and': ['MH1101']}]},
+        )
+
+    def test_single_letter_prefix(self):
+        self.assertEqual(
+            compile_prerequisite('E3102L OR EE2001')[0],
+            {'or': [{'and': ['E3102L']}, {'and': ['EE2001']}]},
+        )
+        self.assertEqual(compile_prerequisite('AY2017 & E3102L')[0], {'or': [{'and': ['E3102L']}]})
+
+    def test_tree_round_trip(self):
+        dnf = parse_prerequisite('(SC1003 OR CZ1103) & (MH1810 OR MH1100)')
+        dnf_tree, cnf_tree = compile_prerequisite('(SC1003 OR CZ1103) & (MH1810 OR MH1100)')
+        self.assertEqual(tree_to_dnf(dnf_tree), dnf)
+        self.assertEqual(tree_to_dnf(cnf_tree), dnf)
+        self.assertEqual(tree_to_dnf('MH1810'), parse_prerequisite('MH1810'))
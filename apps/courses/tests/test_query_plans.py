@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase
+from unittest import skipUnless
+import random
+
+from apps.courses.models import Course, CourseIndex, CourseProgram, CourseSchedule, Semester
+
+
+class QueryPlanTestCase(TestCase):
+    '''
+    Checks with EXPLAIN that the hot queries of the course endpoints use an index, on a seeded dataset the size of
+    a real semester (4000 courses in 100 prefixes, 200 programmes, 8000 indexes), with statistics gathered by ANALYZE.
+    The queries are those built by CourseQueryParamsMixin, PrefixListView and CourseDetailView.
+    The plans of the small tables (programmes, distinct prefixes) are only checked on SQLite:
+    PostgreSQL rightly prefers a sequential scan of a few pages to an index scan.
+    '''
+    @classmethod
+    def setUpTestData(cls):
+        generator = random.Random(0)
+        cls.semester = Semester.get_or_create_from_code('2024_1')
+        prefixes = [first + second for first in 'ABCDEFGHIJ' for second in 'ABCDEFGHIJ']
+        courses = Course.objects.bulk_create([
+            Course(
+                code=f'{prefix}{level}{number:03d}',
+                name=f'Course {prefix}{level}{number:03d}',
+                academic_units=generator.choice([3] * 8 + [1, 2, 4, 6]),
+                level=str(level),
+                prefix=prefix,
+                offered_as_ue=generator.random() > 0.1,
+                offered_as_bde=generator.random() > 0.1,
+            )
+            for prefix in prefixes for level in range(1, 6) for number in range(8)
+        ])
+        programs = CourseProgram.objects.bulk_create([
+            CourseProgram(name=f'Programme {number}', value=f'P{number};;{number % 5 + 1};F', year=number % 5 + 1)
+            for number in range(200)
+        ])
+        CourseProgram.courses.through.objects.bulk_create([
+            CourseProgram.courses.through(courseprogram_id=program.id, course_id=course.code)
+            for program in programs for course in generator.sample(courses, 20)
+        ])
+        cls.indexes = CourseIndex.objects.bulk_create([
+            CourseIndex(course_code=course, semester=cls.semester, index=f'{number:05d}')
+            for number, course in enumerate(courses * 2)
+        ])
+        schedule = dict(semester=cls.semester, type='LEC', group='1', day='MON', time='', venue='', remark='', schedule='')
+        CourseSchedule.objects.bulk_create(
+            [CourseSchedule(index=index, **schedule) for index in cls.indexes]
+            + [CourseSchedule(common_schedule_for_course=course, **schedule) for course in courses]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'{index_name} not used by {queryset.query}:\n{plan}')
+
+    def assertNoFullScan(self, queryset, table):
+        plan = queryset.explain()
+        full_scan = f'Seq Scan on {table}' if connection.vendor == 'postgresql' else f'SCAN {table}\n'
+        self.assertNotIn(full_scan, plan + '\n', f'full scan of {table} in {queryset.query}:\n{plan}')
+
+    def test_level(self):
+        self.assertUsesIndex(Course.objects.filter(level__in=['5']).order_by('code'), 'course_level_code')
+
+    def test_prefix(self):
+        self.assertUsesIndex(Course.objects.filter(prefix__in=['AB', 'CD']).order_by('code'), 'course_prefix_code')
+
+    def test_academic_units(self):
+        # the count of the paginator, the page itself is read in code order
+        self.assertUsesIndex(Course.objects.filter(academic_units__gte=6, academic_units__lte=10), 'course_au_code')
+
+    def test_offered_as(self):
+        self.assertUsesIndex(Course.objects.filter(offered_as_ue=False).order_by('code'), 'course_not_offered_as_ue')
+        self.assertUsesIndex(Course.objects.filter(offered_as_bde=False).order_by('code'), 'course_not_offered_as_bde')
+
+    @skipUnless(connection.vendor == 'sqlite', 'PostgreSQL scans the small programme table')
+    def test_program_year(self):
+        self.assertUsesIndex(CourseProgram.objects.filter(year=2).values_list('id', flat=True), 'courseprogram_year')
+
+    @skipUnless(connection.vendor == 'sqlite', 'PostgreSQL scans the small programme table')
+    def test_programs(self):
+        queryset = Course.objects.filter(programs__in=[1, 2, 3]).distinct().order_by('code')
+        self.assertNoFullScan(queryset, 'courses_courseprogram_courses')
+        self.assertNoFullScan(queryset, 'courses_course')
+
+    @skipUnless(connection.vendor == 'sqlite', 'PostgreSQL aggregates the distinct prefixes from a scan')
+    def test_prefix_list(self):
+        queryset = Course.objects.filter(prefix__isnull=False).values_list('prefix', flat=True).distinct().order_by('prefix')
+        self.assertUsesIndex(queryset, 'course_prefix_code')
+
+    def test_schedules(self):
+        # the index of the `index` foreign key, named differently on each backend
+        queryset = CourseSchedule.objects.filter(index__in=self.indexes[:5], semester=self.semester)
+        self.assertNoFullScan(queryset, 'courses_courseschedule')
+        queryset = CourseSchedule.objects.filter(common_schedule_for_course='AB1001', semester=self.semester)
+        self.assertNoFullScan(queryset, 'courses_courseschedule')
+
+    def test_index(self):
+        self.assertNoFullScan(CourseIndex.objects.filter(index='00010', semester=self.semester), 'courses_courseindex')
+
+    @skipUnless(connection.vendor == 'postgresql', 'trigram indexes are only created on PostgreSQL')
+    def test_search(self):
+        self.assertUsesIndex(Course.objects.filter(name__icontains='rse AB10'), 'course_name_trgm')
+        self.assertUsesIndex(Course.objects.filter(code__icontains='AB10'), 'course_code_trgm')
@@ -0,0 +1,78 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.common.cache import bump_data_version
+from apps.courses.models import Semester, VenueOccupancy
+from apps.courses.schedules import class_to_mask, schedule_to_mask
+from apps.courses.venues import get_venue_occupancy
+from apps.scraper.utils.course_scraper import process_data, save_course_data
+from apps.scraper.utils.venue_compiler import save_venue_occupancy
+
+
+def raw_course(code, classes):
+    return (
+        {'course_code': code, 'course_name': code, 'academic_units': 3},
+        [
+            {'index': index, 'info': [{'type': 'TUT', 'group': index, 'day': day, 'time': time, 'venue': venue, 'remark': ''}]}
+            for index, day, time, venue in classes
+        ],
+    )
+
+
+class VenueOccupancyTestCase(APITestCase):
+    LIST_ENDPOINT = reverse('courses:venue-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.semester = Semester.get_or_create_from_code('2024_1')
+        save_course_data(process_data([
+            raw_course('MH1100', [('70181', 'TUE', '0930-1020', 'TR+15'), ('70182', 'WED', '0930-1020', 'TR+15')]),
+            raw_course('SC1007', [('10301', 'TUE', '1030-1120', 'TR+15'), ('10302', 'MON', '1000-1120', 'LT1')]),
+            raw_course('HE9091', [('20001', 'THU', '1030-1220', 'ONLINE')]),
+        ]), cls.semester)
+        save_venue_occupancy(cls.semester)
+        bump_data_version()
+
+    def test_compile(self):
+        venues = {venue.venue: venue for venue in VenueOccupancy.objects.filter(semester=self.semester)}
+        self.assertEqual(set(venues), {'TR+15', 'LT1'})
+        self.assertEqual(venues['TR+15'].classes, 3)
+        self.assertEqual(schedule_to_mask(venues['TR+15'].schedule), (
+            class_to_mask('TUE', '0930-1020') | class_to_mask('WED', '0930-1020') | class_to_mask('TUE', '1030-1120')
+        ))
+        # rebuilt rows are reloaded
+        occupancy = get_venue_occupancy(self.semester)
+        self.assertIs(get_venue_occupancy(self.semester), occupancy)
+        save_venue_occupancy(self.semester)
+        bump_data_version() # as the course scraper run does
+        self.assertIsNot(get_venue_occupancy(self.semester), occupancy)
+
+    def test_venue_detail(self):
+        response = self.client.get(reverse('courses:venue-detail', args=['TR+15']), {'semester': '2024_1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['classes'], 3)
+        self.assertEqual(response.data['occupied'], [
+            {'day': 'TUE', 'time': '0930-1130'},
+            {'day': 'WED', 'time': '0930-1030'},
+        ])
+        response = self.client.get(reverse('courses:venue-detail', args=['ONLINE']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_free_venues(self):
+        response = self.client.get(self.LIST_ENDPOINT)
+        self.assertEqual(response.data['results'], ['LT1', 'TR+15'])
+        response = self.client.get(self.LIST_ENDPOINT, {'day': 'TUE', 'time': '1100-1200'})
+        self.assertEqual(response.data['semester'], '2024_1')
+        self.assertEqual(response.data['results'], ['LT1'])
+        response = self.client.get(self.LIST_ENDPOINT, {'day': 'TUE', 'time': '1130-1200'})
+        self.assertEqual(response.data['results'], ['LT1', 'TR+15'])
+
+    def test_invalid_range(self):
+        response = self.client.get(self.LIST_ENDPOINT, {'day': 'SUN', 'time': '1000-1100'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('day', response.data)
+        response = self.client.get(self.LIST_ENDPOINT, {'day': 'MON', 'time': '0600-0700'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('time', response.data)
+        response = self.client.get(self.LIST_ENDPOINT, {'day': 'MON'})
+        self.assertEqual(response.status_code, 400)
@@ -7,6 +7,14 @@ from apps.courses.views import (
     CourseIndexDetailView,
     PrefixListView,
     CourseProgramListView,
+    SemesterListView,
+    CourseUnlocksView,
+    CoursePrerequisiteChainView,
+    CoursePrerequisitePathView,
+    EligibleCourseListView,
+    DegreePlanView,
+    VenueListView,
+    VenueDetailView,
 )
 
 
@@ -19,4 +27,12 @@ urlpatterns = [
     path('index/<str:index>/', CourseIndexDetailView.as_view(), name='course-index-detail'),
     path('prefixes/', PrefixListView.as_view(), name='course-prefix-list'),
     path('programs/', CourseProgramListView.as_view(), name='course-program-list'),
+    path('semesters/', SemesterListView.as_view(), name='semester-list'),
+    path('prerequisites/<str:code>/unlocks/', CourseUnlocksView.as_view(), name='course-unlocks'),
+    path('prerequisites/<str:code>/chain/', CoursePrerequisiteChainView.as_view(), name='course-prerequisite-chain'),
+    path('prerequisites/<str:code>/path/', CoursePrerequisitePathView.as_view(), name='course-prerequisite-path'),
+    path('eligible/', EligibleCourseListView.as_view(), name='course-eligible'),
+    path('plan/', DegreePlanView.as_view(), name='course-plan'),
+    path('venues/', VenueListView.as_view(), name='venue-list'),
+    path('venues/<str:venue>/', VenueDetailView.as_view(), name='venue-detail'),
 ]
@@ -78,3 +78,10 @@ validate_index = RegexValidator(
     message=_('The value must be 5 numeric digits.'),
     code='invalid_format'
 )
+
+# semester codes, e.g. '2024_1', '2024_2', or '2024_S' / '2024_T' for special terms
+validate_semester_code = RegexValidator(
+    regex=r'^\d{4}_[12ST]$',
+    message=_('The value must be an academic year and a semester, e.g. 2024_1.'),
+    code='invalid_format'
+)
@@ -0,0 +1,59 @@
+'''
+Venue occupancy of a semester, a venue x weekly slot matrix: every venue is a row, its weekly bitmask
+(see `apps/courses/schedules.py`) with a bit set for every half-hour slot during which a class is held there.
+
+The rows are compiled at scrape time into VenueOccupancy (see `apps/scraper/utils/venue_compiler.py`)
+and loaded once per process, so that the occupancy of a venue is a dict lookup,
+and checking whether a venue is free for a slot range is a single integer AND, without scanning the class schedules.
+'''
+
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from apps.common.cache import get_data_version
+from apps.courses.models import Semester, VenueOccupancy
+from apps.courses.schedules import schedule_to_mask
+
+
+class VenueOccupancyIndex:
+    '''
+    Built from the (venue, schedule, number of classes) rows of VenueOccupancy of a semester.
+    '''
+    def __init__(self, rows: Iterable[Tuple[str, str, int]]):
+        self.masks: Dict[str, int] = {}
+        self.classes: Dict[str, int] = {}
+        for venue, schedule, classes in rows:
+            self.masks[venue] = schedule_to_mask(schedule)
+            self.classes[venue] = classes
+        self.venues: List[str] = sorted(self.masks)
+
+    def __contains__(self, venue: str) -> bool:
+        return venue in self.masks
+
+    '''
+    Return the venues with no class during any slot of the `slots` bitmask, in alphabetical order.
+    '''
+    def free_venues(self, slots: int) -> List[str]:
+        return [venue for venue in self.venues if not self.masks[venue] & slots]
+
+
+_indexes: Dict[int, VenueOccupancyIndex] = {}
+_indexes_version: Optional[int] = None
+_indexes_lock = Lock()
+
+'''
+Return the venue occupancy of the semester, loaded once per process and semester,
+and reloaded only when the data version changed (see `apps/common/cache.py`), e.g. after a course scraper run.
+'''
+def get_venue_occupancy(semester: Semester) -> VenueOccupancyIndex:
+    global _indexes_version
+    version = get_data_version()
+    with _indexes_lock:
+        if _indexes_version != version:
+            _indexes.clear()
+            _indexes_version = version
+        if semester.id not in _indexes:
+            _indexes[semester.id] = VenueOccupancyIndex(
+                VenueOccupancy.objects.filter(semester=semester).values_list('venue', 'schedule', 'classes')
+            )
+        return _indexes[semester.id]
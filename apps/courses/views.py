@@ -1,42 +1,94 @@
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse
 from rest_framework import generics
 from rest_framework.response import Response
 
-from apps.courses.mixins import CourseQueryParamsMixin
-from apps.courses.models import Course, CourseIndex, CoursePrefix, CourseProgram
+from apps.common.generics import AsyncGenericAPIView, AsyncListAPIView, AsyncRetrieveAPIView
+from apps.courses.decorators import day_parameter, from_parameter, response_schema, semester_parameter, time_parameter
+from apps.courses.mixins import CourseQueryParamsMixin, SemesterFilter, aget_requested_semester, get_requested_semester
+from apps.courses.models import Course, CourseIndex, CoursePrefix, CourseProgram, CourseSchedule, Semester
+from apps.courses.eligibility import get_eligibility_evaluator
+from apps.courses.planner import get_degree_planner
+from apps.courses.prerequisite_graph import PrerequisiteGraphEngine, get_prerequisite_graph
+from apps.courses.restrictions import get_programme_codes
+from apps.courses.schedules import mask_to_ranges, mask_to_schedule
+from apps.courses.venues import VenueOccupancyIndex, get_venue_occupancy
 from apps.courses.serializers import (
     CoursePartialSerializer,
     CourseIndexSerializer,
     CourseCompleteSerializer,
     CourseProgramSerializer,
     CoursePrefixSerializer,
+    DegreePlanInputSerializer,
+    EligibilityInputSerializer,
+    FreeVenueQuerySerializer,
+    PrerequisitePathSerializer,
+    PrerequisiteRelationsSerializer,
+    SemesterSerializer,
+    VenueListSerializer,
+    VenueOccupancySerializer,
 )
 
 
-class CourseListAllView(generics.ListAPIView):
+class CourseListAllView(AsyncListAPIView):
+    cache_namespace = 'course-list-all'
     queryset = Course.objects.all().order_by('code')
     serializer_class = CoursePartialSerializer
+    values_fields = CoursePartialSerializer.Meta.fields
+    filter_backends = [SemesterFilter]
 
-class CourseListView(CourseQueryParamsMixin, generics.ListAPIView):
+class CourseListView(CourseQueryParamsMixin, AsyncListAPIView):
+    cache_namespace = 'course-list'
     queryset = Course.objects.all().order_by('code')
     serializer_class = CoursePartialSerializer
+    values_fields = CoursePartialSerializer.Meta.fields
 
 
-class CourseDetailView(generics.RetrieveAPIView):
+class CourseDetailView(AsyncRetrieveAPIView):
+    cache_namespace = 'course-detail'
     lookup_field = 'code'
     serializer_class = CourseCompleteSerializer
+    semester = None
 
-    def get_object(self):
-        return get_object_or_404(Course, code=self.kwargs['code'])
+    # indexes and schedules are those of the requested semester (query parameter `semester`, defaults to current),
+    # every relation serialized is prefetched, as the async handler cannot query lazily
+    def get_queryset(self):
+        indexes = CourseIndex.objects.select_related('semester').prefetch_related('schedules')
+        common_schedules = CourseSchedule.objects.all()
+        if self.semester is not None:
+            indexes = indexes.filter(semester=self.semester)
+            common_schedules = common_schedules.filter(semester=self.semester)
+        return Course.objects.prefetch_related(
+            Prefetch('indexes', queryset=indexes),
+            Prefetch('common_schedules', queryset=common_schedules),
+            'semesters',
+        )
+
+    async def aget_object(self):
+        self.semester = await aget_requested_semester(self.request)
+        return await super().aget_object()
 
 
 class CourseIndexDetailView(generics.RetrieveAPIView):
     lookup_field = 'index'
     serializer_class = CourseIndexSerializer
 
+    # index numbers are unique within a semester, see CourseDetailView for the `semester` query parameter
     def get_object(self):
-        return get_object_or_404(CourseIndex, index=self.kwargs['index'])
+        queryset = CourseIndex.objects.filter(index=self.kwargs['index']).prefetch_related('schedules')
+        semester = get_requested_semester(self.request)
+        if semester is not None:
+            queryset = queryset.filter(semester=semester)
+        index = queryset.order_by('-id').first()
+        if index is None:
+            raise Http404('No CourseIndex matches the given query.')
+        return index
+
+
+class SemesterListView(generics.ListAPIView):
+    serializer_class = SemesterSerializer
+    queryset = Semester.objects.all()
 
 
 class CoursePrefixListView(generics.GenericAPIView):
@@ -45,14 +97,178 @@ class CoursePrefixListView(generics.GenericAPIView):
         return Response(programs)
 
 
-class CourseProgramListView(generics.ListAPIView):
+class CourseProgramListView(AsyncListAPIView):
+    cache_namespace = 'programs'
     serializer_class = CourseProgramSerializer
+    values_fields = CourseProgramSerializer.Meta.fields
     queryset = CourseProgram.objects.all()
 
 
-class PrefixListView(generics.ListAPIView):
+class PrefixListView(AsyncGenericAPIView):
+    cache_namespace = 'prefixes'
     serializer_class = CoursePrefixSerializer
 
-    def get(self, request, *args, **kwargs):
-        distinct_prefixes = Course.objects.filter(prefix__isnull=False).distinct().values_list('prefix', flat=True).order_by('prefix')
-        return JsonResponse({"prefixes": list(distinct_prefixes)})
\ No newline at end of file
+    async def alist(self):
+        # read from index `course_prefix_code` only on SQLite, without touching the course rows
+        distinct_prefixes = Course.objects.filter(prefix__isnull=False).values_list('prefix', flat=True).distinct().order_by('prefix')
+        return {"prefixes": [prefix async for prefix in distinct_prefixes]}
+
+    async def get(self, request, *args, **kwargs):
+        return JsonResponse(await self.acached(self.alist))
+
+
+class PrerequisiteGraphMixin:
+    '''
+    Answers queries from the in-memory prerequisite graph, see `apps/courses/prerequisite_graph.py`.
+    '''
+    def get_graph(self, *codes: str) -> PrerequisiteGraphEngine:
+        graph = get_prerequisite_graph()
+        for code in codes:
+            if code not in graph:
+                raise Http404(f'Course {code} not found.')
+        return graph
+
+
+class CourseUnlocksView(PrerequisiteGraphMixin, generics.GenericAPIView):
+    @response_schema(PrerequisiteRelationsSerializer)
+    def get(self, request, code):
+        graph = self.get_graph(code)
+        return Response({
+            'code': code,
+            'direct': graph.direct_unlocks(code),
+            'all': graph.unlocks(code),
+        })
+
+
+class CoursePrerequisiteChainView(PrerequisiteGraphMixin, generics.GenericAPIView):
+    @response_schema(PrerequisiteRelationsSerializer)
+    def get(self, request, code):
+        graph = self.get_graph(code)
+        return Response({
+            'code': code,
+            'direct': graph.direct_prerequisites(code),
+            'all': graph.prerequisite_chain(code),
+        })
+
+
+class CoursePrerequisitePathView(PrerequisiteGraphMixin, generics.GenericAPIView):
+    '''
+    Query parameter `from` is the course to start from,
+    defaults to the closest course without prerequisite.
+    '''
+    @response_schema(PrerequisitePathSerializer, [from_parameter])
+    def get(self, request, code):
+        source = request.query_params.get('from', None) or None
+        graph = self.get_graph(code, *([source] if source else []))
+        path = graph.shortest_path(code, source)
+        if path is None:
+            raise Http404(f'No prerequisite path from {source} to {code}.')
+        return Response({
+            'code': code,
+            'from': path[0],
+            'path': path,
+        })
+
+
+class VenueOccupancyMixin:
+    '''
+    Answers queries from the in-memory venue occupancy of the requested semester (query parameter `semester`,
+    defaults to the current semester), see `apps/courses/venues.py`.
+    '''
+    def get_occupancy(self) -> VenueOccupancyIndex:
+        self.semester = get_requested_semester(self.request)
+        return get_venue_occupancy(self.semester) if self.semester is not None else VenueOccupancyIndex([])
+
+
+class VenueListView(VenueOccupancyMixin, generics.GenericAPIView):
+    '''
+    Return the venues of the semester.
+    With query parameters `day` and `time`, e.g. `?day=MON&time=0930-1130`, only the venues free during that range.
+    '''
+    @response_schema(VenueListSerializer, [semester_parameter, day_parameter, time_parameter])
+    def get(self, request):
+        occupancy = self.get_occupancy()
+        venues = occupancy.venues
+        if 'day' in request.query_params or 'time' in request.query_params:
+            serializer = FreeVenueQuerySerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            venues = occupancy.free_venues(serializer.validated_data['slots'])
+        return Response({
+            'semester': self.semester.code if self.semester is not None else None,
+            'count': len(venues),
+            'results': venues,
+        })
+
+
+class VenueDetailView(VenueOccupancyMixin, generics.GenericAPIView):
+    '''
+    Return the weekly occupancy of a venue in the semester, as a weekly schedule string
+    (see `common_schedule` in Course model) and as occupied time ranges.
+    '''
+    @response_schema(VenueOccupancySerializer, [semester_parameter])
+    def get(self, request, venue):
+        occupancy = self.get_occupancy()
+        if venue not in occupancy:
+            raise Http404(f'Venue {venue} not found.')
+        mask = occupancy.masks[venue]
+        return Response({
+            'venue': venue,
+            'semester': self.semester.code,
+            'classes': occupancy.classes[venue],
+            'schedule': mask_to_schedule(mask),
+            'occupied': mask_to_ranges(mask),
+        })
+
+
+class EligibleCourseListView(generics.CreateAPIView):
+    '''
+    Return every course the student can take given the completed courses, programme and admission year,
+    see `apps/courses/eligibility.py`.
+    '''
+    serializer_class = EligibilityInputSerializer
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        program = data.get('program', None)
+        courses = get_eligibility_evaluator().evaluate(
+            data['completed'],
+            get_programme_codes(program.value) if program else (),
+            data.get('admission_year', None),
+        )
+        semester = data.get('semester', None)
+        if semester is not None:
+            offered_codes = set(semester.courses.values_list('code', flat=True))
+            courses = [course for course in courses if course['code'] in offered_codes]
+        return Response({'count': len(courses), 'results': courses})
+
+
+class DegreePlanView(generics.CreateAPIView):
+    '''
+    Return a semester-by-semester plan of the target courses and the courses of the programme,
+    with their prerequisites, see `apps/courses/planner.py`.
+    '''
+    serializer_class = DegreePlanInputSerializer
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        targets = list(data['targets'])
+        program = data.get('program', None)
+        if program is not None:
+            # the same programme and specialisation in every year of study, e.g. 'MACS;;1;F', 'MACS;;2;F', ...
+            parts = program.value.split(';')
+            programs = CourseProgram.objects.filter(value__startswith=f'{parts[0]};{parts[1]};' if len(parts) > 1 else program.value)
+            targets.extend(Course.objects.filter(programs__in=programs).order_by('code').values_list('code', flat=True))
+        start_semester = data.get('start_semester', None)
+        if start_semester is None:
+            current = Semester.get_current()
+            start_semester = current.code if current is not None and current.semester in ('1', '2') else settings.CURRENT_SEMESTER
+        plan = get_degree_planner().plan(targets, data['au_limits'], start_semester, data['completed'])
+        return Response({
+            'semesters': plan.semesters,
+            'unscheduled': plan.unscheduled,
+            'unresolved': plan.unresolved,
+        })
@@ -0,0 +1,92 @@
+'''
+Clash check of a candidate timetable, a list of (course code, index) pairs of a semester.
+
+Every index is reduced to a weekly bitmask, the union of the schedules of its classes and of the classes common to all
+indexes of its course (see `apps/courses/schedules.py`), and every course to an exam key, its exam date and the
+bitmask of the half-hour slots of its exam on that day (see `exam_schedule` in Course model).
+Two entries clash when their weekly bitmasks intersect, or when their exams are on the same date and their exam
+bitmasks intersect, so that checking n entries takes n * (n - 1) / 2 integer ANDs.
+'''
+
+from django.db.models import Q
+from functools import reduce
+from operator import or_
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from apps.courses.models import Course, CourseSchedule, Semester
+from apps.courses.schedules import SCHEDULE_SLOT_FIELDS, exam_key, mask_to_ranges, slots_to_mask
+
+
+class TimetableEntry(NamedTuple):
+    code: str
+    index: str
+    mask: int
+    exam: Optional[Tuple[str, int]]
+
+
+'''
+Load the timetable entries of the (course code, index) pairs in the semester, in the order of `pairs`,
+with three queries: the indexes, their classes together with the classes common to their courses,
+and the exam schedules of the courses.
+Returns the entries and the pairs that do not exist in the semester.
+'''
+def load_timetable(pairs: List[Tuple[str, str]], semester: Semester) -> Tuple[List[TimetableEntry], List[Tuple[str, str]]]:
+    codes = {code for code, _ in pairs}
+    pairs_filter = reduce(or_, [Q(course_code=code, index=index) for code, index in pairs])
+    index_ids = {
+        (code, index): index_id
+        for index_id, code, index in semester.indexes.filter(pairs_filter).values_list('id', 'course_code', 'index')
+    }
+    index_masks: Dict[int, int] = {}
+    common_masks: Dict[str, int] = {}
+    schedules = CourseSchedule.objects.filter(
+        Q(index_id__in=index_ids.values()) | Q(common_schedule_for_course__in=codes, semester=semester)
+    ).values_list('index_id', 'common_schedule_for_course', *SCHEDULE_SLOT_FIELDS)
+    for index_id, code, *slots in schedules:
+        if index_id is not None:
+            index_masks[index_id] = index_masks.get(index_id, 0) | slots_to_mask(*slots)
+        else:
+            common_masks[code] = common_masks.get(code, 0) | slots_to_mask(*slots)
+    exams = dict(Course.objects.filter(code__in=codes).values_list('code', 'exam_schedule'))
+
+    entries, missing = [], []
+    for code, index in pairs:
+        if (code, index) not in index_ids:
+            missing.append((code, index))
+            continue
+        mask = index_masks.get(index_ids[code, index], 0) | common_masks.get(code, 0)
+        entries.append(TimetableEntry(code, index, mask, exam_key(exams.get(code))))
+    return entries, missing
+
+'''
+Check the clashes between the entries of a timetable, and with the `occupied` bitmask of the student.
+Returns:
+- `clash_matrix`: n x n booleans, True when entries i and j clash (classes or exams)
+- `clashes`: for every clashing pair, the courses and indexes, the type ('class' or 'exam') and the clashing slots
+  (with the date for exams)
+- `occupied_clashes`: the entries whose classes fall in occupied slots, with these slots
+'''
+def check_clashes(entries: List[TimetableEntry], occupied: int=0) -> Dict:
+    size = len(entries)
+    matrix = [[False] * size for _ in range(size)]
+    clashes = []
+    for i in range(size):
+        for j in range(i + 1, size):
+            first, second = entries[i], entries[j]
+            overlap = first.mask & second.mask
+            exam_overlap = 0
+            if first.exam is not None and second.exam is not None and first.exam[0] == second.exam[0]:
+                exam_overlap = first.exam[1] & second.exam[1]
+            if not overlap and not exam_overlap:
+                continue
+            matrix[i][j] = matrix[j][i] = True
+            pair = {'courses': [first.code, second.code], 'indexes': [first.index, second.index]}
+            if overlap:
+                clashes.append({**pair, 'type': 'class', 'slots': mask_to_ranges(overlap)})
+            if exam_overlap:
+                clashes.append({**pair, 'type': 'exam', 'date': first.exam[0], 'slots': mask_to_ranges(exam_overlap, [None])})
+    occupied_clashes = [
+        {'code': entry.code, 'index': entry.index, 'slots': mask_to_ranges(entry.mask & occupied)}
+        for entry in entries if entry.mask & occupied
+    ]
+    return {'clash_matrix': matrix, 'clashes': clashes, 'occupied_clashes': occupied_clashes}
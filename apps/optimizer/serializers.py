@@ -25,3 +25,13 @@ class CourseOptimizerInputSerializer(serializers.Serializer):
 class OptimizerInputSerialzer(serializers.Serializer):
     courses = CourseOptimizerInputSerializer(many=True)
     occupied = serializers.RegexField(regex=r'^[OX]{192}$', required=False)
+
+
+class TimetableEntrySerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=6)
+    index = serializers.CharField(max_length=5)
+
+
+class ClashCheckInputSerializer(serializers.Serializer):
+    courses = TimetableEntrySerializer(many=True, allow_empty=False, max_length=20)
+    occupied = serializers.RegexField(regex=r'^[OX]{192}$', required=False)
@@ -1,3 +1,103 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from apps.courses.models import Course, Semester
+from apps.courses.schedules import (
+    class_to_mask,
+    class_to_slots,
+    exam_key,
+    mask_to_ranges,
+    mask_to_schedule,
+    parse_class_type,
+    slots_to_mask,
+)
+from apps.scraper.utils.course_scraper import process_data, save_course_data
+
+
+def raw_course(code, indexes, lecture=None):
+    info = [lecture] if lecture else []
+    return (
+        {'course_code': code, 'course_name': code, 'academic_units': 3},
+        [
+            {'index': index, 'info': info + [{'type': 'TUT', 'group': index, 'day': day, 'time': time, 'venue': '', 'remark': ''}]}
+            for index, day, time in indexes
+        ],
+    )
+
+
+class ClashHelpersTestCase(SimpleTestCase):
+    def test_mask_to_ranges(self):
+        mask = class_to_mask('MON', '0930-1120') | class_to_mask('MON', '1330-1420') | class_to_mask('SAT', '2230-2350')
+        self.assertEqual(mask_to_ranges(mask), [
+            {'day': 'MON', 'time': '0930-1130'},
+            {'day': 'MON', 'time': '1330-1430'},
+            {'day': 'SAT', 'time': '2230-2400'},
+        ])
+        self.assertEqual(mask_to_ranges(0), [])
+
+    def test_class_slots(self):
+        self.assertEqual(class_to_slots('MON', '0930-1120'), (0, 3, 7))
+        self.assertEqual(class_to_slots('', ''), (None, None, None))
+        self.assertEqual(slots_to_mask(*class_to_slots('SAT', '2230-2350')), class_to_mask('SAT', '2230-2350'))
+        self.assertEqual(slots_to_mask(None, None, None), 0)
+        self.assertEqual([parse_class_type(type) for type in ['LEC/STUDIO', 'TUT', 'PRJ']], ['LEC', 'TUT', 'OTH'])
+
+    def test_exam_key(self):
+        date, mask = exam_key('2023-11-0713:00-15:00OOOOOOOOOOXXXXOOOOOOOOOOOOOOOOOO')
+        self.assertEqual(date, '2023-11-07')
+        self.assertEqual(mask_to_ranges(mask, [None]), [{'time': '1300-1500'}])
+        self.assertIsNone(exam_key(''))
+
+
+class ClashCheckAPITestCase(APITestCase):
+    ENDPOINT = reverse('optimizer:clash')
+    LECTURE = {'type': 'LEC/STUDIO', 'group': 'LE', 'day': 'FRI', 'time': '0930-1120', 'venue': 'LT1', 'remark': ''}
+
+    @classmethod
+    def setUpTestData(cls):
+        semester = Semester.get_or_create_from_code('2024_1')
+        save_course_data(process_data([
+            raw_course('MH1100', [('70181', 'TUE', '0930-1020'), ('70182', 'WED', '0930-1020')], cls.LECTURE),
+            raw_course('SC1007', [('10301', 'TUE', '1000-1120'), ('10302', 'THU', '1000-1120')]),
+            raw_course('HE9091', [('20001', 'FRI', '1030-1220')]),
+        ]), semester)
+        Course.objects.filter(code__in=['MH1100', 'HE9091']).update(
+            exam_schedule='2024-11-2513:00-15:00OOOOOOOOOOXXXXOOOOOOOOOOOOOOOOOO',
+        )
+
+    def check(self, courses, **data):
+        return self.client.post(self.ENDPOINT, {'courses': [{'code': code, 'index': index} for code, index in courses], **data}, format='json')
+
+    def test_no_clash(self):
+        response = self.check([('MH1100', '70181'), ('SC1007', '10302')])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['semester'], '2024_1')
+        self.assertEqual(response.data['clash_matrix'], [[False, False], [False, False]])
+        self.assertEqual(response.data['clashes'], [])
+
+    def test_clashes(self):
+        with self.assertNumQueries(4): # semester, indexes, schedules, exams
+            response = self.check([('MH1100', '70181'), ('SC1007', '10301'), ('HE9091', '20001')])
+        self.assertEqual(response.data['clash_matrix'], [[False, True, True], [True, False, False], [True, False, False]])
+        self.assertEqual(response.data['clashes'], [
+            # tutorials on Tuesday, 0930-1030 and 1000-1130
+            {'courses': ['MH1100', 'SC1007'], 'indexes': ['70181', '10301'], 'type': 'class', 'slots': [{'day': 'TUE', 'time': '1000-1030'}]},
+            # the common lecture of MH1100 on Friday
+            {'courses': ['MH1100', 'HE9091'], 'indexes': ['70181', '20001'], 'type': 'class', 'slots': [{'day': 'FRI', 'time': '1030-1130'}]},
+            {'courses': ['MH1100', 'HE9091'], 'indexes': ['70181', '20001'], 'type': 'exam', 'date': '2024-11-25', 'slots': [{'time': '1300-1500'}]},
+        ])
+
+    def test_occupied(self):
+        occupied = mask_to_schedule(class_to_mask('FRI', '0800-1000'))
+        response = self.check([('MH1100', '70182'), ('SC1007', '10302')], occupied=occupied)
+        self.assertEqual(response.data['occupied_clashes'], [
+            {'code': 'MH1100', 'index': '70182', 'slots': [{'day': 'FRI', 'time': '0930-1000'}]},
+        ])
+
+    def test_unknown_index(self):
+        response = self.check([('MH1100', '70181'), ('SC1007', '70182')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['courses'], ['Index `70182` of course `SC1007` does not exist.'])
+        response = self.check([('MH1100', '70181')], occupied='X')
+        self.assertEqual(response.status_code, 400)
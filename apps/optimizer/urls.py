@@ -1,10 +1,11 @@
 from django.urls import path
 
-from .views import OptimizeView
+from .views import ClashCheckView, OptimizeView
 
 
 app_name = 'optimizer'
 
 urlpatterns = [
     path('optimize/', OptimizeView.as_view(), name='optimize'),
+    path('clash/', ClashCheckView.as_view(), name='clash'),
 ]
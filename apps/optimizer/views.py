@@ -1,15 +1,55 @@
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from apps.optimizer.serializers import OptimizerInputSerialzer
+from apps.common.cache import get_or_compute
+from apps.courses.mixins import get_requested_semester
+from apps.courses.schedules import schedule_to_mask
+from apps.optimizer.clash import check_clashes, load_timetable
+from apps.optimizer.serializers import ClashCheckInputSerializer, OptimizerInputSerialzer
 from apps.optimizer.algo import optimize_index
 
 
 class OptimizeView(generics.CreateAPIView):
+    '''
+    Optimize the indexes of a list of courses, results are kept in the shared cache until the next data version.
+    '''
     serializer_class = OptimizerInputSerialzer
 
     def create(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        output = optimize_index(serializer.validated_data)
-        return Response(output)
+        data = serializer.validated_data
+        key = (
+            [(course['code'], sorted(course.get('include', [])), sorted(course.get('exclude', []))) for course in data['courses']],
+            data.get('occupied', ''),
+        )
+        return Response(get_or_compute('optimizer', key, lambda: optimize_index(data)))
+
+
+class ClashCheckView(generics.CreateAPIView):
+    '''
+    Check a candidate timetable, a list of (course code, index) of the semester given by the `semester` query parameter
+    (defaults to the current semester), for clashes between classes, between exams, and with the `occupied` schedule.
+    See `apps/optimizer/clash.py` for the response format, results are kept in the shared cache until the next data version.
+    '''
+    serializer_class = ClashCheckInputSerializer
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        pairs = [(course['code'].upper(), course['index']) for course in data['courses']]
+        semester = get_requested_semester(request)
+        occupied = data.get('occupied', '')
+
+        def check():
+            entries, missing = load_timetable(pairs, semester) if semester is not None else ([], pairs)
+            if missing:
+                raise ValidationError({'courses': [f'Index `{index}` of course `{code}` does not exist.' for code, index in missing]})
+            return {
+                'semester': semester.code,
+                'courses': [{'code': entry.code, 'index': entry.index} for entry in entries],
+                **check_clashes(entries, schedule_to_mask(occupied)),
+            }
+        return Response(get_or_compute('clash', (semester and semester.code, pairs, occupied), check))
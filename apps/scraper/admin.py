@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from apps.scraper.models import ScraperRun
+
+
+class ScraperRunAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'scraper', 'semester', 'status', 'started_at', 'duration', 'items', 'items_per_second',
+        'requests', 'bytes_downloaded', 'retries', 'failures', 'rows_written',
+    ]
+    list_filter = ['scraper', 'status', 'semester']
+    readonly_fields = [field.name for field in ScraperRun._meta.fields] + ['items_per_second']
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(ScraperRun, ScraperRunAdmin)
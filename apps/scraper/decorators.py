@@ -2,11 +2,22 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
 
+semester_parameter = openapi.Parameter('semester', openapi.IN_QUERY, description="Semester to scrape, e.g. 2024_1 (defaults to CURRENT_SEMESTER setting)", type=openapi.TYPE_STRING, default=None)
+
+
 def custom_swagger_index_schema(func):
     return swagger_auto_schema(
         method='get',
         manual_parameters=[
             openapi.Parameter('start_index', openapi.IN_QUERY, description="Start index for scraping (inclusive)", type=openapi.TYPE_INTEGER, default=0),
-            openapi.Parameter('end_index', openapi.IN_QUERY, description="End index for scraping (exclusive)", type=openapi.TYPE_INTEGER, default=None)
+            openapi.Parameter('end_index', openapi.IN_QUERY, description="End index for scraping (exclusive)", type=openapi.TYPE_INTEGER, default=None),
+            semester_parameter,
         ]
     )(func)
+
+
+def custom_swagger_semester_schema(func):
+    return swagger_auto_schema(
+        method='get',
+        manual_parameters=[semester_parameter]
+    )(func)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.cache import bump_data_version
+from apps.scraper.utils.prerequisite_compiler import compile_all_prerequisites
+
+
+'''
+Usage: python manage.py compile_prerequisites
+Recompile the prerequisite trees of all courses from their scraped prerequisite text.
+The course detail scraper already compiles the prerequisites of the courses it updates.
+'''
+class Command(BaseCommand):
+    help = 'Recompile the prerequisite trees of all courses'
+
+    def handle(self, *args, **options):
+        changed = compile_all_prerequisites()
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f'Compiled prerequisites, {changed} prerequisite trees changed'))
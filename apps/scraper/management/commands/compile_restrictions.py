@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.cache import bump_data_version
+from apps.scraper.utils.restriction_compiler import compile_all_restrictions
+
+
+'''
+Usage: python manage.py compile_restrictions
+Rebuild the mutual exclusion and programme restriction rows of all courses from their scraped text.
+The course detail scraper already rebuilds the rows of the courses it updates.
+'''
+class Command(BaseCommand):
+    help = 'Rebuild the mutual exclusion and programme restriction rows of all courses'
+
+    def handle(self, *args, **options):
+        count = compile_all_restrictions()
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f'Compiled restrictions of {count} courses'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.cache import bump_data_version
+from apps.scraper.utils.venue_compiler import compile_all_venue_occupancy
+
+
+'''
+Usage: python manage.py compile_venues
+Rebuild the weekly occupancy rows of the venues of all semesters from their class schedules.
+The course scraper already rebuilds the rows of the semester it scrapes.
+'''
+class Command(BaseCommand):
+    help = 'Rebuild the weekly venue occupancy of all semesters'
+
+    def handle(self, *args, **options):
+        count = compile_all_venue_occupancy()
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f'Compiled occupancy of {count} venues'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.scraper.utils.fixture_server import create_fixture_server
+from apps.scraper.utils.page_cache import get_cache_dir
+
+
+'''
+Usage: python manage.py scraper_fixture_server [--host 127.0.0.1] [--port 8765] [--cache-dir <dir>]
+Serve the pages recorded in the scraper cache as a local stand-in for the NTU websites.
+Run the scrapers with SCRAPER_UPSTREAM_URL=http://<host>:<port> to use it.
+'''
+class Command(BaseCommand):
+    help = 'Serve recorded scraper pages as a local stand-in for the NTU websites'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--cache-dir', default=None)
+
+    def handle(self, *args, **options):
+        cache_dir = options['cache_dir'] or get_cache_dir()
+        server = create_fixture_server(cache_dir, options['host'], options['port'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Serving scraper pages from {cache_dir} at http://{options["host"]}:{options["port"]}'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
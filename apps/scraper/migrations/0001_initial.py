@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScraperRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scraper', models.CharField(choices=[('course', 'Course'), ('detail', 'Course Detail'), ('program', 'Program'), ('exam', 'Exam Schedule')], max_length=20)),
+                ('semester', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('stage_durations', models.JSONField(blank=True, default=dict)),
+                ('items', models.IntegerField(default=0)),
+                ('requests', models.IntegerField(default=0)),
+                ('bytes_downloaded', models.BigIntegerField(default=0)),
+                ('retries', models.IntegerField(default=0)),
+                ('failures', models.IntegerField(default=0)),
+                ('failure_reasons', models.JSONField(blank=True, default=list)),
+                ('rows_written', models.IntegerField(default=0)),
+                ('changes', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['scraper', '-started_at'], name='scraperrun_scraper_started')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import models
+from django.utils import timezone as tz
+
+
+class ScraperRun(models.Model):
+    '''
+    ScraperRun model to store the instrumentation of a single scraper run, recorded by RunRecorder
+    (see `apps/scraper/utils/instrumentation.py`). Fields include:
+    - scraper: which scraper ran (course, detail, program or exam)
+    - semester: semester code the run scraped for, e.g. '2024_1' (not applicable to the exam scraper)
+    - status: running, succeeded, or failed when the run was aborted by an error
+    - started_at, finished_at, duration: wall time of the run, duration in seconds
+    - stage_durations: seconds spent in each stage, `fetch`, `parse`, `process` and `save`
+    - items: number of items (courses, pages, programs or exams) handled by the run
+    - requests, bytes_downloaded, retries: pages fetched, their total size and the number of retried requests
+    - failures, failure_reasons: number of failed items, and the item and error of the first ones
+    - rows_written: number of database rows inserted, updated or deleted
+    - changes: change report of the run (see `apps/scraper/utils/change_detection.py`)
+    '''
+    class Scraper(models.TextChoices):
+        COURSE = 'course', 'Course'
+        DETAIL = 'detail', 'Course Detail'
+        PROGRAM = 'program', 'Program'
+        EXAM = 'exam', 'Exam Schedule'
+
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    scraper = models.CharField(max_length=20, choices=Scraper.choices)
+    semester = models.CharField(max_length=100, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    started_at = models.DateTimeField(default=tz.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    stage_durations = models.JSONField(default=dict, blank=True)
+    items = models.IntegerField(default=0)
+    requests = models.IntegerField(default=0)
+    bytes_downloaded = models.BigIntegerField(default=0)
+    retries = models.IntegerField(default=0)
+    failures = models.IntegerField(default=0)
+    failure_reasons = models.JSONField(default=list, blank=True)
+    rows_written = models.IntegerField(default=0)
+    changes = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['scraper', '-started_at'], name='scraperrun_scraper_started'),
+        ]
+
+    @property
+    def items_per_second(self):
+        if not self.duration:
+            return None
+        return round(self.items / self.duration, 2)
+
+    def __str__(self):
+        return f'<ScraperRun #{self.id}: ({self.scraper}) {self.status}>'
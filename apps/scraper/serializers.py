@@ -0,0 +1,29 @@
+from rest_framework import serializers
+
+from apps.scraper.models import ScraperRun
+
+
+class ScraperRunSerializer(serializers.ModelSerializer):
+    items_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ScraperRun
+        fields = [
+            'id',
+            'scraper',
+            'semester',
+            'status',
+            'started_at',
+            'finished_at',
+            'duration',
+            'stage_durations',
+            'items',
+            'items_per_second',
+            'requests',
+            'bytes_downloaded',
+            'retries',
+            'failures',
+            'failure_reasons',
+            'rows_written',
+            'changes',
+        ]
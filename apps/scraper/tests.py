@@ -0,0 +1,348 @@
+from copy import deepcopy
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.courses.models import Course, CourseIndex, CourseProgram, CoursePrerequisite, CourseSchedule, Semester
+from apps.scraper.models import ScraperRun
+from apps.scraper.utils.course_scraper import process_data, save_course_data
+from apps.scraper.utils.change_detection import new_change_report
+from apps.scraper.utils.detail_scraper import perform_course_detail_scraping
+from apps.scraper.utils.fixture_server import create_fixture_server
+from apps.scraper.utils.instrumentation import RunRecorder
+from apps.scraper.utils.page_cache import FetchedPage, PageNotCached, fetch, load_page, store_page
+from apps.scraper.utils.parsers import parse_course_detail_page, parse_program_page
+from apps.scraper.utils.program_scraper import save_programs_courses
+from apps.scraper.utils.pipeline import parse_pages
+
+
+LECTURE = {'type': 'LEC/STUDIO', 'group': 'LE', 'day': 'FRI', 'time': '0930-1120', 'venue': 'LT23', 'remark': ''}
+
+RAW_DATA = [
+    (
+        {'course_code': 'MH1100', 'course_name': 'CALCULUS I', 'academic_units': 4},
+        [
+            {'index': '70181', 'info': [
+                LECTURE,
+                {'type': 'TUT', 'group': 'T1', 'day': 'TUE', 'time': '0930-1020', 'venue': 'TR+5', 'remark': ''},
+            ]},
+            {'index': '70182', 'info': [
+                LECTURE,
+                {'type': 'TUT', 'group': 'T2', 'day': 'WED', 'time': '0930-1020', 'venue': 'TR+6', 'remark': ''},
+            ]},
+        ],
+    ),
+    (
+        {'course_code': 'SC1007', 'course_name': 'DATA STRUCTURES & ALGORITHMS', 'academic_units': 3},
+        [
+            {'index': '10301', 'info': [
+                {'type': 'LAB', 'group': 'L1', 'day': 'MON', 'time': '1030-1220', 'venue': 'SWLAB1', 'remark': ''},
+            ]},
+        ],
+    ),
+]
+
+
+class ProcessDataTestCase(TestCase):
+    def test_schedules_and_information(self):
+        mh1100 = process_data(RAW_DATA)[0]
+        self.assertEqual(mh1100['prefix'], 'MH')
+        self.assertEqual(mh1100['level'], 1)
+        # only the Friday lecture (9.30am to 11.30am) is common to both indexes
+        self.assertEqual(mh1100['common_schedule'], 'O' * 128 + 'O' * 3 + 'X' * 4 + 'O' * 25 + 'O' * 32)
+        self.assertEqual(mh1100['common_information'], 'LEC/STUDIO^LE^FRI^0930-1120^LT23^')
+        self.assertEqual(mh1100['indexes'][0]['filtered_information'], 'TUT^T1^TUE^0930-1020^TR+5^')
+        self.assertEqual(mh1100['indexes'][0]['schedule'].count('X'), 6)
+        self.assertEqual(mh1100['indexes'][0]['schedule'][32 + 3:32 + 5], 'XX')
+        self.assertEqual(mh1100['indexes'][1]['schedules'][0]['venue'], 'TR+6')
+
+    def test_save_course_schedules(self):
+        semester = Semester.get_or_create_from_code('2024_1')
+        save_course_data(process_data(RAW_DATA), semester)
+        self.assertEqual(CourseSchedule.objects.filter(common_schedule_for_course='MH1100', semester=semester).count(), 1)
+        schedule = CourseSchedule.objects.get(index__index='70182')
+        self.assertEqual(schedule.group, 'T2')
+        self.assertEqual(schedule.schedule[64 + 3:64 + 5], 'XX')
+        # parsed day, slots and class type: Wednesday 9.30am to 10.30am
+        self.assertEqual((schedule.weekday, schedule.start_slot, schedule.end_slot, schedule.class_type), (2, 3, 5, 'TUT'))
+        lecture = CourseSchedule.objects.get(common_schedule_for_course='MH1100')
+        self.assertEqual((lecture.weekday, lecture.start_slot, lecture.end_slot, lecture.class_type), (4, 3, 7, 'LEC'))
+        # the information of the course detail is served from the class rows
+        course = Course.objects.prefetch_related('common_schedules').get(code='MH1100')
+        self.assertEqual(course.get_common_information, [
+            {'type': 'LEC/STUDIO', 'group': 'LE', 'day': 'FRI', 'time': '0930-1120', 'venue': 'LT23', 'remark': ''},
+        ])
+        self.assertEqual(CourseIndex.objects.get(index='70182').get_filtered_information[0]['venue'], 'TR+6')
+
+
+class SaveCourseDataTestCase(TestCase):
+    def setUp(self):
+        self.semester = Semester.get_or_create_from_code('2024_1')
+
+    def test_first_run_adds_everything(self):
+        report = save_course_data(process_data(RAW_DATA), self.semester)
+        self.assertEqual(report['added_courses'], ['MH1100', 'SC1007'])
+        self.assertEqual(report['added_indexes'], ['10301', '70181', '70182'])
+        self.assertEqual(report['unchanged'], 0)
+        self.assertEqual(Course.objects.get(code='MH1100').prefix, 'MH')
+
+    def test_rerun_without_changes_is_skipped(self):
+        save_course_data(process_data(RAW_DATA), self.semester)
+        last_updated = Course.objects.get(code='MH1100').last_updated
+        report = save_course_data(process_data(RAW_DATA), self.semester)
+        self.assertEqual(report['added_courses'], [])
+        self.assertEqual(report['modified_courses'], [])
+        self.assertEqual(report['unchanged'], 2)
+        self.assertEqual(Course.objects.get(code='MH1100').last_updated, last_updated)
+
+    def test_only_diff_is_reported(self):
+        save_course_data(process_data(RAW_DATA), self.semester)
+        raw_data = deepcopy(RAW_DATA[:1])
+        raw_data[0][1][0]['info'][1] = {**raw_data[0][1][0]['info'][1], 'day': 'THU'}
+        del raw_data[0][1][1]
+        report = save_course_data(process_data(raw_data), self.semester)
+        self.assertEqual(report['modified_courses'], ['MH1100'])
+        # with a single index left, every class of MH1100 becomes common information
+        self.assertEqual(report['modified_indexes'], ['70181'])
+        self.assertEqual(report['removed_indexes'], ['70182'])
+        self.assertEqual(report['removed_courses'], ['SC1007'])
+        self.assertFalse(Course.objects.filter(code='SC1007').exists())
+        self.assertEqual(
+            Course.objects.get(code='MH1100').common_information,
+            'LEC/STUDIO^LE^FRI^0930-1120^LT23^;TUT^T1^THU^0930-1020^TR+5^',
+        )
+        self.assertEqual(CourseIndex.objects.get(index='70181').filtered_information, '')
+
+    def test_semesters_are_kept_apart(self):
+        next_semester = Semester.get_or_create_from_code('2024_2')
+        save_course_data(process_data(RAW_DATA), self.semester)
+        report = save_course_data(process_data(RAW_DATA[:1]), next_semester)
+        self.assertEqual(report['added_courses'], ['MH1100'])
+        self.assertEqual(report['added_indexes'], ['70181', '70182'])
+        # the same index number exists once per semester
+        self.assertEqual(CourseIndex.objects.filter(index='70181').count(), 2)
+        self.assertEqual(CourseSchedule.objects.filter(index__index='70182', semester=next_semester).count(), 1)
+        self.assertEqual(Course.objects.get(code='MH1100').scraped_for, '2024_1')
+
+        # a course dropped from one semester is kept while it is offered in another
+        report = save_course_data(process_data(RAW_DATA[1:]), self.semester)
+        self.assertEqual(report['removed_courses'], ['MH1100'])
+        course = Course.objects.get(code='MH1100')
+        self.assertEqual(list(course.semesters.values_list('code', flat=True)), ['2024_2'])
+        self.assertFalse(course.indexes.filter(semester=self.semester).exists())
+
+
+class PageCacheTestCase(SimpleTestCase):
+    URL = 'https://wis.ntu.edu.sg/webexe/owa/AUS_SUBJ_CONT.main_display1'
+    FORM_DATA = {'acadsem': '2024_1', 'r_subj_code': 'MH1100', 'boption': 'Search'}
+
+    def setUp(self):
+        self.cache_dir = TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_store_and_load_page(self):
+        store_page('POST', self.URL, self.FORM_DATA, FetchedPage(200, b'<html>MH1100</html>'), self.cache_dir.name)
+        page = load_page('POST', self.URL, dict(reversed(self.FORM_DATA.items())), self.cache_dir.name)
+        self.assertEqual(page, FetchedPage(200, b'<html>MH1100</html>'))
+        self.assertIsNone(load_page('POST', self.URL, {**self.FORM_DATA, 'r_subj_code': 'SC1007'}, self.cache_dir.name))
+
+    def test_replay_mode(self):
+        store_page('POST', self.URL, self.FORM_DATA, FetchedPage(200, b'<html>MH1100</html>'), self.cache_dir.name)
+        with override_settings(SCRAPER_CACHE_MODE='replay', SCRAPER_CACHE_DIR=self.cache_dir.name):
+            self.assertEqual(fetch(self.URL, data=self.FORM_DATA).content, b'<html>MH1100</html>')
+            with self.assertRaises(PageNotCached):
+                fetch(self.URL)
+
+    def test_fixture_server(self):
+        store_page('POST', self.URL, self.FORM_DATA, FetchedPage(200, b'<html>MH1100</html>'), self.cache_dir.name)
+        server = create_fixture_server(self.cache_dir.name, port=0)
+        Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        upstream = f'http://127.0.0.1:{server.server_address[1]}'
+        with override_settings(SCRAPER_CACHE_MODE='off', SCRAPER_UPSTREAM_URL=upstream):
+            self.assertEqual(fetch(self.URL, data=self.FORM_DATA), FetchedPage(200, b'<html>MH1100</html>'))
+            self.assertEqual(fetch(self.URL).status_code, 404)
+
+
+DETAIL_PAGE = b"""
+<html><body><table>
+<tr><td>Course</td><td>Title</td><td>AU</td><td>Department</td></tr>
+<tr><td>MH1811</td><td>MATHEMATICS 2</td><td>3.0 AU</td><td>MATH(SPS)</td></tr>
+<tr><td>Prerequisite:</td><td>MH1810</td></tr>
+<tr><td>Mutually exclusive with:</td><td>MH1100, MH1101</td></tr>
+<tr><td>Not offered as Unrestricted Elective</td></tr>
+<tr><td>This course introduces multivariable calculus.</td></tr>
+<tr><td>&nbsp;</td></tr>
+</table></body></html>
+"""
+
+PROGRAM_PAGE = b"""
+<html><body>
+<table><tr><td>MH1810</td><td>MATHEMATICS 1</td></tr></table>
+<table><tr><td>MH1811</td><td>MATHEMATICS 2</td></tr></table>
+</body></html>
+"""
+
+
+class ParsePipelineTestCase(SimpleTestCase):
+    def test_parse_course_detail_page(self):
+        details = parse_course_detail_page(DETAIL_PAGE)
+        self.assertEqual(details['description'], 'This course introduces multivariable calculus.')
+        self.assertEqual(details['prerequisite'], 'MH1810')
+        self.assertEqual(details['mutually_exclusive'], 'MH1100, MH1101')
+        self.assertIsNone(details['not_available'])
+        self.assertFalse(details['offered_as_ue'])
+        self.assertTrue(details['offered_as_bde'])
+        self.assertEqual(details['department_maintaining'], 'MATH(SPS)')
+
+    def test_parse_pages_in_worker_processes(self):
+        pages = [('page-1', PROGRAM_PAGE), ('page-2', b'<html><body></body></html>'), ('page-3', PROGRAM_PAGE)]
+        results = {item: (result, error) for item, result, error in parse_pages(parse_program_page, pages, workers=2)}
+        self.assertEqual(results['page-1'], (['MH1810', 'MH1811'], None))
+        self.assertEqual(results['page-2'], ([], None))
+        self.assertEqual(results['page-3'], (['MH1810', 'MH1811'], None))
+
+
+class DetailScraperReplayTestCase(TestCase):
+    ENDPOINT = 'https://wis.ntu.edu.sg/webexe/owa/AUS_SUBJ_CONT.main_display1'
+
+    def setUp(self):
+        self.cache_dir = TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        course = Course.objects.create(code='MH1811', name='MATHEMATICS 2', academic_units=3)
+        course.semesters.add(Semester.get_or_create_from_code('2024_1'))
+        form_data = {'acadsem': '2024_1', 'r_subj_code': 'MH1811', 'boption': 'Search', 'acad': '2024', 'semester': '1'}
+        store_page('POST', self.ENDPOINT, form_data, FetchedPage(200, DETAIL_PAGE), self.cache_dir.name)
+
+    def test_replayed_details_are_saved_once(self):
+        with override_settings(SCRAPER_CACHE_MODE='replay', SCRAPER_CACHE_DIR=self.cache_dir.name):
+            report = perform_course_detail_scraping(0, 10, '2024_1')
+            self.assertEqual(report['modified_courses'], ['MH1811'])
+            course = Course.objects.get(code='MH1811')
+            self.assertEqual(course.prerequisite, 'MH1810')
+            self.assertEqual(course.prerequisites_tree, {'or': [{'and': ['MH1810']}]})
+            self.assertEqual(CoursePrerequisite.objects.get(course=course).child_nodes, {'and': [{'or': ['MH1810']}]})
+            self.assertFalse(course.offered_as_ue)
+
+            report = perform_course_detail_scraping(0, 10, '2024_1')
+            self.assertEqual(report['modified_courses'], [])
+            self.assertEqual(report['unchanged'], 1)
+
+    def test_runs_are_recorded(self):
+        with override_settings(SCRAPER_CACHE_MODE='replay', SCRAPER_CACHE_DIR=self.cache_dir.name):
+            perform_course_detail_scraping(0, 10, '2024_1')
+            Course.objects.create(code='MH1812', name='MATHEMATICS 3', academic_units=3).semesters.add(
+                Semester.objects.get(code='2024_1')
+            )
+            perform_course_detail_scraping(0, 10, '2024_1')
+        first, second = ScraperRun.objects.order_by('id')
+        self.assertEqual(first.scraper, 'detail')
+        self.assertEqual(first.semester, '2024_1')
+        self.assertEqual(first.status, 'succeeded')
+        self.assertEqual((first.items, first.requests, first.failures), (1, 1, 0))
+        self.assertEqual(first.bytes_downloaded, len(DETAIL_PAGE))
+        self.assertGreater(first.rows_written, 1) # course and its compiled prerequisite
+        self.assertEqual(set(first.stage_durations), {'fetch', 'parse', 'process', 'save'})
+        self.assertEqual(first.changes['modified_courses'], ['MH1811'])
+        # MH1811 is unchanged, MH1812 was not recorded in the cache
+        self.assertEqual((second.items, second.requests, second.failures, second.rows_written), (2, 1, 1, 0))
+        self.assertEqual(second.failure_reasons[0]['item'], 'MH1812')
+        self.assertIn('PageNotCached', second.failure_reasons[0]['reason'])
+
+
+    def test_invalid_semester_is_recorded(self):
+        report = perform_course_detail_scraping(0, 10, '2024_X')
+        self.assertEqual(report['modified_courses'], [])
+        run = ScraperRun.objects.get()
+        self.assertEqual((run.semester, run.status), ('2024_X', 'failed'))
+        self.assertIn('ValidationError', run.failure_reasons[0]['reason'])
+        self.assertFalse(Semester.objects.filter(code='2024_X').exists())
+
+
+class ProgramScraperReplayTestCase(TestCase):
+    ENDPOINT = 'https://wis.ntu.edu.sg/webexe/owa/AUS_SUBJ_CONT.main_display1'
+
+    def setUp(self):
+        self.cache_dir = TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.semester = Semester.get_or_create_from_code('2024_1')
+        self.program = CourseProgram.objects.create(name='Mathematical Sciences Year 1', value='MAS;;1;F', year=1)
+        Course.objects.create(code='MH1810', name='MATHEMATICS 1', academic_units=3)
+        form_data = {'acadsem': '2024_1', 'r_course_yr': 'MAS;;1;F', 'r_subj_code': '', 'boption': 'CLoad', 'acad': '2024', 'semester': '1'}
+        store_page('POST', self.ENDPOINT, form_data, FetchedPage(200, PROGRAM_PAGE), self.cache_dir.name)
+
+    def scrape(self):
+        report = new_change_report()
+        with RunRecorder(ScraperRun.Scraper.PROGRAM, '2024_1'):
+            save_programs_courses(0, 10, report, self.semester)
+        return report
+
+    def test_course_scraped_later_is_linked(self):
+        with override_settings(SCRAPER_CACHE_MODE='replay', SCRAPER_CACHE_DIR=self.cache_dir.name):
+            self.scrape()
+            self.assertEqual(list(self.program.courses.values_list('code', flat=True)), ['MH1810'])
+            # the page did not change, but MH1811 is now stored
+            Course.objects.create(code='MH1811', name='MATHEMATICS 2', academic_units=3)
+            report = self.scrape()
+            self.assertEqual(report['modified_programs'], ['Mathematical Sciences Year 1'])
+            self.assertEqual(sorted(self.program.courses.values_list('code', flat=True)), ['MH1810', 'MH1811'])
+            self.assertEqual(self.scrape()['unchanged'], 1)
+
+
+class RunRecorderTestCase(TestCase):
+    def test_nested_stages(self):
+        with RunRecorder(ScraperRun.Scraper.COURSE, '2024_1') as run:
+            self.assertEqual(ScraperRun.objects.get().status, 'running')
+            with run.stage('parse'):
+                sleep(0.02)
+                with run.stage('fetch'):
+                    sleep(0.05)
+        stages = ScraperRun.objects.get().stage_durations
+        self.assertGreaterEqual(stages['fetch'], 0.05)
+        self.assertLess(stages['parse'], 0.05)
+        self.assertEqual(stages['save'], 0)
+
+    def test_rows_written(self):
+        with RunRecorder(ScraperRun.Scraper.COURSE) as run:
+            Course.objects.bulk_create([Course(code=f'MH110{i}', name='', academic_units=3) for i in range(3)])
+            Course.objects.filter(code__in=['MH1100', 'MH1101']).update(academic_units=4)
+            list(Course.objects.all())
+        self.assertEqual(ScraperRun.objects.get().rows_written, 5)
+
+    def test_aborted_run(self):
+        with self.assertRaises(ValueError):
+            with RunRecorder(ScraperRun.Scraper.EXAM) as run:
+                run.fail('MH1100', 'Course does not exist')
+                raise ValueError('no exam table')
+        scraper_run = ScraperRun.objects.get()
+        self.assertEqual(scraper_run.status, 'failed')
+        self.assertEqual(scraper_run.failures, 2)
+        self.assertEqual(scraper_run.failure_reasons, [
+            {'item': 'MH1100', 'reason': 'Course does not exist'},
+            {'item': None, 'reason': 'ValueError: no exam table'},
+        ])
+
+
+class ScraperRunAPITestCase(APITestCase):
+    def setUp(self):
+        ScraperRun.objects.create(scraper='course', status='succeeded', items=100, duration=4.0)
+        ScraperRun.objects.create(scraper='exam', status='failed')
+
+    def test_superuser_only(self):
+        self.assertEqual(self.client.get(reverse('scraper:runs')).status_code, 403)
+
+    def test_runs(self):
+        self.client.force_authenticate(user=User.objects.create_superuser('admin'))
+        response = self.client.get(reverse('scraper:runs'))
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get(reverse('scraper:runs'), {'scraper': 'course'})
+        run = response.data['results'][0]
+        self.assertEqual((response.data['count'], run['scraper'], run['items_per_second']), (1, 'course', 25.0))
+        response = self.client.get(reverse('scraper:run-detail', kwargs={'pk': run['id']}))
+        self.assertEqual(response.data['items'], 100)
@@ -10,4 +10,6 @@ urlpatterns = [
     path('detail/', views.get_detail_data, name='detail'),
     path('exam/', views.get_exam_data, name='exam'),
     path('program/', views.get_program_data, name='program'),
+    path('runs/', views.ScraperRunListView.as_view(), name='runs'),
+    path('runs/<int:pk>/', views.ScraperRunDetailView.as_view(), name='run-detail'),
 ]
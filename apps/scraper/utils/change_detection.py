@@ -0,0 +1,57 @@
+from typing import Dict, List, Union
+import hashlib
+import json
+
+
+'''
+Compute a stable SHA-256 hex digest of scraped content.
+Raw page content (bytes or str) is hashed as is, while processed data (dict / list)
+is serialized to canonical JSON first, so that key order does not affect the hash.
+'''
+def compute_hash(content: Union[bytes, str, Dict, List]) -> str:
+    if isinstance(content, bytes):
+        data = content
+    elif isinstance(content, str):
+        data = content.encode('utf-8')
+    else:
+        data = json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+'''
+Return an empty change report, filled in by the scrapers while saving data.
+Each key maps to a sorted list of course codes, index numbers or program names.
+`unchanged` counts the items skipped because their content hash did not change.
+'''
+def new_change_report() -> Dict:
+    return {
+        'added_courses': [],
+        'removed_courses': [],
+        'modified_courses': [],
+        'added_indexes': [],
+        'removed_indexes': [],
+        'modified_indexes': [],
+        'added_programs': [],
+        'modified_programs': [],
+        'unchanged': 0,
+    }
+
+'''
+Sort every list in the change report so that the output is deterministic, then return it.
+'''
+def finalize_change_report(report: Dict) -> Dict:
+    for key, value in report.items():
+        if isinstance(value, list):
+            value.sort()
+    return report
+
+'''
+Return a one-line human readable summary of the change report.
+'''
+def summarize_change_report(report: Dict) -> str:
+    parts = [
+        f'{key.replace("_", " ")}: {len(value)}'
+        for key, value in report.items()
+        if isinstance(value, list) and value
+    ]
+    parts.append(f'unchanged: {report["unchanged"]}')
+    return ', '.join(parts)
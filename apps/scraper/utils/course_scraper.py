@@ -1,11 +1,33 @@
 from bs4 import BeautifulSoup, element
-from collections import Counter
-from django.db.utils import IntegrityError
-from urllib import request
-from typing import Dict, List, Tuple
+from django.conf import settings
+from functools import reduce
+from operator import and_, itemgetter
+from typing import Dict, List, Optional, Tuple
+import logging
 import re
 
-from apps.courses.models import Course, CourseIndex, CoursePrefix
+from apps.courses.models import INFORMATION_KEYS, Course, CourseIndex, CourseOffering, CoursePrefix, CourseSchedule, Semester
+from apps.courses.schedules import (
+    FULL_WEEK_MASK,
+    class_to_mask,
+    class_to_schedule,
+    class_to_slots,
+    mask_to_schedule,
+    parse_class_type,
+)
+from apps.scraper.models import ScraperRun
+from apps.scraper.utils.change_detection import (
+    compute_hash,
+    finalize_change_report,
+    new_change_report,
+    summarize_change_report,
+)
+from apps.scraper.utils.instrumentation import RunRecorder
+from apps.scraper.utils.page_cache import fetch
+from apps.scraper.utils.venue_compiler import save_venue_occupancy
+
+
+logger = logging.getLogger('apps.scraper')
 
 
 '''
@@ -14,9 +36,10 @@ Get HTML content from NTU course schedule website, given academic year and semes
 def get_soup_from_url(acadyear: str, acadsem: str) -> BeautifulSoup:
     get_url = lambda acadyear, acadsem: f"https://wish.wis.ntu.edu.sg/webexe/owa/AUS_SCHEDULE.main_display1?acadsem={acadyear};{acadsem}&staff_access=true&r_search_type=F&boption=Search&r_subj_code="
     url = get_url(acadyear, acadsem)
-    with request.urlopen(url) as fp:
-        soup = BeautifulSoup(fp, "lxml")
-        return soup
+    response = fetch(url)
+    if response.status_code != 200:
+        raise Exception(f'Failed to get response, status code: {response.status_code}')
+    return BeautifulSoup(response.content, "lxml")
 
 '''
 Return a list of raw data with length (end-start+1) containing 2-sized tuples,
@@ -100,11 +123,27 @@ def get_raw_data(soup: BeautifulSoup, start: int=0, end: int=9999) -> List[Tuple
         raw_data.append((header_info, schedule_info))
     return raw_data
 
+get_information_row = itemgetter(*INFORMATION_KEYS)
+
+'''
+Convert an information row tuple to a dict with the CourseSchedule fields,
+including the weekly `schedule` string of that single class and its parsed day, slots and class type.
+'''
+def serialize_row(row: Tuple[str, ...]) -> Dict:
+    serialized = dict(zip(INFORMATION_KEYS, row))
+    serialized['schedule'] = class_to_schedule(row[2], row[3])
+    serialized['weekday'], serialized['start_slot'], serialized['end_slot'] = class_to_slots(row[2], row[3])
+    serialized['class_type'] = parse_class_type(row[0])
+    return serialized
+
 '''
 Takes as input raw_data from get_raw_data function and return processed data.
 Processed data is a list of dict with key `course_code`, `course_name`, `academic_units`,
-`common_schedule`, `common_information`, `prefix`, `level`, and `indexes`.
-`indexes` is a list of dict with key `index`, `schedule`, `information`, and `filtered_information`.
+`common_schedule`, `common_information`, `common_schedules`, `prefix`, `level`, and `indexes`.
+`indexes` is a list of dict with key `index`, `schedule`, `information`, `filtered_information` and `schedules`.
+`common_schedules` and `schedules` are lists of CourseSchedule fields (see `serialize_row`),
+for the classes common to all indexes and the classes specific to the index respectively.
+Schedules are computed as integer bitmasks (see `apps/courses/schedules.py`).
 '''
 def process_data(raw_data: List[Tuple[dict, List]]) -> List[Dict]:
     processed_data = []
@@ -131,133 +170,187 @@ def process_data(raw_data: List[Tuple[dict, List]]) -> List[Dict]:
             level = first_digit if 1 <= first_digit <= 5 else 10
         clean_data['level'] = level
 
-        # get required data for all indexes of this course
+        # intern every information row as a tuple, mapped to its information string, so that a row shared
+        # by many indexes (e.g. a common lecture) is joined, hashed and compared only once
+        interned_rows = {}
         indexes_data = []
+        indexes_rows = []
+        schedule_masks = []
         for index_data in data[1]:
-            index_info = {}
-            index_info['index'] = index_data['index']
-
-            # get schedule list for each index
-            schedule_list = ['O'] * 32 * 6 # 32 chars for 16 hours, 6 days a week, per 30mins interval
-            for row_info in index_data['info']:
-                day, time = row_info['day'], row_info['time']
-                days_list = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
-                if day not in days_list:
-                    continue # edge case: there is an online course with no scheduled day
-                day_index = 32 * days_list.index(day)
-                start_time, end_time = time.split('-')
-                start_index = (int(start_time[0:2]) - 8) * 2 + \
-                    (1 if start_time[2:] == '30' else 0)
-                end_index = (int(end_time[0:2]) - 8) * 2 + \
-                    (1 if end_time[2:] == '20' else 0)
-                schedule_list[day_index + start_index: day_index + end_index] = ['X'] * (end_index - start_index)
-            index_info['schedule'] = schedule_list
-
-            # get information string for each index
-            information_list = []
+            rows = []
+            schedule_mask = 0
             for row_info in index_data['info']:
-                information = '^'.join([
-                    row_info['type'],
-                    row_info['group'],
-                    row_info['day'],
-                    row_info['time'],
-                    row_info['venue'],
-                    row_info['remark']
-                ])
-                information_list.append(information)
-            index_info['information'] = ';'.join(information_list)
-
-            indexes_data.append(index_info)
+                row = get_information_row(row_info)
+                if row not in interned_rows:
+                    interned_rows[row] = '^'.join(row)
+                rows.append(row)
+                # index schedule is the union of the bitmasks of all its classes
+                schedule_mask |= class_to_mask(row[2], row[3])
+            indexes_rows.append(rows)
+            schedule_masks.append(schedule_mask)
+            indexes_data.append({
+                'index': index_data['index'],
+                'schedule': mask_to_schedule(schedule_mask),
+                'information': ';'.join(interned_rows[row] for row in rows),
+            })
         clean_data['indexes'] = indexes_data
 
-        # get common schedule (that time slot is occupied in all indexes)
-        def get_common_schedule_str(*args):
-            common_schedule_list = []
-            for values in zip(*args):
-                if all(val == 'X' for val in values):
-                    common_schedule_list.append('X')
-                else:
-                    common_schedule_list.append('O')
-            return ''.join(common_schedule_list)
-        schedules_list = [index['schedule'] for index in indexes_data]
-        common_schedule = get_common_schedule_str(*schedules_list)
-        clean_data['common_schedule'] = common_schedule
-
-        # convert schedule list to string for all indexes
-        for index in indexes_data:
-            index['schedule'] = ''.join(index['schedule'])
+        # get common schedule (that time slot is occupied in all indexes) by AND-reducing the index bitmasks
+        common_schedule_mask = reduce(and_, schedule_masks, FULL_WEEK_MASK) if schedule_masks else 0
+        clean_data['common_schedule'] = mask_to_schedule(common_schedule_mask)
 
-        # get `common_information`, a string containing information that is common to all indexes
-        information_dict = Counter()
-        for index_data in indexes_data:
-            information_dict.update(index_data['information'].split(';'))
-        common_information_list = [info for info, count in information_dict.items() if count == len(indexes_data)]
-        clean_data['common_information'] = ';'.join(common_information_list)
+        # get `common_information`, the rows that are present in all indexes, in scraped order
+        common_rows, common_rows_list = set(), []
+        if indexes_rows:
+            common_rows = set(indexes_rows[0]).intersection(*indexes_rows[1:])
+            common_rows_list = [row for row in dict.fromkeys(indexes_rows[0]) if row in common_rows]
+        clean_data['common_information'] = ';'.join(interned_rows[row] for row in common_rows_list)
+        clean_data['common_schedules'] = [serialize_row(row) for row in common_rows_list]
 
         # get `filtered_information` field for each index, containing information that is not common to all indexes
-        for index in indexes_data:
-            index['filtered_information'] = ';'.join(set(index['information'].split(';')) - set(common_information_list))
+        # keep the scraped order (instead of a set difference) so that the content hash is stable across runs
+        for index, rows in zip(indexes_data, indexes_rows):
+            filtered_rows = [row for row in dict.fromkeys(rows) if row not in common_rows]
+            index['filtered_information'] = ';'.join(interned_rows[row] for row in filtered_rows)
+            index['schedules'] = [serialize_row(row) for row in filtered_rows]
 
         processed_data.append(clean_data)
     return processed_data
 
 '''
-Takes as input processed_data from process_data function and simply save it to database.
+Takes as input processed_data from process_data function and the Semester it was scraped for,
+and save it to database incrementally.
+Every course is hashed (see `compute_hash`), and courses whose hash matches the `content_hash`
+of their CourseOffering for that semester are skipped entirely. For changed courses, only the indexes of the semester
+that were added, modified or removed are written, and the CourseSchedule rows of the course for the semester are rebuilt.
+The semester-independent fields of the course (name, AU, common schedule and information) are only overwritten
+when scraping the current semester, or when the course was not scraped for any semester yet.
+Courses that are no longer listed for the semester lose their offering, indexes and schedules for that semester,
+and are deleted once they are not offered in any semester, unless `remove_missing` is False,
+e.g. when `data` is not the whole catalogue of the semester (see `seed_catalogue`).
+Returns a change report of added, removed and modified courses and indexes.
 '''
-def save_course_data(data: List[Dict]) -> None:
+def save_course_data(data: List[Dict], semester: Semester, remove_missing: bool=True) -> Dict:
+    report = new_change_report()
+    if not data:
+        return report # nothing scraped, do not treat every existing course as removed
+
+    is_current_semester = semester == Semester.get_current()
+    existing_hashes = dict(CourseOffering.objects.filter(semester=semester).values_list('course_id', 'content_hash'))
+    scraped_codes = set()
     for course in data:
+        course_code = course['course_code']
+        scraped_codes.add(course_code)
+        content_hash = compute_hash(course)
+        if existing_hashes.get(course_code) == content_hash:
+            report['unchanged'] += 1
+            continue
+
         # create new CoursePrefix instance if such prefix does not exist
-        prefix_instance, _ = CoursePrefix.objects.get_or_create(prefix=course['prefix'])
+        CoursePrefix.objects.get_or_create(prefix=course['prefix'])
 
         # create new Course instance if not exist, else update existing instance
-        try:
-            course_instance = Course.objects.create(
-                code=course['course_code'],
-                name=course['course_name'],
-                academic_units=course['academic_units'],
-                common_schedule=course['common_schedule'],
-                common_information=course['common_information'],
-                prefix=prefix_instance,
-                level=course['level'],
-            )
-        except IntegrityError:
-            course_instance = Course.objects.get(code=course['course_code'])
-            course_instance.name = course['course_name']
-            course_instance.academic_units = course['academic_units']
-            course_instance.common_schedule = course['common_schedule']
-            course_instance.common_information = course['common_information']
-            course_instance.save()
+        course_fields = {
+            'name': course['course_name'],
+            'academic_units': course['academic_units'],
+            'prefix': course['prefix'],
+            'level': course['level'],
+        }
+        semester_fields = {
+            'common_schedule': course['common_schedule'],
+            'common_information': course['common_information'],
+            'scraped_for': semester.code,
+        }
+        course_instance, _ = Course.objects.get_or_create(code=course_code, defaults={**course_fields, **semester_fields})
+        if is_current_semester or course_instance.scraped_for is None:
+            course_fields.update(semester_fields)
+        for field, value in course_fields.items():
+            setattr(course_instance, field, value)
+        course_instance.save()
+        _, created = CourseOffering.objects.update_or_create(
+            course=course_instance,
+            semester=semester,
+            defaults={'content_hash': content_hash},
+        )
+        report['added_courses' if created else 'modified_courses'].append(course_code)
 
-        # for each index, create new CourseIndex instance if not exist, else update existing instance
+        # only write indexes that are new or whose information changed, delete indexes that disappeared
+        semester_indexes = CourseIndex.objects.filter(course_code=course_instance, semester=semester)
+        existing_indexes = dict(semester_indexes.values_list('index', 'filtered_information'))
         for index in course['indexes']:
-            try:
+            if index['index'] not in existing_indexes:
                 CourseIndex.objects.create(
                     course_code=course_instance,
+                    semester=semester,
                     index=index['index'],
-                    filtered_information=index['filtered_information']
+                    filtered_information=index['filtered_information'],
                 )
-            except IntegrityError:
-                course_index_instance = CourseIndex.objects.get(course=course_instance, index=index['index'])
-                course_index_instance.information = index['information']
-                course_index_instance.schedule = index['schedule']
-                course_index_instance.filtered_information = index['filtered_information']
-                course_index_instance.save()
+                report['added_indexes'].append(index['index'])
+            elif existing_indexes[index['index']] != index['filtered_information']:
+                semester_indexes.filter(index=index['index']).update(
+                    filtered_information=index['filtered_information'],
+                )
+                report['modified_indexes'].append(index['index'])
+        removed_indexes = set(existing_indexes) - {index['index'] for index in course['indexes']}
+        if removed_indexes:
+            semester_indexes.filter(index__in=removed_indexes).delete()
+            report['removed_indexes'].extend(removed_indexes)
+
+        # rewrite the class schedules of the changed course for the semester from the processed rows
+        CourseSchedule.objects.filter(common_schedule_for_course=course_instance, semester=semester).delete()
+        CourseSchedule.objects.filter(index__in=semester_indexes).delete()
+        index_ids = dict(semester_indexes.values_list('index', 'id'))
+        CourseSchedule.objects.bulk_create(
+            [
+                CourseSchedule(common_schedule_for_course=course_instance, semester=semester, **row)
+                for row in course['common_schedules']
+            ] + [
+                CourseSchedule(index_id=index_ids[index['index']], semester=semester, **row)
+                for index in course['indexes'] for row in index['schedules']
+            ]
+        )
+
+    # courses that are no longer listed on the website for the semester
+    removed_codes = set(existing_hashes) - scraped_codes if remove_missing else set()
+    if removed_codes:
+        CourseOffering.objects.filter(course__in=removed_codes, semester=semester).delete()
+        CourseIndex.objects.filter(course_code__in=removed_codes, semester=semester).delete()
+        CourseSchedule.objects.filter(common_schedule_for_course__in=removed_codes, semester=semester).delete()
+        Course.objects.filter(code__in=removed_codes, semesters__isnull=True).delete()
+        report['removed_courses'].extend(removed_codes)
+
+    return finalize_change_report(report)
 
 '''
-Main function to perform course scraping.
+Main function to perform course scraping for a semester, given its code, e.g. '2024_1'.
+Defaults to the `CURRENT_SEMESTER` setting.
 Perform the following steps in order:
 - `get_soup_from_url`: get HTML content from NTU course website
 - `get_raw_data`: extract raw data from the HTML content
 - `process_data`: process the raw data to get necessary information
-- `save_course_data`: save the processed data to database
+- `save_course_data`: save the changed data to database
+- `save_venue_occupancy`: rebuild the venue occupancy of the semester
+The run is recorded as a ScraperRun (see `instrumentation.py`).
+Returns the change report produced by `save_course_data`.
 '''
-def perform_course_scraping():
-    ACADEMIC_YEAR = '2024'
-    ACADEMIC_SEMESTER = '1'
-    try:
-        soup = get_soup_from_url(ACADEMIC_YEAR, ACADEMIC_SEMESTER)
-        raw_data = get_raw_data(soup)
-        processed_data = process_data(raw_data)
-        save_course_data(processed_data)
-    except Exception as e:
-        print(f'Course Scraper Error: {e}')
+def perform_course_scraping(semester_code: Optional[str]=None) -> Dict:
+    report = new_change_report()
+    semester_code = semester_code or settings.CURRENT_SEMESTER
+    with RunRecorder(ScraperRun.Scraper.COURSE, semester_code) as run:
+        try:
+            semester = Semester.get_or_create_from_code(semester_code)
+            with run.stage('parse'):
+                soup = get_soup_from_url(str(semester.year), semester.semester)
+                raw_data = get_raw_data(soup)
+            with run.stage('process'):
+                processed_data = process_data(raw_data)
+            run.items = len(processed_data)
+            with run.stage('save'):
+                report = save_course_data(processed_data, semester)
+                save_venue_occupancy(semester)
+                semester.save(update_fields=['last_updated'])
+            logger.info(f'Course Scraper Changes ({semester.code}): {summarize_change_report(report)}')
+        except Exception as e:
+            run.fail(None, e)
+        run.changes = report
+    return report
@@ -1,98 +1,113 @@
-from bs4 import BeautifulSoup
-import requests
+from django.conf import settings
+from django.utils import timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
 
-from apps.courses.models import Course
+from apps.courses.models import Course, Semester
+from apps.scraper.models import ScraperRun
+from apps.scraper.utils.change_detection import (
+    compute_hash,
+    finalize_change_report,
+    new_change_report,
+    summarize_change_report,
+)
+from apps.scraper.utils.instrumentation import RunRecorder
+from apps.scraper.utils.page_cache import fetch
+from apps.scraper.utils.parsers import COURSE_DETAIL_FIELDS, parse_course_detail_page
+from apps.scraper.utils.pipeline import BatchedWriter, parse_pages
+from apps.scraper.utils.prerequisite_compiler import apply_prerequisites_tree, save_course_prerequisites
+from apps.scraper.utils.restriction_compiler import save_course_restrictions
+
+
+logger = logging.getLogger('apps.scraper')
 
 
 '''
-Given a soup object and Course instance, parse details from soup and save to Course instance:
-description, prerequisite, mutually_exclusive, not_available, not_available_all, offered_as_ue, offered_as_bde
+Given a dict of details returned by `parse_course_detail_page` and a Course instance, set the details on the instance:
+description, prerequisite, mutually_exclusive, not_available, not_available_all, offered_as_ue, offered_as_bde, etc.
+The prerequisite text is compiled into `prerequisites_tree`, so that the API never parses it.
+The instance is saved later in batch by `save_course_details`.
 '''
-def save_course_detail(soup: BeautifulSoup, course: Course):
-    # get description which is the last td in the table
-    description_td = soup.find_all('td')[-2]
-    description = description_td.text.strip()
-    course.description = description
-
-    # utility function to get the text in the 2nd td of a tr in which the 1st td of a tr contains search_text
-    def get_tr_text(soup, search_text):
-        trs = soup.find_all('tr')
-        for tr in trs:
-            td = tr.find('td')
-            if td and search_text in td.get_text():
-                tds = tr.find_all('td')
-                if len(tds) > 1:
-                    return tds[1].get_text(strip=True)
-        return None
+def apply_course_detail(details: Dict, course: Course):
+    for field in COURSE_DETAIL_FIELDS:
+        setattr(course, field, details[field])
+    apply_prerequisites_tree(course)
+    course.last_updated = timezone.now() # not set automatically by bulk_update
 
-    # extract information
-    prerequisite = get_tr_text(soup, 'Prerequisite:')
-    course.prerequisite = prerequisite
-    mutually_exclusive = get_tr_text(soup, 'Mutually exclusive with:')
-    course.mutually_exclusive = mutually_exclusive
-    not_available = get_tr_text(soup, 'Not available to Programme:')
-    course.not_available = not_available
-    not_available_all = get_tr_text(soup, 'Not available to all Programme with:')
-    course.not_available_all = not_available_all
-    grade_type = get_tr_text(soup, 'Grade Type:')
-    course.grade_type = grade_type
-    not_available_as_core_to = get_tr_text(soup, 'Not available as Core to Programme:')
-    course.not_offered_as_core_to = not_available_as_core_to
-    not_available_as_pe_to = get_tr_text(soup, 'Not available as PE to Programme:')
-    course.not_offered_as_pe_to = not_available_as_pe_to
-    not_available_as_bde_ue_to = get_tr_text(soup, 'Not available as BDE/UE to Programme:')
-    course.not_offered_as_bde_ue_to = not_available_as_bde_ue_to
-    
-    # check if the course is not offered as UE or BDE, otherwise it's True by default
-    tds = soup.find_all('td')
-    for td in tds:
-        if 'Not offered as Unrestricted Elective' in td.get_text():
-            course.offered_as_ue = False
-        if 'Not offered as Broadening and Deepening Elective' in td.get_text():
-            course.offered_as_bde = False
-            
-    # get the department that maintain / offer this course
-    second_tr = soup.find_all('tr')[1]
-    last_td = second_tr.find_all('td')[-1]
-    last_td_text = last_td.get_text(strip=True)
-    course.department_maintaining = last_td_text
-    
-    # save the changes
-    course.save()
+'''
+Save a batch of Course instances updated by `apply_course_detail` in a single query,
+together with their compiled CoursePrerequisite, CourseExclusion and CourseProgrammeRestriction rows.
+'''
+def save_course_details(courses: List[Course]):
+    Course.objects.bulk_update(courses, [*COURSE_DETAIL_FIELDS, 'prerequisites_tree', 'detail_hash', 'last_updated'])
+    save_course_prerequisites(courses)
+    save_course_restrictions(courses)
 
 '''
-Main function to scrape course details.
-Must be called only after course scraping is completed.
-For all courses from start_index to end_index:
+Main function to scrape course details for a semester, given its code, e.g. '2024_1'.
+Defaults to the `CURRENT_SEMESTER` setting.
+Must be called only after course scraping of that semester is completed.
+For all courses offered in the semester from start_index to end_index:
 - Send a POST request to NTU API which return the html of the course detail page
-- Call save_course_detail to parse and save the details to the Course instance
+- Skip the course if the page hash matches the stored `detail_hash`
+- Otherwise hand the page to the parser worker processes (`parse_pages`)
+- Apply the parsed details to the Course instance, and save them in batches (`BatchedWriter`)
+The run is recorded as a ScraperRun (see `instrumentation.py`), failed courses are recorded with their error.
+Returns a change report with the courses whose details were modified.
 '''
-def perform_course_detail_scraping(start_index: int=0, end_index: int=9999):
+def perform_course_detail_scraping(start_index: int=0, end_index: int=9999, semester_code: Optional[str]=None) -> Dict:
     ENDPOINT = 'https://wis.ntu.edu.sg/webexe/owa/AUS_SUBJ_CONT.main_display1'
-    FORMDATA_ACADSEM = '2024_1'
-    FORMDATA_ACAD = '2024'
-    FORMDATA_SEMESTER = '1'
-    
-    courses = Course.objects.all()
-    for course in courses[start_index:end_index]:
+
+    report = new_change_report()
+    semester_code = semester_code or settings.CURRENT_SEMESTER
+
+    # fetch stage: yield the pages of the courses whose detail page changed
+    def fetch_pages(run: RunRecorder, semester: Semester) -> Iterator[Tuple[Course, bytes]]:
+        courses = Course.objects.filter(semesters=semester).order_by('code')
+        for course in courses[start_index:end_index]:
+            run.items += 1
+            try:
+                form_data = {
+                    'acadsem': semester.code,
+                    'r_subj_code': course.code,
+                    'boption': 'Search',
+                    'acad': str(semester.year),
+                    'semester': semester.semester,
+                }
+                response = fetch(ENDPOINT, data=form_data)
+                if response.status_code != 200:
+                    raise Exception(f'Failed to get response, status code: {response.status_code}')
+                detail_hash = compute_hash(response.content)
+                if course.detail_hash == detail_hash:
+                    report['unchanged'] += 1
+                    continue
+                course.detail_hash = detail_hash
+                yield course, response.content
+            except Exception as e:
+                run.fail(course.code, e)
+                continue
+
+    with RunRecorder(ScraperRun.Scraper.DETAIL, semester_code) as run:
         try:
-            form_data = {
-                'acadsem': FORMDATA_ACADSEM,
-                'r_subj_code': course.code,
-                'boption': 'Search',
-                'acad': FORMDATA_ACAD,
-                'semester': FORMDATA_SEMESTER,
-            }
-            response = requests.post(
-                ENDPOINT,
-                data=form_data
-            )
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                save_course_detail(soup, course)
-            else:
-                raise Exception(f'Failed to get response, status code: {response.status_code}')
+            semester = Semester.get_or_create_from_code(semester_code)
         except Exception as e:
-            print(e)
-            print(f'Failed to scrape {course.code}')
-            continue
+            run.fail(None, e)
+            run.changes = finalize_change_report(report)
+            return report
+        # parse stage runs in worker processes, save stage writes the parsed details in batches
+        with BatchedWriter(save_course_details) as writer:
+            for course, details, error in run.timed(parse_pages(parse_course_detail_page, fetch_pages(run, semester)), 'parse'):
+                if error is not None:
+                    run.fail(course.code, error)
+                    continue
+                with run.stage('process'):
+                    apply_course_detail(details, course)
+                with run.stage('save'):
+                    writer.add(course)
+                report['modified_courses'].append(course.code)
+            with run.stage('save'):
+                writer.flush()
+
+        logger.info(f'Course Detail Scraper Changes ({semester.code}): {summarize_change_report(report)}')
+        run.changes = finalize_change_report(report)
+    return report
@@ -12,17 +12,29 @@ Looking for a better solution to automate this process!
 from bs4 import BeautifulSoup
 from datetime import datetime as dt
 from typing import Dict, List
+import logging
 import os
 
 from apps.courses.models import Course
+from apps.scraper.models import ScraperRun
+from apps.scraper.utils.change_detection import (
+    finalize_change_report,
+    new_change_report,
+    summarize_change_report,
+)
+from apps.scraper.utils.instrumentation import RunRecorder, get_current_run, record_fetch, stage
+
+
+logger = logging.getLogger('apps.scraper')
 
 
 '''
 Get HTML content from file_path and return a BeautifulSoup object
 '''
 def get_soup_from_html_file(file_path: str) -> BeautifulSoup:
-    with open(file_path, 'r', encoding='utf-8') as file:
+    with stage('fetch'), open(file_path, 'r', encoding='utf-8') as file:
         html_content = file.read()
+        record_fetch(len(html_content.encode('utf-8')))
     return BeautifulSoup(html_content, "lxml")
 
 '''
@@ -94,16 +106,26 @@ def process_data(raw_data: List[Dict[str, str]]) -> List[Dict[str, str]]:
     return data
 
 '''
-Takes as input processed data from process_data and simply save the exam schedule to Course instance
+Takes as input processed data from process_data and save the exam schedule to Course instance.
+Courses whose exam schedule did not change are not written, unknown courses are recorded as failures of the run.
+Returns a change report with the courses whose exam schedule was modified.
 '''
-def save_exam_schedule(data: List[Dict]) -> None:
+def save_exam_schedule(data: List[Dict]) -> Dict:
+    report = new_change_report()
     for exam_data in data:
         try:
             course = Course.objects.get(code=exam_data['course_code'])
+            if course.exam_schedule == exam_data['exam_schedule_str']:
+                report['unchanged'] += 1
+                continue
             course.exam_schedule = exam_data['exam_schedule_str']
             course.save()
+            report['modified_courses'].append(course.code)
         except Course.DoesNotExist:
-            print(f'Course code {exam_data["course_code"]} does not exist')
+            run = get_current_run()
+            if run is not None:
+                run.fail(exam_data['course_code'], 'Course does not exist')
+    return finalize_change_report(report)
 
 '''
 Main function to perform exam schedule scraping.
@@ -112,14 +134,25 @@ Perform the following steps in order:
 - `get_soup_from_html_file`: get BeautifulSoup object from html file saved in FILE_PATH
 - `get_raw_data`: get raw data from BeautifulSoup object
 - `process_data`: process raw data to get processed data
-- `save_exam_schedule`: save processed data to the database
+- `save_exam_schedule`: save changed data to the database
+The run is recorded as a ScraperRun (see `instrumentation.py`).
+Returns the change report produced by `save_exam_schedule`.
 '''
-def perform_exam_schedule_scraping():
-    try:
-        FILE_PATH = os.path.join('apps', 'scraper', 'utils', 'scraping_files', 'exam_schedule.html')
-        soup = get_soup_from_html_file(FILE_PATH)
-        raw_data = get_raw_data(soup)
-        data = process_data(raw_data)
-        save_exam_schedule(data)
-    except Exception as e:
-        print(f'Exam Schedule Scraper Error: {e}')
+def perform_exam_schedule_scraping() -> Dict:
+    report = new_change_report()
+    with RunRecorder(ScraperRun.Scraper.EXAM) as run:
+        try:
+            FILE_PATH = os.path.join('apps', 'scraper', 'utils', 'scraping_files', 'exam_schedule.html')
+            with run.stage('parse'):
+                soup = get_soup_from_html_file(FILE_PATH)
+                raw_data = get_raw_data(soup)
+            with run.stage('process'):
+                data = process_data(raw_data)
+            run.items = len(data)
+            with run.stage('save'):
+                report = save_exam_schedule(data)
+            logger.info(f'Exam Schedule Scraper Changes: {summarize_change_report(report)}')
+        except Exception as e:
+            run.fail(None, e)
+        run.changes = report
+    return report
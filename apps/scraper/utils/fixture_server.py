@@ -0,0 +1,56 @@
+'''
+Local stand-in for the NTU websites, serving pages recorded in the scraper cache (see `page_cache.py`).
+
+A request to `http://<server>/<host>/<path>?<query>` is answered with the page recorded for
+`https://<host>/<path>?<query>` (and the same form data for POST requests), or 404 if it was never recorded.
+Point the scrapers at it by setting `SCRAPER_UPSTREAM_URL=http://localhost:<port>` with `SCRAPER_CACHE_MODE=off`,
+so that the full fetch path (HTTP, parsing, saving) can be exercised and benchmarked without the NTU websites.
+'''
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from apps.scraper.utils.page_cache import get_request_key, load_page_by_key
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    # set by `create_fixture_server`
+    cache_dir = None
+
+    def _get_original_url(self) -> str:
+        parts = urlsplit(self.path)
+        original = f'https://{parts.path.lstrip("/")}'
+        return f'{original}?{parts.query}' if parts.query else original
+
+    def _respond(self, method: str, data: Optional[Dict]):
+        request_key = get_request_key(method, self._get_original_url(), data)
+        page = load_page_by_key(request_key, self.cache_dir)
+        if page is None:
+            self.send_error(404, 'Page not recorded')
+            return
+        self.send_response(page.status_code)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page.content)))
+        self.end_headers()
+        self.wfile.write(page.content)
+
+    def do_GET(self):
+        self._respond('GET', None)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+        self._respond('POST', dict(parse_qsl(body, keep_blank_values=True)))
+
+    def log_message(self, format, *args):
+        pass
+
+
+'''
+Create (but do not start) a threaded HTTP server serving pages from `cache_dir`.
+Call `serve_forever()` on the returned server to start it, and `shutdown()` to stop it.
+'''
+def create_fixture_server(cache_dir: str, host: str='127.0.0.1', port: int=8765) -> ThreadingHTTPServer:
+    handler = type('BoundFixtureRequestHandler', (FixtureRequestHandler,), {'cache_dir': cache_dir})
+    return ThreadingHTTPServer((host, port), handler)
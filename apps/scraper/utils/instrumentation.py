@@ -0,0 +1,158 @@
+'''
+Structured instrumentation of the scrapers, stored per run as a ScraperRun (see `apps/scraper/models.py`).
+
+A scraper runs inside a `RunRecorder` block, which is the current run for the code called within it:
+- `stage(name)` times a block of code as one of the stages `fetch`, `parse`, `process` or `save`.
+  Stages nest: while an inner stage runs, the outer one is paused, so every second is charged to a single stage.
+- `fetch` (see `page_cache.py`) records its own fetch stage, the pages downloaded, their size and the retries.
+- every database statement run within the block is counted, writes add their row count to `rows_written`.
+- `fail(item, error)` records a failed item, the scraper then carries on with the next one.
+  `fail(None, error)` records an error that aborted the run, which is then stored as failed.
+A run that wrote rows, even aborted, bumps the data version when it exits, invalidating the shared cache
+(see `apps/common/cache.py`).
+'''
+
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from django.db import connection
+from django.utils import timezone
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, Optional
+import logging
+
+from apps.common.cache import bump_data_version
+from apps.scraper.models import ScraperRun
+
+
+logger = logging.getLogger('apps.scraper')
+
+STAGES = ('fetch', 'parse', 'process', 'save')
+MAX_FAILURE_REASONS = 100
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+_current_run: ContextVar[Optional['RunRecorder']] = ContextVar('current_run', default=None)
+
+def get_current_run() -> Optional['RunRecorder']:
+    return _current_run.get()
+
+'''
+Time a block as stage `name` of the current run, if any.
+'''
+def stage(name: str):
+    run = get_current_run()
+    return run.stage(name) if run is not None else nullcontext()
+
+'''
+Record a downloaded page of `size` bytes, fetched after `retries` failed attempts, in the current run, if any.
+'''
+def record_fetch(size: int, retries: int=0):
+    run = get_current_run()
+    if run is not None:
+        run.requests += 1
+        run.bytes_downloaded += size
+        run.retries += retries
+
+
+class RunRecorder:
+    '''
+    Context manager recording a scraper run, saved as a ScraperRun when the block is entered (status running)
+    and again with the collected measures when it exits (status succeeded, or failed if the run was aborted).
+    '''
+    def __init__(self, scraper: str, semester: Optional[str]=None):
+        self.run = ScraperRun(scraper=scraper, semester=semester)
+        self.stage_durations: Dict[str, float] = defaultdict(float, dict.fromkeys(STAGES, 0.0))
+        self.stages = []
+        self.mark = None
+        self.items = 0
+        self.requests = 0
+        self.bytes_downloaded = 0
+        self.retries = 0
+        self.failures = 0
+        self.failure_reasons = []
+        self.aborted = False
+        self.rows_written = 0
+        self.changes = {}
+
+    def __enter__(self):
+        self.run.save()
+        self.start = perf_counter()
+        self.token = _current_run.set(self)
+        self.row_counter = connection.execute_wrapper(self.count_rows)
+        self.row_counter.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.row_counter.__exit__(exc_type, exc, traceback)
+        _current_run.reset(self.token)
+        if exc is not None:
+            self.fail(None, exc)
+        self.run.status = ScraperRun.Status.FAILED if self.aborted else ScraperRun.Status.SUCCEEDED
+        self.run.finished_at = timezone.now()
+        self.run.duration = round(perf_counter() - self.start, 3)
+        self.run.stage_durations = {name: round(seconds, 3) for name, seconds in self.stage_durations.items()}
+        for field in ('items', 'requests', 'bytes_downloaded', 'retries', 'failures', 'failure_reasons', 'rows_written', 'changes'):
+            setattr(self.run, field, getattr(self, field))
+        self.run.save()
+        if self.rows_written:
+            bump_data_version()
+        logger.info(
+            f'{self.run.scraper} scraper run #{self.run.id} {self.run.status} in {self.run.duration}s: '
+            f'{self.items} items, {self.failures} failures, {self.rows_written} rows written'
+        )
+
+    # charge the time elapsed since the last mark to the stage currently running
+    def charge(self):
+        now = perf_counter()
+        if self.stages:
+            self.stage_durations[self.stages[-1]] += now - self.mark
+        self.mark = now
+
+    @contextmanager
+    def stage(self, name: str):
+        self.charge()
+        self.stages.append(name)
+        try:
+            yield
+        finally:
+            self.charge()
+            self.stages.pop()
+
+    '''
+    Iterate over `iterable`, timing the production of every item as stage `name`, but not the consumer loop.
+    Used on the generators of the parse stage, which interleave fetching (timed as its own stage) and parsing.
+    '''
+    def timed(self, iterable: Iterable[Any], name: str) -> Iterator[Any]:
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    '''
+    Record a failed item (None for the run itself) with the error as reason, and log it.
+    '''
+    def fail(self, item: Any, error: Any):
+        self.failures += 1
+        self.aborted = self.aborted or item is None
+        reason = f'{type(error).__name__}: {error}' if isinstance(error, BaseException) else str(error)
+        if len(self.failure_reasons) < MAX_FAILURE_REASONS:
+            self.failure_reasons.append({'item': None if item is None else str(item), 'reason': reason})
+        logger.warning(f'{self.run.scraper} scraper failed{f" on {item}" if item is not None else ""}: {reason}')
+
+    # database execute wrapper, see `connection.execute_wrapper`
+    # inserted rows are counted from the parameters: the row count of `INSERT ... RETURNING` (bulk_create)
+    # is only known once the returned rows are fetched on SQLite
+    def count_rows(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        statement = sql.lstrip()[:6].upper()
+        if statement == 'INSERT':
+            columns = sql[sql.index('(') + 1:sql.index(')')].count(',') + 1 if '(' in sql else 1
+            self.rows_written += len(params) if many else max(len(params or ()) // columns, 1)
+        elif statement in WRITE_STATEMENTS:
+            self.rows_written += max(context['cursor'].rowcount, 0)
+        return result
@@ -0,0 +1,172 @@
+'''
+Record / replay layer for the scrapers.
+
+All pages fetched by the scrapers go through `fetch`, which depending on `SCRAPER_CACHE_MODE` can
+store every fetched page on disk ('record'), serve pages from disk only ('replay'), or bypass the cache ('off').
+This allows parsing and database loading to be re-run, benchmarked and regression-tested offline,
+without downloading thousands of pages again after e.g. a parser fix.
+
+The cache lives in `SCRAPER_CACHE_DIR` and is content-addressed:
+- `objects/<sha[:2]>/<sha>.gz`: gzip-compressed page content, named by the SHA-256 of the content,
+  so identical pages (e.g. empty search results) are only stored once.
+- `requests/<key[:2]>/<key>.json`: maps a request key (SHA-256 of method + URL + form data)
+  to the status code and content hash of the response.
+
+When `SCRAPER_UPSTREAM_URL` is set (e.g. `http://localhost:8765`), requests are sent to
+`<SCRAPER_UPSTREAM_URL>/<original host><original path>` instead of the NTU website,
+which is the format served by the local stand-in server in `fixture_server.py`.
+The cache key is always computed from the original URL.
+
+Network requests failing with a connection error, a timeout or a 5xx status are retried
+`SCRAPER_FETCH_RETRIES` times, with an exponential backoff starting at `SCRAPER_FETCH_BACKOFF` seconds.
+Every fetch is recorded in the current scraper run, if any (see `instrumentation.py`).
+'''
+
+from django.conf import settings
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import gzip
+import hashlib
+import json
+import os
+import requests
+import time
+
+from apps.scraper.utils.instrumentation import record_fetch, stage
+
+
+CACHE_MODE_OFF = 'off'
+CACHE_MODE_RECORD = 'record'
+CACHE_MODE_REPLAY = 'replay'
+CACHE_MODES = (CACHE_MODE_OFF, CACHE_MODE_RECORD, CACHE_MODE_REPLAY)
+REQUEST_TIMEOUT = 60
+
+
+class PageNotCached(Exception):
+    pass
+
+
+class FetchedPage(NamedTuple):
+    '''
+    Minimal response object, exposing the same attributes as `requests.Response` used by the scrapers.
+    '''
+    status_code: int
+    content: bytes
+
+
+def get_cache_mode() -> str:
+    mode = getattr(settings, 'SCRAPER_CACHE_MODE', CACHE_MODE_OFF) or CACHE_MODE_OFF
+    if mode not in CACHE_MODES:
+        raise ValueError(f'Invalid SCRAPER_CACHE_MODE `{mode}`, must be one of {", ".join(CACHE_MODES)}')
+    return mode
+
+def get_cache_dir() -> str:
+    return str(getattr(settings, 'SCRAPER_CACHE_DIR', os.path.join(settings.BASE_DIR, 'scraper_cache')))
+
+'''
+Return the cache key of a request, the SHA-256 of its method, URL and (sorted) form data.
+'''
+def get_request_key(method: str, url: str, data: Optional[Dict]=None) -> str:
+    form_items = sorted((str(key), str(value)) for key, value in (data or {}).items())
+    raw_key = json.dumps([method.upper(), url, form_items], separators=(',', ':'))
+    return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+def _object_path(cache_dir: str, content_hash: str) -> str:
+    return os.path.join(cache_dir, 'objects', content_hash[:2], f'{content_hash}.gz')
+
+def _request_path(cache_dir: str, request_key: str) -> str:
+    return os.path.join(cache_dir, 'requests', request_key[:2], f'{request_key}.json')
+
+'''
+Store a fetched page in the cache, return its content hash.
+'''
+def store_page(method: str, url: str, data: Optional[Dict], page: FetchedPage, cache_dir: Optional[str]=None) -> str:
+    cache_dir = cache_dir or get_cache_dir()
+    content_hash = hashlib.sha256(page.content).hexdigest()
+    object_path = _object_path(cache_dir, content_hash)
+    if not os.path.exists(object_path):
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        with gzip.open(object_path, 'wb') as fp:
+            fp.write(page.content)
+
+    request_path = _request_path(cache_dir, get_request_key(method, url, data))
+    os.makedirs(os.path.dirname(request_path), exist_ok=True)
+    with open(request_path, 'w', encoding='utf-8') as fp:
+        json.dump({
+            'method': method.upper(),
+            'url': url,
+            'data': data or {},
+            'status_code': page.status_code,
+            'content_hash': content_hash,
+        }, fp)
+    return content_hash
+
+'''
+Load a page from the cache given its request key, return None if it is not cached.
+'''
+def load_page_by_key(request_key: str, cache_dir: Optional[str]=None) -> Optional[FetchedPage]:
+    cache_dir = cache_dir or get_cache_dir()
+    request_path = _request_path(cache_dir, request_key)
+    if not os.path.exists(request_path):
+        return None
+    with open(request_path, 'r', encoding='utf-8') as fp:
+        entry = json.load(fp)
+    with gzip.open(_object_path(cache_dir, entry['content_hash']), 'rb') as fp:
+        content = fp.read()
+    return FetchedPage(entry['status_code'], content)
+
+def load_page(method: str, url: str, data: Optional[Dict]=None, cache_dir: Optional[str]=None) -> Optional[FetchedPage]:
+    return load_page_by_key(get_request_key(method, url, data), cache_dir)
+
+'''
+Rewrite the URL to point to `SCRAPER_UPSTREAM_URL` if it is configured.
+'''
+def get_upstream_url(url: str) -> str:
+    upstream = getattr(settings, 'SCRAPER_UPSTREAM_URL', '')
+    if not upstream:
+        return url
+    parts = urlsplit(url)
+    rewritten = f'{upstream.rstrip("/")}/{parts.netloc}{parts.path}'
+    return f'{rewritten}?{parts.query}' if parts.query else rewritten
+
+'''
+Send a request to the network, retrying it on connection errors, timeouts and 5xx statuses.
+Returns the page and the number of retries.
+'''
+def request_page(method: str, url: str, data: Optional[Dict]=None) -> Tuple[FetchedPage, int]:
+    retries = int(getattr(settings, 'SCRAPER_FETCH_RETRIES', 0))
+    backoff = float(getattr(settings, 'SCRAPER_FETCH_BACKOFF', 0))
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            response = requests.request(method, get_upstream_url(url), data=data, timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            continue
+        if response.status_code < 500 or attempt == retries:
+            return FetchedPage(response.status_code, response.content), attempt
+
+'''
+Fetch a page, sending a POST request if `data` is given, otherwise a GET request.
+- 'off': fetch from the network
+- 'record': fetch from the network and store the page in the cache
+- 'replay': load the page from the cache, raise PageNotCached if it has not been recorded
+'''
+def fetch(url: str, data: Optional[Dict]=None) -> FetchedPage:
+    method = 'POST' if data is not None else 'GET'
+    mode = get_cache_mode()
+    with stage('fetch'):
+        if mode == CACHE_MODE_REPLAY:
+            page = load_page(method, url, data)
+            if page is None:
+                raise PageNotCached(f'{method} {url} {data or ""} is not in the scraper cache')
+            record_fetch(len(page.content))
+            return page
+
+        page, retries = request_page(method, url, data)
+        record_fetch(len(page.content), retries)
+        if mode == CACHE_MODE_RECORD and page.status_code == 200:
+            store_page(method, url, data, page)
+        return page
@@ -0,0 +1,93 @@
+'''
+Pure parsing functions for the course detail and program pages.
+
+These functions take raw page content and return plain Python data, without touching the database,
+so that they can run in parser worker processes (see `pipeline.py`).
+This module must not import Django models, as it is imported by freshly spawned worker processes.
+'''
+
+from bs4 import BeautifulSoup
+from typing import Dict, List, Optional
+
+
+HTML_PARSER = 'lxml'
+
+'''
+Mapping of Course field name to the text in the 1st td of the row containing the value in its 2nd td.
+'''
+COURSE_DETAIL_ROWS = {
+    'prerequisite': 'Prerequisite:',
+    'mutually_exclusive': 'Mutually exclusive with:',
+    'not_available': 'Not available to Programme:',
+    'not_available_all': 'Not available to all Programme with:',
+    'grade_type': 'Grade Type:',
+    'not_offered_as_core_to': 'Not available as Core to Programme:',
+    'not_offered_as_pe_to': 'Not available as PE to Programme:',
+    'not_offered_as_bde_ue_to': 'Not available as BDE/UE to Programme:',
+}
+COURSE_DETAIL_FIELDS = [
+    'description',
+    *COURSE_DETAIL_ROWS,
+    'offered_as_ue',
+    'offered_as_bde',
+    'department_maintaining',
+]
+
+
+'''
+Given a soup object of a course detail page, return a dict of Course field name to value, with keys:
+description, prerequisite, mutually_exclusive, not_available, not_available_all, grade_type,
+not_offered_as_core_to, not_offered_as_pe_to, not_offered_as_bde_ue_to, offered_as_ue, offered_as_bde,
+department_maintaining.
+'''
+def extract_course_detail(soup: BeautifulSoup) -> Dict:
+    details = {}
+    tds = soup.find_all('td')
+    trs = soup.find_all('tr')
+
+    # get description which is the last td in the table
+    details['description'] = tds[-2].text.strip()
+
+    # utility function to get the text in the 2nd td of a tr in which the 1st td of a tr contains search_text
+    def get_tr_text(search_text: str) -> Optional[str]:
+        for tr in trs:
+            td = tr.find('td')
+            if td and search_text in td.get_text():
+                row_tds = tr.find_all('td')
+                if len(row_tds) > 1:
+                    return row_tds[1].get_text(strip=True)
+        return None
+
+    # extract information
+    for field, search_text in COURSE_DETAIL_ROWS.items():
+        details[field] = get_tr_text(search_text)
+
+    # check if the course is not offered as UE or BDE, otherwise it's True by default
+    tds_text = [td.get_text() for td in tds]
+    details['offered_as_ue'] = not any('Not offered as Unrestricted Elective' in text for text in tds_text)
+    details['offered_as_bde'] = not any('Not offered as Broadening and Deepening Elective' in text for text in tds_text)
+
+    # get the department that maintain / offer this course
+    second_tr = trs[1]
+    details['department_maintaining'] = second_tr.find_all('td')[-1].get_text(strip=True)
+    return details
+
+def parse_course_detail_page(content: bytes) -> Dict:
+    return extract_course_detail(BeautifulSoup(content, HTML_PARSER))
+
+'''
+Given a soup object of a program page, return the list of course codes listed in it,
+which is the text of the 1st td of the 1st tr of every table.
+'''
+def extract_program_course_codes(soup: BeautifulSoup) -> List[str]:
+    codes = []
+    for table in soup.find_all('table'):
+        first_tr = table.find('tr')
+        if first_tr:
+            first_td = first_tr.find('td')
+            if first_td:
+                codes.append(first_td.get_text(strip=True))
+    return codes
+
+def parse_program_page(content: bytes) -> List[str]:
+    return extract_program_course_codes(BeautifulSoup(content, HTML_PARSER))
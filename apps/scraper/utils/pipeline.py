@@ -0,0 +1,90 @@
+'''
+Parse stage and batched DB writer shared by the detail and program scrapers.
+
+Pages are fetched one by one in the main process (network bound), and the raw page content is handed to a
+pool of parser worker processes (CPU bound), so that BeautifulSoup parsing scales across all cores.
+Parsed results are yielded back to the main process as soon as they are ready, where a single batched writer
+saves them to the database.
+'''
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from django.conf import settings
+from django.db import transaction
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import multiprocessing
+import os
+
+
+'''
+Number of parser worker processes, `SCRAPER_PARSE_WORKERS` setting, defaults to the number of CPUs.
+With 0 or 1 worker, pages are parsed inline in the main process.
+'''
+def get_parse_workers() -> int:
+    workers = getattr(settings, 'SCRAPER_PARSE_WORKERS', None)
+    return int(workers) if workers not in (None, '') else (os.cpu_count() or 1)
+
+def _get_result(item: Any, future: Future) -> Tuple[Any, Any, Optional[Exception]]:
+    try:
+        return item, future.result(), None
+    except Exception as e:
+        return item, None, e
+
+'''
+Takes as input a picklable `parse_function` (a top-level function of `parsers.py`) and an iterable of
+(item, content) tuples, typically a generator fetching the pages. Yields (item, result, error) tuples,
+where `result` is `parse_function(content)`, or `error` is the exception raised while parsing.
+Results are yielded in completion order, interleaved with fetching.
+Worker processes are spawned (not forked), so that they do not inherit the database connections.
+'''
+def parse_pages(
+    parse_function: Callable[[bytes], Any],
+    pages: Iterable[Tuple[Any, bytes]],
+    workers: Optional[int]=None,
+) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    workers = get_parse_workers() if workers is None else workers
+    if workers <= 1:
+        for item, content in pages:
+            try:
+                yield item, parse_function(content), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = {}
+        for item, content in pages:
+            pending[executor.submit(parse_function, content)] = item
+            for future in [future for future in pending if future.done()]:
+                yield _get_result(pending.pop(future), future)
+        for future in as_completed(pending):
+            yield _get_result(pending[future], future)
+
+
+class BatchedWriter:
+    '''
+    Collects objects and saves them to the database in batches, each batch in a single transaction.
+    `save_batch` is called with the list of collected objects once `batch_size` objects are collected,
+    and once more for the remaining objects when `flush` is called (or the `with` block exits).
+    '''
+    def __init__(self, save_batch: Callable[[List[Any]], None], batch_size: int=200):
+        self.save_batch = save_batch
+        self.batch_size = batch_size
+        self.pending = []
+
+    def add(self, obj: Any):
+        self.pending.append(obj)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        with transaction.atomic():
+            self.save_batch(batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
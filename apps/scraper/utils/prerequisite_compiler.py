@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.utils import timezone
+from typing import List
+
+from apps.courses.models import Course, CoursePrerequisite
+from apps.courses.prerequisites import cnf_to_tree, dnf_to_cnf, dnf_to_tree, parse_prerequisite
+
+
+'''
+Compile the `prerequisite` text of a Course instance into its `prerequisites_tree` (minimal DNF tree,
+see `apps/courses/prerequisites.py`). The instance is saved later in batch by the caller.
+Returns True if the tree changed.
+'''
+def apply_prerequisites_tree(course: Course) -> bool:
+    prerequisites_tree = dnf_to_tree(parse_prerequisite(course.prerequisite))
+    if course.prerequisites_tree == prerequisites_tree:
+        return False
+    course.prerequisites_tree = prerequisites_tree
+    return True
+
+'''
+Replace the CoursePrerequisite rows of the given courses with their compiled prerequisite in CNF,
+one row per course that has a checkable prerequisite.
+'''
+def save_course_prerequisites(courses: List[Course]):
+    CoursePrerequisite.objects.filter(course__in=courses).delete()
+    CoursePrerequisite.objects.bulk_create([
+        CoursePrerequisite(course=course, child_nodes=cnf_to_tree(dnf_to_cnf(dnf)))
+        for course in courses
+        for dnf in [parse_prerequisite(course.prerequisite)]
+        if dnf is not None
+    ])
+
+'''
+Compile the prerequisites of all courses in a single pass, e.g. after changing the compiler.
+Parsing is memoised, so the courses sharing the same prerequisite text are only parsed once.
+Returns the number of courses whose `prerequisites_tree` changed.
+'''
+def compile_all_prerequisites() -> int:
+    courses = list(Course.objects.only('code', 'prerequisite', 'prerequisites_tree'))
+    changed_courses = [course for course in courses if apply_prerequisites_tree(course)]
+    for course in changed_courses:
+        course.last_updated = timezone.now() # not set automatically by bulk_update
+    with transaction.atomic():
+        Course.objects.bulk_update(changed_courses, ['prerequisites_tree', 'last_updated'], batch_size=500)
+        save_course_prerequisites(courses)
+    return len(changed_courses)
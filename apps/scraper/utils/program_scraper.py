@@ -1,10 +1,25 @@
 from bs4 import BeautifulSoup
+from django.conf import settings
 from django.db.utils import IntegrityError
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
 import re
-import requests
 
-from apps.courses.models import Course, CourseProgram
+from apps.courses.models import Course, CourseProgram, Semester
+from apps.scraper.models import ScraperRun
+from apps.scraper.utils.change_detection import (
+    compute_hash,
+    finalize_change_report,
+    new_change_report,
+    summarize_change_report,
+)
+from apps.scraper.utils.instrumentation import RunRecorder, get_current_run
+from apps.scraper.utils.page_cache import fetch
+from apps.scraper.utils.parsers import parse_program_page
+from apps.scraper.utils.pipeline import BatchedWriter, parse_pages
+
+
+logger = logging.getLogger('apps.scraper')
 
 
 '''
@@ -12,9 +27,10 @@ Get HTML content from the URL.
 '''
 def get_soup_from_url() -> BeautifulSoup:
     URL = 'https://wis.ntu.edu.sg/webexe/owa/aus_subj_cont.main'
-    with requests.get(URL) as fp:
-        soup = BeautifulSoup(fp.content, 'html.parser')
-        return soup
+    response = fetch(URL)
+    if response.status_code != 200:
+        raise Exception(f'Failed to get response, status code: {response.status_code}')
+    return BeautifulSoup(response.content, 'html.parser')
 
 '''
 Takes as input the BeautifulSoup object,
@@ -51,8 +67,9 @@ def get_programs_data(soup: BeautifulSoup) -> List[Dict[str, str]]:
 
 '''
 Saves the programs data to the database if it does not already exist.
+Newly created programs are recorded in the change report.
 '''
-def save_programs_data(programs_data: List[Dict[str, str]]):
+def save_programs_data(programs_data: List[Dict[str, str]], report: Dict):
     for program in programs_data:
         try:
             CourseProgram.objects.create(
@@ -60,76 +77,121 @@ def save_programs_data(programs_data: List[Dict[str, str]]):
                 value=program['value'],
                 year=program['year'],
             )
+            report['added_programs'].append(program['name'])
         except IntegrityError:
             pass
 
 '''
-Takes as input a single CourseProgram instance and associated BeautifulSoup object.
+Takes as input the course codes parsed from a program page (see `parse_program_page`) and the CourseProgram instance.
 Save many to many relationship between that program and the courses.
+Only the difference with the currently stored courses is written:
+courses newly listed are added, courses no longer listed are removed,
+and `program_list` is updated only for the affected courses.
+Returns True if the courses of the program changed.
 '''
-def save_single_program_courses(soup: BeautifulSoup, program: CourseProgram):
-    tables = soup.find_all('table')
-    for table in tables:
-        first_tr = table.find('tr')
-        if first_tr:
-            first_td = first_tr.find('td')
-            if first_td:
-                code = first_td.get_text(strip=True)
-                course_code_instance = Course.objects.filter(code=code).first()
-                if not course_code_instance:
-                    print(f'Course with code {code} not found')
-                    continue
-                program.courses.add(course_code_instance)
-                programs_list = course_code_instance.program_list.split(', ') \
-                    if course_code_instance.program_list else []
-                programs_list.append(program.name)
-                unique_programs_list = list(set(programs_list))
-                course_code_instance.program_list = ', '.join(unique_programs_list)
-                course_code_instance.save()
+def save_single_program_courses(codes: List[str], program: CourseProgram) -> bool:
+    scraped_codes = set(codes)
+    existing_codes = set(program.courses.values_list('code', flat=True))
+    found_codes = set(Course.objects.filter(code__in=scraped_codes).values_list('code', flat=True))
+    for code in sorted(scraped_codes - found_codes):
+        logger.info(f'Course with code {code} not found')
+
+    added_codes = found_codes - existing_codes
+    removed_codes = existing_codes - found_codes
+    if added_codes:
+        program.courses.add(*added_codes)
+    if removed_codes:
+        program.courses.remove(*removed_codes)
+
+    # keep the denormalized `program_list` of the affected courses in sync
+    for course in Course.objects.filter(code__in=added_codes | removed_codes):
+        programs_list = set(course.program_list.split(', ')) if course.program_list else set()
+        if course.code in added_codes:
+            programs_list.add(program.name)
+        else:
+            programs_list.discard(program.name)
+        course.program_list = ', '.join(sorted(programs_list)) or None
+        course.save(update_fields=['program_list'])
+
+    return bool(added_codes or removed_codes)
 
 '''
-For every CourseProgram object, scrape the courses associated with it.
+For every CourseProgram object, scrape the courses associated with it in the given semester.
+Programs whose `content_hash` matches the hash of their listing page and of the course codes stored are skipped:
+a page listing a course that was not stored yet when it was last saved is saved again once the course is scraped.
+The other pages are parsed by the parser worker processes (`parse_pages`) and saved in batches (`BatchedWriter`).
+Must be called within the RunRecorder of the run, failed programs are recorded with their error.
 '''
-def save_programs_courses(start_index: int, end_index: int):
+def save_programs_courses(start_index: int, end_index: int, report: Dict, semester: Semester):
     ENDPOINT = 'https://wis.ntu.edu.sg/webexe/owa/AUS_SUBJ_CONT.main_display1'
-    FORMDATA_ACADSEM = '2024_1'
-    FORMDATA_ACAD = '2024'
-    FORMDATA_SEMESTER = '1'
-    
-    programs = CourseProgram.objects.all()
-    for program in programs[start_index:end_index]:
-        try:
-            form_data = {
-                'acadsem': FORMDATA_ACADSEM,
-                'r_course_yr': program.value,
-                'r_subj_code': '',
-                'boption': 'CLoad',
-                'acad': FORMDATA_ACAD,
-                'semester': FORMDATA_SEMESTER,
-            }
-            response = requests.post(
-                ENDPOINT,
-                data=form_data
-            )
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                save_single_program_courses(soup, program)
-            else:
-                raise Exception(f'Failed to get response, status code: {response.status_code}')
-        except Exception as e:
-            print(e)
-            print(f'Failed to scrape program {program.name}')
-            continue
+    run = get_current_run()
+    catalogue_hash = compute_hash(list(Course.objects.order_by('code').values_list('code', flat=True)))
+
+    # fetch stage: yield the pages of the programs whose listing changed
+    def fetch_pages() -> Iterator[Tuple[CourseProgram, bytes]]:
+        programs = CourseProgram.objects.all()
+        for program in programs[start_index:end_index]:
+            run.items += 1
+            try:
+                form_data = {
+                    'acadsem': semester.code,
+                    'r_course_yr': program.value,
+                    'r_subj_code': '',
+                    'boption': 'CLoad',
+                    'acad': str(semester.year),
+                    'semester': semester.semester,
+                }
+                response = fetch(ENDPOINT, data=form_data)
+                if response.status_code != 200:
+                    raise Exception(f'Failed to get response, status code: {response.status_code}')
+                content_hash = compute_hash([compute_hash(response.content), catalogue_hash])
+                if program.content_hash == content_hash:
+                    report['unchanged'] += 1
+                    continue
+                program.content_hash = content_hash
+                yield program, response.content
+            except Exception as e:
+                run.fail(program.name, e)
+                continue
+
+    # save stage: write the course memberships of a batch of programs in a single transaction
+    def save_batch(batch: List[Tuple[CourseProgram, List[str]]]):
+        for program, codes in batch:
+            if save_single_program_courses(codes, program):
+                report['modified_programs'].append(program.name)
+        CourseProgram.objects.bulk_update([program for program, _ in batch], ['content_hash'])
+
+    with BatchedWriter(save_batch, batch_size=20) as writer:
+        for program, codes, error in run.timed(parse_pages(parse_program_page, fetch_pages()), 'parse'):
+            if error is not None:
+                run.fail(program.name, error)
+                continue
+            with run.stage('save'):
+                writer.add((program, codes))
+        with run.stage('save'):
+            writer.flush()
 
 '''
-Main function to scrape programs data.
+Main function to scrape programs data for a semester, given its code, e.g. '2024_1'.
+Defaults to the `CURRENT_SEMESTER` setting.
 Must be called only after course scraping is completed.
+The run is recorded as a ScraperRun (see `instrumentation.py`).
+Returns a change report with the added programs and the programs whose courses changed.
 '''
-def perform_program_scraping(start_index, end_index):
-    try:
-        soup = get_soup_from_url()
-        programs_data = get_programs_data(soup)
-        save_programs_data(programs_data)
-        save_programs_courses(start_index, end_index)
-    except Exception as e:
-        print(f'Program Scraper Error: {e}')
+def perform_program_scraping(start_index, end_index, semester_code: Optional[str]=None) -> Dict:
+    report = new_change_report()
+    semester_code = semester_code or settings.CURRENT_SEMESTER
+    with RunRecorder(ScraperRun.Scraper.PROGRAM, semester_code) as run:
+        try:
+            semester = Semester.get_or_create_from_code(semester_code)
+            with run.stage('parse'):
+                soup = get_soup_from_url()
+                programs_data = get_programs_data(soup)
+            with run.stage('save'):
+                save_programs_data(programs_data, report)
+            save_programs_courses(start_index, end_index, report, semester)
+            logger.info(f'Program Scraper Changes ({semester.code}): {summarize_change_report(report)}')
+        except Exception as e:
+            run.fail(None, e)
+        run.changes = finalize_change_report(report)
+    return report
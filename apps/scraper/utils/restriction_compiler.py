@@ -0,0 +1,44 @@
+from django.db import transaction
+from typing import List
+
+from apps.courses.models import Course, CourseExclusion, CourseProgrammeRestriction
+from apps.courses.restrictions import parse_course_codes, parse_programme_restrictions
+
+
+RESTRICTION_FIELDS = [kind for kind, _ in CourseProgrammeRestriction.KIND_CHOICES]
+
+'''
+Replace the CourseExclusion and CourseProgrammeRestriction rows of the given courses with the ones parsed from
+their `mutually_exclusive` and programme restriction texts, so that the API filters and the eligibility evaluator
+use indexed lookups instead of parsing or scanning text.
+'''
+def save_course_restrictions(courses: List[Course]):
+    CourseExclusion.objects.filter(course__in=courses).delete()
+    CourseProgrammeRestriction.objects.filter(course__in=courses).delete()
+    CourseExclusion.objects.bulk_create([
+        CourseExclusion(course=course, excluded_code=code)
+        for course in courses
+        for code in parse_course_codes(course.mutually_exclusive)
+        if code != course.code
+    ])
+    CourseProgrammeRestriction.objects.bulk_create([
+        CourseProgrammeRestriction(
+            course=course,
+            kind=kind,
+            programme=programme,
+            first_year=first_year,
+            last_year=last_year,
+        )
+        for course in courses
+        for kind in RESTRICTION_FIELDS
+        for programme, first_year, last_year in dict.fromkeys(parse_programme_restrictions(getattr(course, kind)))
+    ])
+
+'''
+Rebuild the exclusion and programme restriction rows of all courses in a single pass, e.g. after changing the parsers.
+'''
+def compile_all_restrictions() -> int:
+    courses = list(Course.objects.only('code', 'mutually_exclusive', *RESTRICTION_FIELDS))
+    with transaction.atomic():
+        save_course_restrictions(courses)
+    return len(courses)
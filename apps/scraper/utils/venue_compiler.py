@@ -0,0 +1,45 @@
+from django.db import transaction
+from typing import Dict, Tuple
+
+from apps.courses.models import CourseSchedule, Semester, VenueOccupancy
+from apps.courses.schedules import SCHEDULE_SLOT_FIELDS, mask_to_schedule, slots_to_mask
+
+
+# venues that are not rooms, classes held there never make a venue occupied
+NON_ROOM_VENUES = {'', '-', 'ONLINE'}
+
+'''
+Return the occupancy of every venue of the semester, as venue -> (weekly bitmask, number of classes),
+from the schedules of the classes of the semester (indexes and classes common to all indexes of a course).
+Classes of the same lecture group are listed under every index of the course, so each class is counted once.
+'''
+def build_venue_occupancy(semester: Semester) -> Dict[str, Tuple[int, int]]:
+    occupancy: Dict[str, Tuple[int, int]] = {}
+    classes = CourseSchedule.objects.filter(semester=semester).values_list('venue', *SCHEDULE_SLOT_FIELDS).distinct()
+    for venue, *slots in classes:
+        venue = venue.strip()
+        if venue.upper() in NON_ROOM_VENUES:
+            continue
+        mask, count = occupancy.get(venue, (0, 0))
+        occupancy[venue] = (mask | slots_to_mask(*slots), count + 1)
+    return occupancy
+
+'''
+Replace the VenueOccupancy rows of the semester with the ones built from its class schedules.
+Returns the number of venues.
+'''
+def save_venue_occupancy(semester: Semester) -> int:
+    occupancy = build_venue_occupancy(semester)
+    with transaction.atomic():
+        VenueOccupancy.objects.filter(semester=semester).delete()
+        VenueOccupancy.objects.bulk_create([
+            VenueOccupancy(venue=venue, semester=semester, schedule=mask_to_schedule(mask), classes=count)
+            for venue, (mask, count) in sorted(occupancy.items())
+        ], batch_size=500)
+    return len(occupancy)
+
+'''
+Rebuild the venue occupancy rows of all semesters, e.g. after changing how they are built.
+'''
+def compile_all_venue_occupancy() -> int:
+    return sum(save_venue_occupancy(semester) for semester in Semester.objects.all())
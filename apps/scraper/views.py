@@ -1,20 +1,25 @@
+from rest_framework import generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from apps.common.pagination import CustomPagination
 from apps.common.permissions import IsSuperUser
 from apps.courses.models import Course, CourseProgram
-from apps.scraper.decorators import custom_swagger_index_schema
+from apps.scraper.decorators import custom_swagger_index_schema, custom_swagger_semester_schema
+from apps.scraper.models import ScraperRun
+from apps.scraper.serializers import ScraperRunSerializer
 from apps.scraper.utils.course_scraper import perform_course_scraping
 from apps.scraper.utils.detail_scraper import perform_course_detail_scraping
 from apps.scraper.utils.exam_scraper import perform_exam_schedule_scraping
 from apps.scraper.utils.program_scraper import perform_program_scraping
 
 
+@custom_swagger_semester_schema
 @api_view(['GET'])
 @permission_classes([IsSuperUser])
-def get_course_data(_):
-    perform_course_scraping()
-    return Response('Course Scraping Completed!')
+def get_course_data(request):
+    report = perform_course_scraping(request.query_params.get('semester'))
+    return Response({'message': 'Course Scraping Completed!', 'changes': report})
 
 @custom_swagger_index_schema
 @api_view(['GET'])
@@ -22,14 +27,15 @@ def get_course_data(_):
 def get_detail_data(request):
     start_index = request.query_params.get('start_index', 0)
     end_index = request.query_params.get('end_index', Course.objects.count())
-    perform_course_detail_scraping(int(start_index), int(end_index))
-    return Response('Course Detail Scraping Completed!')
+    semester = request.query_params.get('semester')
+    report = perform_course_detail_scraping(int(start_index), int(end_index), semester)
+    return Response({'message': 'Course Detail Scraping Completed!', 'changes': report})
 
 @api_view(['GET'])
 @permission_classes([IsSuperUser])
 def get_exam_data(_):
-    perform_exam_schedule_scraping()
-    return Response('Exam Scraping Completed!')
+    report = perform_exam_schedule_scraping()
+    return Response({'message': 'Exam Scraping Completed!', 'changes': report})
 
 @custom_swagger_index_schema
 @api_view(['GET'])
@@ -37,5 +43,30 @@ def get_exam_data(_):
 def get_program_data(request):
     start_index = request.query_params.get('start_index', 0)
     end_index = request.query_params.get('end_index', 9999)
-    perform_program_scraping(int(start_index), int(end_index))
-    return Response('Program Scraping Completed!')
+    semester = request.query_params.get('semester')
+    report = perform_program_scraping(int(start_index), int(end_index), semester)
+    return Response({'message': 'Program Scraping Completed!', 'changes': report})
+
+
+class ScraperRunListView(generics.ListAPIView):
+    '''
+    Recorded scraper runs, most recent first, optionally filtered by `scraper` (course, detail, program or exam)
+    and `status` query parameters.
+    '''
+    serializer_class = ScraperRunSerializer
+    permission_classes = [IsSuperUser]
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        queryset = ScraperRun.objects.all()
+        for field in ('scraper', 'status'):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+
+class ScraperRunDetailView(generics.RetrieveAPIView):
+    queryset = ScraperRun.objects.all()
+    serializer_class = ScraperRunSerializer
+    permission_classes = [IsSuperUser]
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# load the views and build the in-process caches in the background, see apps/common/warmup.py
+from django.conf import settings
+if settings.WARMUP:
+    from apps.common.warmup import warmup
+    warmup.start()
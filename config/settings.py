@@ -62,6 +62,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.common.middleware.PerformanceMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -130,9 +131,40 @@ else:
             'PASSWORD': getenv('PGPASSWORD'),
             'HOST': getenv('PGHOST'),
             'PORT': getenv('PGPORT', 5432),
+            'OPTIONS': {},
         }
     }
 
+# PG_CONNECTION_MODE is one of:
+# - 'pooled': every worker process keeps a psycopg connection pool of PG_POOL_MIN_SIZE to PG_POOL_MAX_SIZE connections,
+#   checked before being handed out, waiting up to PG_POOL_TIMEOUT seconds for a free connection
+# - 'persistent': every worker thread keeps its connection for PG_CONN_MAX_AGE seconds, checked before reuse
+# - 'pgbouncer': like 'persistent', but compatible with a PgBouncer in transaction pooling mode
+#   (no server-side cursors nor prepared statements, as consecutive transactions may use different server connections)
+# - 'off': a new connection per request
+
+PG_CONNECTION_MODE = getenv('PG_CONNECTION_MODE', 'pooled')
+
+if not SQLITE3:
+    if PG_CONNECTION_MODE == 'pooled':
+        # Django passes `check=ConnectionPool.check_connection` to the pool when health checks are enabled
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(getenv('PG_POOL_MIN_SIZE', 2)),
+            'max_size': int(getenv('PG_POOL_MAX_SIZE', 4)),
+            'timeout': float(getenv('PG_POOL_TIMEOUT', 10)),
+            'max_idle': float(getenv('PG_POOL_MAX_IDLE', 300)),
+            'max_lifetime': float(getenv('PG_POOL_MAX_LIFETIME', 3600)),
+        }
+    elif PG_CONNECTION_MODE in ('persistent', 'pgbouncer'):
+        DATABASES['default']['CONN_MAX_AGE'] = int(getenv('PG_CONN_MAX_AGE', 600))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+        if PG_CONNECTION_MODE == 'pgbouncer':
+            DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+            DATABASES['default']['OPTIONS']['prepare_threshold'] = None
+    elif PG_CONNECTION_MODE != 'off':
+        raise ValueError(f'Invalid PG_CONNECTION_MODE: {PG_CONNECTION_MODE}')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -175,8 +207,130 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Django REST framework
+# ORJSON renders and parses JSON with orjson instead of the standard library (see apps/common/renderers.py),
+# set to False to opt out
+
+ORJSON = getenv('ORJSON', 'True') == 'True'
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.common.renderers.ORJSONRenderer' if ORJSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.common.renderers.ORJSONParser' if ORJSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Request performance instrumentation (see apps/common/middleware.py)
+# METRICS_TOKEN allows Prometheus to scrape /metrics/ with the header `Authorization: Bearer <token>`,
+# superusers can always read it. PROFILE_LINES is the number of functions listed in cProfile reports.
+# Every request is logged as a JSON line when PERFORMANCE_LOG_LEVEL is INFO.
+
+METRICS_TOKEN = getenv('METRICS_TOKEN', '')
+
+PROFILE_LINES = int(getenv('PROFILE_LINES', 50))
+
+# Swagger UI (see apps/common/openapi.py): the page loads the OpenAPI document generated once per deploy,
+# instead of the one drf_yasg generates on every request
+
+SWAGGER_SETTINGS = {
+    'SPEC_URL': 'openapi-document',
+}
+
+# Worker warmup (see apps/common/warmup.py): the views and in-process caches are loaded in a background thread
+# when the server loads the application, /healthz/ready answers 200 once done.
+
+WARMUP = getenv('WARMUP', 'True') == 'True'
+
+# Shared cache of the read endpoints (see apps/common/cache.py), invalidated by the data version every scraper run bumps
+# CACHE_BACKEND is one of 'locmem' (per process), 'redis' (shared by all workers, requires the redis package),
+# 'file' (shared by the workers of a host) or 'dummy' (no caching, the backend of the test suite).
+# CACHE_LOCATION is the redis URL or the cache directory, CACHE_TIMEOUT the lifetime of an entry in seconds,
+# CACHE_VERSION_TTL how long in seconds a worker reuses the data version it read, i.e. how stale a response can be
+# after a scraper run (0 reads it on every cached request).
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'ntumods'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', path.join(BASE_DIR, 'django_cache')),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+
+CACHE_BACKEND = getenv('CACHE_BACKEND', 'locmem')
+
+CACHE_TIMEOUT = int(getenv('CACHE_TIMEOUT', 3600))
+
+CACHE_VERSION_TTL = float(getenv('CACHE_VERSION_TTL', 0))
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': getenv('CACHE_LOCATION') or CACHE_BACKENDS[CACHE_BACKEND][1],
+        'TIMEOUT': CACHE_TIMEOUT,
+        'KEY_PREFIX': 'ntumods',
+        'OPTIONS': {'MAX_ENTRIES': int(getenv('CACHE_MAX_ENTRIES', 5000))} if CACHE_BACKEND in ('locmem', 'file') else {},
+    },
+}
+
+# The test runner runs the suite on the dummy cache (see apps/common/testing.py), as responses cached by a test
+# would be served to the next tests, which change the data without bumping its version
+
+TEST_RUNNER = 'apps.common.testing.TestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'apps.performance': {
+            'handlers': ['console'],
+            'level': getenv('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'apps.scraper': {
+            'handlers': ['console'],
+            'level': getenv('SCRAPER_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Static files settings
 
 STATIC_ROOT = path.join(BASE_DIR, 'static')
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# Scraper record / replay cache, see apps/scraper/utils/page_cache.py
+# SCRAPER_CACHE_MODE is one of 'off', 'record' or 'replay'
+
+SCRAPER_CACHE_MODE = getenv('SCRAPER_CACHE_MODE', 'off')
+
+SCRAPER_CACHE_DIR = getenv('SCRAPER_CACHE_DIR', path.join(BASE_DIR, 'scraper_cache'))
+
+SCRAPER_UPSTREAM_URL = getenv('SCRAPER_UPSTREAM_URL', '')
+
+# Network requests of the scrapers failing with a connection error, a timeout or a 5xx status are retried
+# SCRAPER_FETCH_RETRIES times, waiting SCRAPER_FETCH_BACKOFF seconds, doubled after every retry
+
+SCRAPER_FETCH_RETRIES = int(getenv('SCRAPER_FETCH_RETRIES', 2))
+
+SCRAPER_FETCH_BACKOFF = float(getenv('SCRAPER_FETCH_BACKOFF', 1))
+
+# Number of parser worker processes used by the scrapers, defaults to the number of CPUs
+
+SCRAPER_PARSE_WORKERS = getenv('SCRAPER_PARSE_WORKERS', '')
+
+# Semester scraped by default when no `semester` query parameter is given to the scraper endpoints,
+# in the `acadsem` format of the NTU website, e.g. '2024_1'. It is marked as the current semester
+# (served by default by the course API) when it is scraped
+
+CURRENT_SEMESTER = getenv('CURRENT_SEMESTER', '2024_1')
@@ -16,28 +16,27 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
+from apps.common.openapi import swagger_view
+from apps.common.views import get_liveness, get_metrics, get_openapi_document, get_readiness, get_root
 
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title='NTUMODS BACKEND API',
-        default_version='1.0.0',
-        description='''
-            Swagger auto-generated documentation for NTUMods Backend API.
-            Easily try all the API endpoints here.
-        '''
-    ), public=True
-)
-
 urlpatterns = [
-    # swagger documentation
-    path('', schema_view.with_ui('swagger'), name='swagger'),
+    # trivial response for probes and crawlers hitting the root
+    path('', get_root, name='root'),
+    # swagger documentation, and the OpenAPI document it is built from (see apps/common/openapi.py)
+    path('docs/', swagger_view, name='swagger'),
+    path('docs/openapi.json', get_openapi_document, name='openapi-document'),
+    # liveness and readiness probes of the worker
+    path('healthz/live', get_liveness, name='liveness'),
+    path('healthz/ready', get_readiness, name='readiness'),
     # django admin page
     path('admin/', admin.site.urls),
 
+    # request metrics in the Prometheus text format
+    path('metrics/', get_metrics, name='metrics'),
+
     # other apps
+    path('stats/', include('apps.common.urls')),
     path('courses/', include('apps.courses.urls')),
     path('feedback/', include('apps.feedback.urls')),
     path('optimizer/', include('apps.optimizer.urls')),